@@ -0,0 +1,205 @@
+"""
+Cache LRU em memória com limite de entradas, orçamento de bytes e expiração amortizada
+"""
+import gzip
+import hashlib
+import heapq
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+class EntradaCache(Generic[V]):
+    """Entrada armazenada no cache"""
+
+    __slots__ = ("valor", "tamanho", "criado_em", "expira_em")
+
+    def __init__(self, valor: V, tamanho: int, criado_em: float, expira_em: float):
+        self.valor = valor
+        self.tamanho = tamanho
+        self.criado_em = criado_em
+        self.expira_em = expira_em
+
+
+class RespostaSerializada:
+    """Corpo de resposta já codificado (e opcionalmente comprimido), pronto para envio"""
+
+    __slots__ = ("corpo", "corpo_gzip", "etag")
+
+    # Corpos menores que isso não compensam a compressão
+    TAMANHO_MINIMO_GZIP = 1024
+
+    def __init__(self, corpo: bytes, comprimir: bool = False):
+        self.corpo = corpo
+        self.corpo_gzip = (
+            gzip.compress(corpo, compresslevel=6)
+            if comprimir and len(corpo) >= self.TAMANHO_MINIMO_GZIP
+            else None
+        )
+        # ETag forte do conteúdo (a variante gzip recebe um sufixo próprio)
+        self.etag = f'"{hashlib.md5(corpo).hexdigest()}"'
+
+    @property
+    def etag_gzip(self) -> str:
+        return f'{self.etag[:-1]}-gzip"'
+
+    @property
+    def tamanho(self) -> int:
+        return len(self.corpo) + (len(self.corpo_gzip) if self.corpo_gzip else 0)
+
+
+class CacheLRU(Generic[V]):
+    """
+    Cache LRU limitado por número de entradas e por bytes
+
+    - Acesso e inserção em O(1) via OrderedDict (ordem de uso recente)
+    - Expiração amortizada via heap ordenado por tempo de expiração: só as
+      entradas vencidas são visitadas, sem varrer o cache inteiro
+    """
+
+    def __init__(
+        self,
+        ttl_segundos: float,
+        max_entradas: int,
+        max_bytes: int,
+        tamanho_fn: Callable[[V], int],
+    ):
+        self.ttl_segundos = ttl_segundos
+        self.max_entradas = max(1, max_entradas)
+        self.max_bytes = max(1, max_bytes)
+        self._tamanho_fn = tamanho_fn
+
+        self._entradas: "OrderedDict[str, EntradaCache[V]]" = OrderedDict()
+        self._expiracoes: List[Tuple[float, str]] = []
+        self._bytes_usados = 0
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expiradas = 0
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    def __contains__(self, chave: str) -> bool:
+        return chave in self._entradas
+
+    def obter_entrada(self, chave: str) -> Optional[EntradaCache[V]]:
+        """Buscar entrada válida, marcando-a como usada recentemente"""
+        entrada = self._entradas.get(chave)
+        if entrada is None:
+            self._misses += 1
+            return None
+
+        if entrada.expira_em <= time.time():
+            self._remover(chave)
+            self._expiradas += 1
+            self._misses += 1
+            return None
+
+        self._entradas.move_to_end(chave)
+        self._hits += 1
+        return entrada
+
+    def obter(self, chave: str) -> Optional[V]:
+        """Buscar valor válido"""
+        entrada = self.obter_entrada(chave)
+        return entrada.valor if entrada else None
+
+    def definir(self, chave: str, valor: V, criado_em: Optional[float] = None) -> bool:
+        """
+        Inserir ou substituir valor
+
+        Args:
+            chave: Chave da entrada
+            valor: Valor a armazenar
+            criado_em: Momento de criação (epoch); padrão é agora
+
+        Returns:
+            False se o valor sozinho excede o orçamento de bytes e não foi armazenado
+        """
+        tamanho = self._tamanho_fn(valor)
+        if tamanho > self.max_bytes:
+            return False
+
+        if chave in self._entradas:
+            self._remover(chave)
+
+        criado_em = time.time() if criado_em is None else criado_em
+        expira_em = criado_em + self.ttl_segundos
+
+        self._entradas[chave] = EntradaCache(valor, tamanho, criado_em, expira_em)
+        self._bytes_usados += tamanho
+        heapq.heappush(self._expiracoes, (expira_em, chave))
+
+        self._despejar_excedente()
+        self._compactar_heap()
+        return True
+
+    def remover(self, chave: str) -> bool:
+        """Remover entrada"""
+        if chave not in self._entradas:
+            return False
+        self._remover(chave)
+        return True
+
+    def remover_expirados(self) -> int:
+        """Remover entradas vencidas (custo proporcional apenas às vencidas)"""
+        agora = time.time()
+        removidas = 0
+
+        while self._expiracoes and self._expiracoes[0][0] <= agora:
+            expira_em, chave = heapq.heappop(self._expiracoes)
+            entrada = self._entradas.get(chave)
+            # Ignorar registros obsoletos (entrada substituída ou já removida)
+            if entrada is not None and entrada.expira_em == expira_em:
+                self._remover(chave)
+                removidas += 1
+
+        self._expiradas += removidas
+        return removidas
+
+    def limpar(self):
+        """Remover todas as entradas"""
+        self._entradas.clear()
+        self._expiracoes.clear()
+        self._bytes_usados = 0
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Obter estatísticas de uso do cache"""
+        consultas = self._hits + self._misses
+        return {
+            "entradas": len(self._entradas),
+            "max_entradas": self.max_entradas,
+            "bytes_usados": self._bytes_usados,
+            "max_bytes": self.max_bytes,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_ratio": round(self._hits / consultas, 4) if consultas else 0.0,
+            "evictions": self._evictions,
+            "expiradas": self._expiradas,
+        }
+
+    def _remover(self, chave: str):
+        entrada = self._entradas.pop(chave)
+        self._bytes_usados -= entrada.tamanho
+
+    def _despejar_excedente(self):
+        """Despejar entradas menos usadas até respeitar os limites"""
+        while self._entradas and (
+            len(self._entradas) > self.max_entradas
+            or self._bytes_usados > self.max_bytes
+        ):
+            chave, entrada = self._entradas.popitem(last=False)
+            self._bytes_usados -= entrada.tamanho
+            self._evictions += 1
+
+    def _compactar_heap(self):
+        """Reconstruir o heap quando registros obsoletos dominarem"""
+        if len(self._expiracoes) > 2 * len(self._entradas) + 64:
+            self._expiracoes = [
+                (entrada.expira_em, chave) for chave, entrada in self._entradas.items()
+            ]
+            heapq.heapify(self._expiracoes)
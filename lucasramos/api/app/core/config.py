@@ -15,6 +15,68 @@ class Settings(BaseSettings):
     
     # Configurações do Gemini
     GEMINI_API_KEY: Optional[str] = None
+    LLM_BACKEND: str = "gemini"  # "gemini" ou "fake" (backend local para benchmarks de carga)
+    FAKE_LLM_LATENCIA_MS: float = 3000.0  # Latência média do backend local
+    FAKE_LLM_VARIACAO_MS: float = 1000.0  # Variação (±) da latência do backend local
+    FAKE_LLM_TAXA_FALHA: float = 0.0  # Fração de chamadas do backend local que falham (0 a 1)
+    GEMINI_MAX_CONCURRENCY: int = 4  # Chamadas simultâneas ao Gemini por processo
+    GEMINI_TIMEOUT_SECONDS: float = 30.0  # Prazo por chamada ao Gemini (inclui a espera por vaga)
+    GEMINI_CB_LIMITE_FALHAS: int = 5  # Falhas consecutivas que abrem o circuit breaker
+    GEMINI_CB_TEMPO_ABERTO_SEGUNDOS: float = 30.0  # Tempo com o circuito aberto antes de testar de novo
+    GEMINI_HEDGE: bool = False  # Disparar segunda chamada quando a primeira demora além do percentil
+    GEMINI_HEDGE_PERCENTIL: float = 95.0  # Percentil das latências recentes usado como atraso do hedge
+    GEMINI_HEDGE_MIN_AMOSTRAS: int = 20  # Latências registradas antes de habilitar o hedge
+    LLM_RATE_LIMIT: bool = True  # Limitar tokens consumidos do modelo (global e por usuário)
+    LLM_TOKENS_POR_MINUTO_GLOBAL: int = 500000  # Cota global do processo (tokens estimados/minuto)
+    LLM_TOKENS_POR_MINUTO_USUARIO: int = 30000  # Cota por usuário autenticado ou IP
+    LLM_TOKENS_RESPOSTA_ESTIMADOS: int = 2000  # Tokens de resposta cobrados antes da chamada
+    ROUTE_CACHE_SOFT_TTL_HORAS: float = 24.0  # Após este tempo a rota é servida e revalidada em segundo plano
+    ROUTE_CACHE_HARD_TTL_HORAS: float = 72.0  # Após este tempo a rota expira e a requisição espera o Gemini
+    ROUTE_CACHE_PERSISTENTE: bool = True  # Cache de rotas no PostgreSQL (tabela rotas_cache)
+    ROUTE_CACHE_MANUTENCAO_SEGUNDOS: int = 300  # Intervalo para gravar hits em lote e remover rotas expiradas do PostgreSQL
+    ROUTE_CACHE_MAX_ENTRADAS: int = 2000  # Máximo de rotas no cache em memória
+    ROUTE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # Orçamento de memória do cache (64 MB)
+    ROUTE_CACHE_REVERSO: bool = False  # Atender A→B invertendo uma rota B→A em cache
+    ROUTE_CACHE_RESPOSTA_TTL_SEGUNDOS: int = 300  # Tempo de vida do corpo HTTP já serializado das rotas
+    ROUTE_CACHE_GZIP: bool = True  # Guardar também o corpo serializado comprimido com gzip
+    ROTA_COMPOSTA: bool = True  # Montar rotas com pontos cacheados por cidade + trecho entre elas
+    
+    # Cache HTTP (ETag / If-None-Match / Cache-Control)
+    HTTP_CACHE_CIDADES_MAX_AGE: int = 3600  # max-age (s) das listagens e buscas de cidades
+    HTTP_CACHE_ROTAS_MAX_AGE: int = 300  # max-age (s) das rotas turísticas
+    
+    # Índice espacial em memória (cidades e pontos turísticos)
+    INDICE_ESPACIAL: bool = True  # Consultas por raio/k-vizinhos no índice em vez de varrer o banco
+    GEO_BANCO: str = "auto"  # Sem índice em memória: auto, postgis, earthdistance ou nenhum (migração 006)
+    
+    # Índice de nomes em memória para o autocomplete de cidades
+    AUTOCOMPLETE_EM_MEMORIA: bool = True  # /cities/search responde do índice; False: busca no banco (trigramas, migração 007)
+    AUTOCOMPLETE_SIMILARIDADE_MINIMA: float = 0.3  # Similaridade de trigramas para tolerar erros de digitação
+    
+    # Índices em memória (espacial e autocomplete): reconstruídos em segundo plano quando invalidados
+    INDICES_VERIFICACAO_SEGUNDOS: int = 60  # Intervalo da verificação de escritas de outras instâncias nas tabelas (0: desativada)
+    
+    # Distância, tempo de viagem e ordem dos pontos das rotas, calculados localmente (sem IA)
+    DISTANCIA_FATOR_RODOVIARIO: float = 1.3  # Razão média entre o percurso pela estrada e a linha reta
+    VELOCIDADE_MEDIA_KMH: float = 70.0  # Velocidade média de viagem de carro
+    ORDENAR_PONTOS_ROTA: bool = True  # Reordenar os pontos da rota (vizinho mais próximo + 2-opt)
+    ORDENACAO_ORCAMENTO_MS: float = 5.0  # Tempo máximo da melhoria 2-opt por rota
+    
+    # Catálogo de pontos turísticos gerados pela IA
+    PERSISTIR_PONTOS_GERADOS: bool = True  # Gravar pontos do Gemini em pontos_turisticos
+    PONTOS_RAIO_CIDADE_KM: float = 50.0  # Raio para associar um ponto à cidade mais próxima
+    ROTA_BANCO_MIN_PONTOS_CIDADE: int = 3  # Pontos catalogados para a parte de uma cidade (rota composta) sair do banco sem o Gemini
+    ROTA_BANCO_MAX_PONTOS_CIDADE: int = 5  # Pontos por cidade nas partes montadas do banco
+    CORREDOR_LARGURA_KM: float = 30.0  # Distância máxima do caminho origem → destino para um ponto entrar na rota
+
+    # Importação de municípios do IBGE
+    IBGE_CONCORRENCIA: int = 6  # UFs buscadas simultaneamente na API do IBGE
+    MUNICIPIOS_SNAPSHOT: str = "data/municipios.csv.gz"  # Snapshot com coordenadas reais (relativo à pasta api)
+
+    # Aquecimento do cache de rotas (scripts/warm_route_cache.py)
+    AQUECIMENTO_PARES: str = ""  # Pares fixos: "São Paulo/SP>Rio de Janeiro/RJ;Curitiba/PR>Florianópolis/SC"
+    AQUECIMENTO_TOP_N: int = 50  # Pares mais solicitados (histórico de roteiros) a aquecer
+    AQUECIMENTO_CONCORRENCIA: int = 2  # Rotas geradas simultaneamente pelo script
     
     # PostgreSQL
     POSTGRES_USER: str = "user"
@@ -0,0 +1,136 @@
+"""
+Distâncias vetorizadas (NumPy) de pontos a um corredor origem → destino
+
+O corredor é uma polilinha de vértices (lat, lon) cujos trechos são arcos de
+grande círculo. Para cada ponto são calculados, de uma vez para todos os pontos:
+
+- distancia_km: menor distância até a polilinha (cross-track, ou até o vértice
+  mais próximo quando a projeção cai fora do trecho)
+- desvio_km: custo extra de passar pelo ponto, d(A, P) + d(P, B) - d(A, B)
+  no trecho mais próximo
+- fracao: posição ao longo do percurso (0 na origem, 1 no destino), usada para
+  ordenar os pontos na sequência da viagem
+"""
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from app.core.geo import RAIO_TERRA_KM
+
+
+def _vetores_unitarios(latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """Coordenadas em graus → vetores unitários 3D, shape (n, 3)"""
+    phi = np.radians(latitudes)
+    lam = np.radians(longitudes)
+    cos_phi = np.cos(phi)
+    return np.stack([cos_phi * np.cos(lam), cos_phi * np.sin(lam), np.sin(phi)], axis=-1)
+
+
+def _angulo(u: np.ndarray, v: np.ndarray) -> np.ndarray:
+    """Ângulo central entre vetores unitários (estável também para ângulos pequenos)"""
+    return np.arctan2(np.linalg.norm(np.cross(u, v), axis=-1), np.sum(u * v, axis=-1))
+
+
+def distancias_ao_corredor(
+    latitudes: Sequence[float],
+    longitudes: Sequence[float],
+    vertices: List[Tuple[float, float]],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Distância, desvio e fração do percurso de cada ponto em relação à polilinha
+
+    Args:
+        latitudes, longitudes: coordenadas dos pontos (graus)
+        vertices: polilinha [(lat, lon), ...] com pelo menos 2 vértices
+
+    Returns:
+        Arrays (distancia_km, desvio_km, fracao), um valor por ponto
+    """
+    pontos = _vetores_unitarios(np.asarray(latitudes, dtype=float), np.asarray(longitudes, dtype=float))
+    n = len(pontos)
+    if n == 0:
+        vazio = np.empty(0)
+        return vazio, vazio, vazio
+
+    vertices_3d = _vetores_unitarios(
+        np.array([v[0] for v in vertices], dtype=float), np.array([v[1] for v in vertices], dtype=float)
+    )
+    comprimentos = _angulo(vertices_3d[:-1], vertices_3d[1:])
+    acumulado = np.concatenate([[0.0], np.cumsum(comprimentos)])
+    total = acumulado[-1]
+
+    melhor_distancia = np.full(n, np.inf)
+    melhor_desvio = np.zeros(n)
+    melhor_fracao = np.zeros(n)
+
+    for i, (a, b) in enumerate(zip(vertices_3d[:-1], vertices_3d[1:])):
+        d_pa = _angulo(pontos, a)
+        d_pb = _angulo(pontos, b)
+        comprimento = comprimentos[i]
+
+        normal = np.cross(a, b)
+        norma = np.linalg.norm(normal)
+        if norma < 1e-12:
+            # Trecho degenerado (vértices coincidentes): distância ao vértice
+            distancia = d_pa
+            ao_longo = np.zeros(n)
+        else:
+            normal = normal / norma
+            seno_cross = np.clip(pontos @ normal, -1.0, 1.0)
+            cross_track = np.abs(np.arcsin(seno_cross))
+
+            # Projeção no grande círculo do trecho; dentro do arco AB?
+            projecao = pontos - np.outer(seno_cross, normal)
+            projecao /= np.maximum(np.linalg.norm(projecao, axis=1, keepdims=True), 1e-12)
+            dentro = (np.cross(a, projecao) @ normal >= 0) & (np.cross(projecao, b) @ normal >= 0)
+
+            distancia = np.where(dentro, cross_track, np.minimum(d_pa, d_pb))
+            ao_longo = np.where(dentro, _angulo(np.broadcast_to(a, projecao.shape), projecao),
+                                np.where(d_pa <= d_pb, 0.0, comprimento))
+
+        desvio = d_pa + d_pb - comprimento
+        mais_perto = distancia < melhor_distancia
+        melhor_distancia = np.where(mais_perto, distancia, melhor_distancia)
+        melhor_desvio = np.where(mais_perto, desvio, melhor_desvio)
+        melhor_fracao = np.where(mais_perto, (acumulado[i] + ao_longo) / total if total > 0 else 0.0, melhor_fracao)
+
+    return (
+        melhor_distancia * RAIO_TERRA_KM,
+        np.maximum(melhor_desvio, 0.0) * RAIO_TERRA_KM,
+        np.clip(melhor_fracao, 0.0, 1.0),
+    )
+
+
+def _amostrar_polilinha(vertices: List[Tuple[float, float]], amostras_por_trecho: int = 16) -> np.ndarray:
+    """Pontos (lat, lon) ao longo dos arcos de grande círculo da polilinha"""
+    vertices_3d = _vetores_unitarios(
+        np.array([v[0] for v in vertices], dtype=float), np.array([v[1] for v in vertices], dtype=float)
+    )
+    t = np.linspace(0.0, 1.0, amostras_por_trecho + 1)[:, None]
+    amostras = []
+    for a, b in zip(vertices_3d[:-1], vertices_3d[1:]):
+        # Interpolação linear normalizada: segue o arco entre a e b
+        pontos = (1 - t) * a + t * b
+        amostras.append(pontos / np.maximum(np.linalg.norm(pontos, axis=1, keepdims=True), 1e-12))
+    pontos = np.concatenate(amostras)
+    latitudes = np.degrees(np.arcsin(np.clip(pontos[:, 2], -1.0, 1.0)))
+    longitudes = np.degrees(np.arctan2(pontos[:, 1], pontos[:, 0]))
+    return np.stack([latitudes, longitudes], axis=-1)
+
+
+def caixa_do_corredor(vertices: List[Tuple[float, float]], largura_km: float) -> Tuple[float, float, float, float]:
+    """Caixa (lat_min, lat_max, lon_min, lon_max) que contém o corredor, para pré-filtro"""
+    amostras = _amostrar_polilinha(vertices)
+    latitudes, longitudes = amostras[:, 0], amostras[:, 1]
+
+    # Pequena folga para o arco entre amostras consecutivas
+    delta_lat = largura_km / (np.pi * RAIO_TERRA_KM / 180) + 0.01
+    lat_extrema = min(89.9, float(np.max(np.abs(latitudes))) + delta_lat)
+    delta_lon = delta_lat / np.cos(np.radians(lat_extrema))
+
+    return (
+        float(latitudes.min() - delta_lat),
+        float(latitudes.max() + delta_lat),
+        float(longitudes.min() - delta_lon),
+        float(longitudes.max() + delta_lon),
+    )
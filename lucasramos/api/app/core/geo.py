@@ -0,0 +1,96 @@
+"""
+Funções geográficas auxiliares
+
+Distâncias de grande círculo (haversine), individuais e vetorizadas (NumPy)
+para muitos pares de uma vez, e a estimativa local de distância rodoviária e
+tempo de viagem usada nas rotas (em vez de pedir esses valores à IA).
+"""
+import math
+from typing import Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.core.config import settings
+
+RAIO_TERRA_KM = 6371.0088
+
+Coordenadas = Union[float, Sequence[float], np.ndarray]
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Distância de grande círculo entre duas coordenadas, em km"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * RAIO_TERRA_KM * math.asin(math.sqrt(a))
+
+
+def haversine_km_lote(lat1: Coordenadas, lon1: Coordenadas, lat2: Coordenadas, lon2: Coordenadas) -> np.ndarray:
+    """
+    Distâncias de grande círculo para muitos pares de uma vez, em km
+
+    Os argumentos seguem o broadcasting do NumPy: arrays do mesmo tamanho dão a
+    distância par a par; uma coordenada escalar contra arrays dá a distância de
+    um ponto a vários.
+    """
+    phi1 = np.radians(np.asarray(lat1, dtype=float))
+    phi2 = np.radians(np.asarray(lat2, dtype=float))
+    dphi = phi2 - phi1
+    dlambda = np.radians(np.asarray(lon2, dtype=float) - np.asarray(lon1, dtype=float))
+
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    return 2 * RAIO_TERRA_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def matriz_distancias_km(latitudes: Sequence[float], longitudes: Sequence[float]) -> np.ndarray:
+    """Matriz (n, n) das distâncias de grande círculo entre todos os pares de pontos"""
+    latitudes = np.asarray(latitudes, dtype=float)
+    longitudes = np.asarray(longitudes, dtype=float)
+    return haversine_km_lote(latitudes[:, None], longitudes[:, None], latitudes[None, :], longitudes[None, :])
+
+
+def estimar_viagem(
+    lat1: float, lon1: float, lat2: float, lon2: float,
+    fator_rodoviario: Optional[float] = None,
+    velocidade_kmh: Optional[float] = None,
+) -> Tuple[float, float]:
+    """
+    Distância rodoviária e tempo de viagem de carro estimados entre duas coordenadas
+
+    A distância em linha reta é multiplicada pelo fator rodoviário (razão média
+    entre o percurso pela estrada e a linha reta) e o tempo vem da velocidade média.
+
+    Returns:
+        Tupla (distancia_km, tempo_horas)
+    """
+    distancias, tempos = estimar_viagens_lote(lat1, lon1, lat2, lon2, fator_rodoviario, velocidade_kmh)
+    return float(distancias), float(tempos)
+
+
+def estimar_viagens_lote(
+    lat1: Coordenadas, lon1: Coordenadas, lat2: Coordenadas, lon2: Coordenadas,
+    fator_rodoviario: Optional[float] = None,
+    velocidade_kmh: Optional[float] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Versão vetorizada de `estimar_viagem` (mesmo broadcasting de `haversine_km_lote`)"""
+    fator = fator_rodoviario if fator_rodoviario is not None else settings.DISTANCIA_FATOR_RODOVIARIO
+    velocidade = velocidade_kmh if velocidade_kmh is not None else settings.VELOCIDADE_MEDIA_KMH
+
+    distancias = haversine_km_lote(lat1, lon1, lat2, lon2) * fator
+    return distancias, distancias / velocidade
+
+
+def formatar_distancia(distancia_km: float) -> str:
+    """Distância para exibição (ex: "430 km")"""
+    return f"{distancia_km:.0f} km" if distancia_km >= 10 else f"{distancia_km:.1f} km"
+
+
+def formatar_tempo_viagem(tempo_horas: float) -> str:
+    """Tempo de viagem para exibição (ex: "5h40 de carro", "40 min de carro")"""
+    minutos = max(1, round(tempo_horas * 60 / 5) * 5)
+    horas, minutos = divmod(minutos, 60)
+    if not horas:
+        return f"{minutos} min de carro"
+    return f"{horas}h{minutos:02d} de carro" if minutos else f"{horas}h de carro"
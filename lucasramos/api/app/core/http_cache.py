@@ -0,0 +1,99 @@
+"""
+Cache HTTP: ETags fortes, requisições condicionais (If-None-Match → 304) e Cache-Control
+
+O ETag vem de um carimbo de versão quando existe (ex: id + data_atualizacao
+de um roteiro), evitando até a serialização no caso 304, ou do hash do corpo já
+serializado nos demais casos.
+"""
+import hashlib
+from typing import Any, Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+
+
+def gerar_etag(*partes: Any) -> str:
+    """ETag forte a partir de bytes (conteúdo) ou de partes de um carimbo de versão"""
+    if len(partes) == 1 and isinstance(partes[0], bytes):
+        conteudo = partes[0]
+    else:
+        conteudo = "|".join(str(parte) for parte in partes).encode()
+    return f'"{hashlib.md5(conteudo).hexdigest()}"'
+
+
+def etag_corresponde(if_none_match: Optional[str], etag: str) -> bool:
+    """Verificar se o ETag está no If-None-Match (comparação fraca, como manda o RFC 9110)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    valor = etag.removeprefix("W/")
+    return any(
+        candidato.strip().removeprefix("W/") == valor
+        for candidato in if_none_match.split(",")
+    )
+
+
+def cache_control_publico(max_age: int) -> str:
+    """Cache-Control para dados iguais para todos os clientes (navegador e proxy)"""
+    return f"public, max-age={max_age}" if max_age > 0 else "no-cache"
+
+
+# Roteiros são do usuário: só o navegador guarda, sempre revalidando com o ETag
+CACHE_CONTROL_PRIVADO = "private, no-cache"
+
+
+def cabecalhos_cache(etag: str, cache_control: str, vary: Optional[str] = None) -> Dict[str, str]:
+    cabecalhos = {"ETag": etag, "Cache-Control": cache_control}
+    if vary:
+        cabecalhos["Vary"] = vary
+    return cabecalhos
+
+
+def resposta_nao_modificada(
+    request: Request, etag: str, cache_control: str, vary: Optional[str] = None
+) -> Optional[Response]:
+    """Resposta 304 se o cliente já tem a versão atual, senão None"""
+    if etag_corresponde(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=cabecalhos_cache(etag, cache_control, vary))
+    return None
+
+
+def resposta_json_condicional(
+    request: Request,
+    dados: Any,
+    cache_control: str,
+    etag: Optional[str] = None,
+) -> Response:
+    """
+    Serializar `dados` como JSON com ETag e Cache-Control, respondendo 304
+    quando o If-None-Match do cliente corresponder
+
+    Args:
+        etag: ETag por carimbo de versão; sem ele, é o hash do corpo serializado
+    """
+    if etag is not None:
+        nao_modificada = resposta_nao_modificada(request, etag, cache_control)
+        if nao_modificada is not None:
+            return nao_modificada
+
+    resposta = JSONResponse(content=jsonable_encoder(dados))
+    etag = etag or gerar_etag(resposta.body)
+
+    nao_modificada = resposta_nao_modificada(request, etag, cache_control)
+    if nao_modificada is not None:
+        return nao_modificada
+
+    resposta.headers.update(cabecalhos_cache(etag, cache_control))
+    return resposta
+
+
+def cache_control_cidades() -> str:
+    return cache_control_publico(settings.HTTP_CACHE_CIDADES_MAX_AGE)
+
+
+def cache_control_rotas() -> str:
+    return cache_control_publico(settings.HTTP_CACHE_ROTAS_MAX_AGE)
@@ -0,0 +1,246 @@
+"""
+Índice de nomes em memória para o autocomplete de cidades
+
+Nomes normalizados (sem acentos, minúsculos, pontuação como espaço) guardados
+em uma lista ordenada de chaves: o nome inteiro e cada sufixo que começa em uma
+palavra ("rio grande do sul", "grande do sul", "do sul", "sul"). Uma busca por
+prefixo é uma bisseção nessa lista. Quando os prefixos não bastam (erro de
+digitação), os candidatos saem de um índice invertido de trigramas e são
+ordenados pela similaridade, como o pg_trgm.
+
+Ordem dos resultados: nome igual ao termo, nome começando pelo termo, palavra
+começando pelo termo, trigramas; dentro de cada grupo, a UF preferida, o peso
+do item (maior primeiro), nomes mais curtos e ordem alfabética.
+
+Como o índice espacial, é compartilhado pelo processo e reconstruído a partir
+do banco, em segundo plano, quando é invalidado.
+"""
+import bisect
+import heapq
+import re
+import time
+from collections import Counter
+from operator import itemgetter
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from unidecode import unidecode
+
+# Grupos de correspondência, do mais forte para o mais fraco
+NOME_EXATO = 0
+PREFIXO_NOME = 1
+PREFIXO_PALAVRA = 2
+TRIGRAMA = 3
+
+_NAO_ALFANUMERICO = re.compile(r"[^a-z0-9]+")
+
+# (id, nome, uf, peso, dados devolvidos na busca)
+Item = Tuple[int, str, str, float, Any]
+Chave = Tuple[str, int]  # (texto normalizado a partir de uma palavra, id)
+
+
+def normalizar_nome(texto: str) -> str:
+    """Sem acentos, minúsculo e com pontuação/hífens trocados por um espaço"""
+    return _NAO_ALFANUMERICO.sub(" ", unidecode(texto).lower()).strip()
+
+
+def trigramas(texto_normalizado: str) -> FrozenSet[str]:
+    """Trigramas no estilo pg_trgm: cada palavra com dois espaços antes e um depois"""
+    resultado = set()
+    for palavra in texto_normalizado.split():
+        palavra = f"  {palavra} "
+        resultado.update(palavra[i:i + 3] for i in range(len(palavra) - 2))
+    return frozenset(resultado)
+
+
+def _chaves(item_id: int, nome_normalizado: str) -> List[Chave]:
+    """Nome inteiro e cada sufixo iniciado em uma palavra"""
+    palavras = nome_normalizado.split()
+    return [(" ".join(palavras[i:]), item_id) for i in range(len(palavras))]
+
+
+def _ordem(nome_normalizado: str, peso: float) -> tuple:
+    """Desempate entre itens do mesmo grupo: maior peso, nome mais curto, alfabética"""
+    return (-peso, len(nome_normalizado), nome_normalizado)
+
+
+class IndiceAutocomplete:
+    """Busca por prefixo e por trigramas sobre os nomes dos itens"""
+
+    def __init__(self, nome: str, similaridade_minima: float = 0.3):
+        self.nome = nome
+        self.similaridade_minima = similaridade_minima
+
+        # id → (nome normalizado, uf, ordem fixa, dados, trigramas)
+        self._itens: Dict[int, Tuple[str, str, tuple, Any, FrozenSet[str]]] = {}
+        self._chaves: List[Chave] = []
+        self._trigramas: Dict[str, List[int]] = {}
+        self._construido_em: Optional[float] = None
+        self._invalido = True
+        self._versao = 0
+
+        self._reconstrucoes = 0
+        self._consultas = 0
+        self._consultas_trigrama = 0
+        self._duracao_ultima_reconstrucao_ms = 0.0
+
+    def __len__(self) -> int:
+        return len(self._itens)
+
+    @property
+    def construido(self) -> bool:
+        return self._construido_em is not None
+
+    @property
+    def desatualizado(self) -> bool:
+        """Índice invalidado ou nunca construído"""
+        return self._invalido or self._construido_em is None
+
+    @property
+    def versao(self) -> int:
+        """Contador de invalidações e alterações pontuais (detecta mudanças durante uma reconstrução)"""
+        return self._versao
+
+    def invalidar(self):
+        """Marcar para reconstrução (feita em segundo plano por quem mantém o índice)"""
+        self._invalido = True
+        self._versao += 1
+
+    def reconstruir(self, itens: Iterable[Item]):
+        """Substituir todo o conteúdo do índice (troca atômica das estruturas)"""
+        inicio = time.perf_counter()
+        registros: Dict[int, Tuple[str, str, tuple, Any, FrozenSet[str]]] = {}
+        chaves: List[Chave] = []
+        por_trigrama: Dict[str, List[int]] = {}
+
+        for item_id, nome, uf, peso, dados in itens:
+            nome_normalizado = normalizar_nome(nome or "")
+            if not nome_normalizado:
+                continue
+            tri = trigramas(nome_normalizado)
+            registros[item_id] = (nome_normalizado, (uf or "").upper(), _ordem(nome_normalizado, peso), dados, tri)
+            chaves.extend(_chaves(item_id, nome_normalizado))
+            for trigrama in tri:
+                por_trigrama.setdefault(trigrama, []).append(item_id)
+
+        chaves.sort()
+        self._itens, self._chaves, self._trigramas = registros, chaves, por_trigrama
+        self._construido_em = time.monotonic()
+        self._invalido = False
+        self._reconstrucoes += 1
+        self._duracao_ultima_reconstrucao_ms = (time.perf_counter() - inicio) * 1000
+
+    def inserir(self, item_id: int, nome: str, uf: str, peso: float, dados: Any):
+        """Inserir ou substituir um item (ignorado se o índice ainda não foi construído)"""
+        if not self.construido:
+            return
+
+        self.remover(item_id)
+        self._versao += 1
+        nome_normalizado = normalizar_nome(nome or "")
+        if not nome_normalizado:
+            return
+        tri = trigramas(nome_normalizado)
+        self._itens[item_id] = (nome_normalizado, (uf or "").upper(), _ordem(nome_normalizado, peso), dados, tri)
+        for chave in _chaves(item_id, nome_normalizado):
+            bisect.insort(self._chaves, chave)
+        for trigrama in tri:
+            self._trigramas.setdefault(trigrama, []).append(item_id)
+
+    def remover(self, item_id: int):
+        registro = self._itens.pop(item_id, None)
+        if registro is None:
+            return
+        self._versao += 1
+        nome_normalizado, _, _, _, tri = registro
+        for chave in _chaves(item_id, nome_normalizado):
+            posicao = bisect.bisect_left(self._chaves, chave)
+            if posicao < len(self._chaves) and self._chaves[posicao] == chave:
+                del self._chaves[posicao]
+        for trigrama in tri:
+            ids = [outro for outro in self._trigramas.get(trigrama, ()) if outro != item_id]
+            if ids:
+                self._trigramas[trigrama] = ids
+            else:
+                self._trigramas.pop(trigrama, None)
+
+    def buscar(self, termo: str, limite: int = 10, uf: Optional[str] = None) -> List[Tuple[int, Any]]:
+        """
+        Itens cujo nome começa com o termo (ou com uma de suas palavras) e,
+        se faltarem resultados, os mais parecidos por trigramas
+
+        Args:
+            termo: texto digitado (acentos e caixa são ignorados)
+            limite: número máximo de resultados
+            uf: UF preferida; itens dela sobem dentro de cada grupo (não filtra)
+
+        Returns:
+            Lista de (grupo, dados) na ordem de relevância
+        """
+        self._consultas += 1
+        consulta = normalizar_nome(termo)
+        if not consulta or limite <= 0:
+            return []
+        uf = uf.upper() if uf else None
+
+        # Chave de ordenação por item: (grupo, fora da UF, -similaridade, peso/tamanho/nome)
+        itens = self._itens
+        relevancia: Dict[int, tuple] = {}
+        chaves = self._chaves
+        posicao = bisect.bisect_left(chaves, (consulta,))
+        while posicao < len(chaves) and chaves[posicao][0].startswith(consulta):
+            texto, item_id = chaves[posicao]
+            posicao += 1
+            nome_normalizado, uf_item, ordem, _, _ = itens[item_id]
+            if texto == nome_normalizado:
+                grupo = NOME_EXATO if texto == consulta else PREFIXO_NOME
+            elif item_id in relevancia:
+                continue  # já encontrado pelo nome inteiro ou por outra palavra
+            else:
+                grupo = PREFIXO_PALAVRA
+            relevancia[item_id] = (grupo, uf is not None and uf_item != uf, 0.0, ordem)
+
+        if len(relevancia) < limite:
+            self._consultas_trigrama += 1
+            for item_id, similaridade in self._similares(consulta):
+                if item_id not in relevancia:
+                    _, uf_item, ordem, _, _ = itens[item_id]
+                    relevancia[item_id] = (TRIGRAMA, uf is not None and uf_item != uf, -similaridade, ordem)
+
+        melhores = heapq.nsmallest(limite, relevancia.items(), key=itemgetter(1))
+        return [(chave[0], itens[item_id][3]) for item_id, chave in melhores]
+
+    def estatisticas(self) -> Dict[str, Any]:
+        return {
+            "nome": self.nome,
+            "itens": len(self._itens),
+            "chaves_prefixo": len(self._chaves),
+            "trigramas": len(self._trigramas),
+            "construido_ha_segundos": (
+                round(time.monotonic() - self._construido_em, 1) if self._construido_em else None
+            ),
+            "reconstrucoes": self._reconstrucoes,
+            "duracao_ultima_reconstrucao_ms": round(self._duracao_ultima_reconstrucao_ms, 2),
+            "consultas": self._consultas,
+            "consultas_trigrama": self._consultas_trigrama,
+        }
+
+    def _similares(self, consulta: str) -> List[Tuple[int, float]]:
+        """Itens com similaridade de trigramas (|A∩B| / |A∪B|) acima do mínimo"""
+        tri_consulta = trigramas(consulta)
+        if not tri_consulta:
+            return []
+        comuns: Counter = Counter()
+        for trigrama in tri_consulta:
+            comuns.update(self._trigramas.get(trigrama, ()))
+
+        # |A∩B| / |A∪B| >= s exige |A∩B| >= s * |A|: descarta cedo os candidatos fracos
+        minimo_comuns = self.similaridade_minima * len(tri_consulta)
+        resultado = []
+        for item_id, compartilhados in comuns.items():
+            if compartilhados < minimo_comuns:
+                continue
+            tri_item = self._itens[item_id][4]
+            similaridade = compartilhados / (len(tri_consulta) + len(tri_item) - compartilhados)
+            if similaridade >= self.similaridade_minima:
+                resultado.append((item_id, similaridade))
+        return resultado
@@ -0,0 +1,261 @@
+"""
+Índice espacial em memória para consultas por raio e k vizinhos mais próximos
+
+Grade regular de células lat/lon (um geohash simplificado): cada célula guarda
+os itens (id, latitude, longitude) que caem nela. Uma consulta visita só as
+células que podem conter resultados e calcula a distância haversine exata dos
+candidatos, devolvendo-os ordenados por distância.
+
+O índice é compartilhado pelo processo e reconstruído a partir do banco, em
+segundo plano, quando é invalidado (escritas em lote neste processo ou
+detectadas em outras instâncias); escritas pontuais o atualizam diretamente.
+Não trata a linha de data internacional, irrelevante para o Brasil.
+"""
+import heapq
+import math
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.geo import RAIO_TERRA_KM, haversine_km
+
+# Km por grau de latitude (e de longitude no equador)
+KM_POR_GRAU = math.pi * RAIO_TERRA_KM / 180
+
+LATITUDE_MAXIMA = 89.9
+
+Celula = Tuple[int, int]
+Item = Tuple[int, float, float]
+
+
+class IndiceEspacial:
+    """Grade de células de `tamanho_celula_graus` com busca por raio e k-vizinhos"""
+
+    def __init__(self, nome: str, tamanho_celula_graus: float = 0.25):
+        self.nome = nome
+        self.tamanho_celula = tamanho_celula_graus
+
+        self._celulas: Dict[Celula, List[Item]] = {}
+        self._posicoes: Dict[int, Celula] = {}
+        self._limites: Optional[Tuple[int, int, int, int]] = None  # lat_min, lat_max, lon_min, lon_max (células)
+        self._construido_em: Optional[float] = None
+        self._invalido = True
+        self._versao = 0
+
+        self._reconstrucoes = 0
+        self._consultas = 0
+        self._duracao_ultima_reconstrucao_ms = 0.0
+
+    def __len__(self) -> int:
+        return len(self._posicoes)
+
+    @property
+    def construido(self) -> bool:
+        return self._construido_em is not None
+
+    @property
+    def desatualizado(self) -> bool:
+        """Índice invalidado ou nunca construído"""
+        return self._invalido or self._construido_em is None
+
+    @property
+    def versao(self) -> int:
+        """Contador de invalidações e alterações pontuais (detecta mudanças durante uma reconstrução)"""
+        return self._versao
+
+    def invalidar(self):
+        """Marcar para reconstrução (feita em segundo plano por quem mantém o índice)"""
+        self._invalido = True
+        self._versao += 1
+
+    def reconstruir(self, itens: Iterable[Item]):
+        """Substituir todo o conteúdo do índice (troca atômica das estruturas)"""
+        inicio = time.perf_counter()
+        celulas: Dict[Celula, List[Item]] = {}
+        posicoes: Dict[int, Celula] = {}
+
+        for item_id, latitude, longitude in itens:
+            if latitude is None or longitude is None:
+                continue
+            celula = self._celula(latitude, longitude)
+            celulas.setdefault(celula, []).append((item_id, latitude, longitude))
+            posicoes[item_id] = celula
+
+        limites = self._calcular_limites(celulas)
+        self._celulas, self._posicoes, self._limites = celulas, posicoes, limites
+        self._construido_em = time.monotonic()
+        self._invalido = False
+        self._reconstrucoes += 1
+        self._duracao_ultima_reconstrucao_ms = (time.perf_counter() - inicio) * 1000
+
+    def inserir(self, item_id: int, latitude: float, longitude: float):
+        """Inserir ou mover um item (ignorado se o índice ainda não foi construído)"""
+        if not self.construido:
+            return
+
+        self.remover(item_id)
+        self._versao += 1
+        celula = self._celula(latitude, longitude)
+        self._celulas.setdefault(celula, []).append((item_id, latitude, longitude))
+        self._posicoes[item_id] = celula
+
+        lat_min, lat_max, lon_min, lon_max = self._limites or (celula[0], celula[0], celula[1], celula[1])
+        self._limites = (
+            min(lat_min, celula[0]), max(lat_max, celula[0]),
+            min(lon_min, celula[1]), max(lon_max, celula[1]),
+        )
+
+    def remover(self, item_id: int):
+        celula = self._posicoes.pop(item_id, None)
+        if celula is None:
+            return
+        self._versao += 1
+        itens = [item for item in self._celulas.get(celula, []) if item[0] != item_id]
+        if itens:
+            self._celulas[celula] = itens
+        else:
+            self._celulas.pop(celula, None)
+
+    def buscar_raio(
+        self, latitude: float, longitude: float, raio_km: float, limite: Optional[int] = None
+    ) -> List[Tuple[float, int]]:
+        """
+        Itens a até `raio_km` da coordenada
+
+        Returns:
+            Lista de (distancia_km, id) ordenada por distância
+        """
+        self._consultas += 1
+        celulas = self._celulas
+        delta_lat = raio_km / KM_POR_GRAU
+        lat_extrema = min(LATITUDE_MAXIMA, abs(latitude) + delta_lat)
+        delta_lon = min(180.0, raio_km / (KM_POR_GRAU * math.cos(math.radians(lat_extrema))))
+
+        i_min, j_min = self._celula(latitude - delta_lat, longitude - delta_lon)
+        i_max, j_max = self._celula(latitude + delta_lat, longitude + delta_lon)
+
+        resultados: List[Tuple[float, int]] = []
+        for i in range(i_min, i_max + 1):
+            for j in range(j_min, j_max + 1):
+                for item_id, lat, lon in celulas.get((i, j), ()):
+                    distancia = haversine_km(latitude, longitude, lat, lon)
+                    if distancia <= raio_km:
+                        resultados.append((distancia, item_id))
+
+        resultados.sort()
+        return resultados[:limite] if limite is not None else resultados
+
+    def buscar_caixa(
+        self, lat_min: float, lat_max: float, lon_min: float, lon_max: float
+    ) -> List[Item]:
+        """Itens (id, latitude, longitude) dentro da caixa, sem ordem definida"""
+        self._consultas += 1
+        celulas = self._celulas
+        i_min, j_min = self._celula(lat_min, lon_min)
+        i_max, j_max = self._celula(lat_max, lon_max)
+
+        if (i_max - i_min + 1) * (j_max - j_min + 1) > len(celulas):
+            # Caixa maior que a grade ocupada: mais barato percorrer as células existentes
+            candidatas = (
+                itens for (i, j), itens in celulas.items()
+                if i_min <= i <= i_max and j_min <= j <= j_max
+            )
+        else:
+            candidatas = (
+                celulas[(i, j)]
+                for i in range(i_min, i_max + 1)
+                for j in range(j_min, j_max + 1)
+                if (i, j) in celulas
+            )
+
+        return [
+            item
+            for itens in candidatas
+            for item in itens
+            if lat_min <= item[1] <= lat_max and lon_min <= item[2] <= lon_max
+        ]
+
+    def k_mais_proximos(
+        self, latitude: float, longitude: float, k: int, raio_maximo_km: Optional[float] = None
+    ) -> List[Tuple[float, int]]:
+        """
+        Os `k` itens mais próximos, visitando anéis de células a partir do centro
+
+        A busca para quando a distância mínima possível até o próximo anel já
+        supera o k-ésimo resultado (ou o raio máximo), ou quando a grade acaba.
+
+        Returns:
+            Lista de (distancia_km, id) ordenada por distância
+        """
+        self._consultas += 1
+        if k <= 0 or not self._posicoes:
+            return []
+
+        celulas = self._celulas
+        i0, j0 = self._celula(latitude, longitude)
+        lat_min, lat_max, lon_min, lon_max = self._limites
+        anel_maximo = max(abs(i0 - lat_min), abs(i0 - lat_max), abs(j0 - lon_min), abs(j0 - lon_max))
+
+        melhores: List[Tuple[float, int]] = []  # heap de máximo via distância negativa
+        for anel in range(anel_maximo + 1):
+            for celula in self._celulas_do_anel(i0, j0, anel):
+                for item_id, lat, lon in celulas.get(celula, ()):
+                    distancia = haversine_km(latitude, longitude, lat, lon)
+                    if raio_maximo_km is not None and distancia > raio_maximo_km:
+                        continue
+                    if len(melhores) < k:
+                        heapq.heappush(melhores, (-distancia, item_id))
+                    elif distancia < -melhores[0][0]:
+                        heapq.heapreplace(melhores, (-distancia, item_id))
+
+            # Qualquer item fora dos anéis visitados está a pelo menos `anel`
+            # células inteiras de distância (limite inferior conservador)
+            limite_inferior = self._distancia_minima_anel(latitude, anel)
+            if raio_maximo_km is not None and limite_inferior > raio_maximo_km:
+                break
+            if len(melhores) == k and limite_inferior >= -melhores[0][0]:
+                break
+
+        return sorted((-distancia, item_id) for distancia, item_id in melhores)
+
+    def estatisticas(self) -> Dict[str, Any]:
+        return {
+            "nome": self.nome,
+            "itens": len(self._posicoes),
+            "celulas": len(self._celulas),
+            "tamanho_celula_graus": self.tamanho_celula,
+            "construido_ha_segundos": (
+                round(time.monotonic() - self._construido_em, 1) if self._construido_em else None
+            ),
+            "reconstrucoes": self._reconstrucoes,
+            "duracao_ultima_reconstrucao_ms": round(self._duracao_ultima_reconstrucao_ms, 2),
+            "consultas": self._consultas,
+        }
+
+    def _celula(self, latitude: float, longitude: float) -> Celula:
+        return (math.floor(latitude / self.tamanho_celula), math.floor(longitude / self.tamanho_celula))
+
+    @staticmethod
+    def _calcular_limites(celulas: Dict[Celula, List[Item]]) -> Optional[Tuple[int, int, int, int]]:
+        if not celulas:
+            return None
+        linhas = [i for i, _ in celulas]
+        colunas = [j for _, j in celulas]
+        return min(linhas), max(linhas), min(colunas), max(colunas)
+
+    @staticmethod
+    def _celulas_do_anel(i0: int, j0: int, anel: int) -> Iterable[Celula]:
+        if anel == 0:
+            yield (i0, j0)
+            return
+        for j in range(j0 - anel, j0 + anel + 1):
+            yield (i0 - anel, j)
+            yield (i0 + anel, j)
+        for i in range(i0 - anel + 1, i0 + anel):
+            yield (i, j0 - anel)
+            yield (i, j0 + anel)
+
+    def _distancia_minima_anel(self, latitude: float, anel: int) -> float:
+        """Distância mínima (km) de um ponto da célula central a células além do anel"""
+        graus = anel * self.tamanho_celula
+        lat_extrema = min(LATITUDE_MAXIMA, abs(latitude) + graus + self.tamanho_celula)
+        return graus * KM_POR_GRAU * math.cos(math.radians(lat_extrema))
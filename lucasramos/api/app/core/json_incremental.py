@@ -0,0 +1,113 @@
+"""
+Parser incremental para a resposta JSON de rota turística gerada em streaming
+
+Recebe os pedaços de texto à medida que o Gemini os produz e emite:
+- os metadados da rota (campos antes de "pontos_turisticos") assim que o array começa
+- cada ponto turístico assim que o seu objeto é fechado
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.json_llm import carregar_json
+
+CHAVE_PONTOS = "pontos_turisticos"
+
+
+class ParserRotaIncremental:
+    """Scanner de JSON que acompanha profundidade e strings sem reprocessar o buffer"""
+
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0
+        self._profundidade = 0
+        self._em_string = False
+        self._escape = False
+        self._inicio_objeto: Optional[int] = None
+
+        self._inicio_string = 0
+        self._inicio_ultima_chave = 0
+        self._ultima_string: Optional[str] = None
+
+        self._no_array_pontos = False
+        self._inicio_ponto: Optional[int] = None
+        self.metadados_emitidos = False
+        self.array_pontos_fechado = False
+
+    def alimentar(self, texto: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Processar novo pedaço de texto
+
+        Returns:
+            Lista de eventos (tipo, dados) com tipo "metadata" ou "ponto"
+        """
+        self.buffer += texto
+        eventos: List[Tuple[str, Dict[str, Any]]] = []
+
+        while self._pos < len(self.buffer):
+            i = self._pos
+            c = self.buffer[i]
+            self._pos += 1
+
+            if self._em_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._em_string = False
+                    if self._profundidade == 1:
+                        self._ultima_string = self.buffer[self._inicio_string + 1:i]
+                continue
+
+            if self._inicio_objeto is None:
+                # Ignorar texto antes do JSON (ex: cerca de markdown)
+                if c == "{":
+                    self._inicio_objeto = i
+                    self._profundidade = 1
+                continue
+
+            if c == '"':
+                self._em_string = True
+                self._inicio_string = i
+                if self._profundidade == 1:
+                    self._inicio_ultima_chave = i
+            elif c in "{[":
+                if c == "[" and self._profundidade == 1 and self._ultima_string == CHAVE_PONTOS:
+                    self._no_array_pontos = True
+                    metadados = self._extrair_metadados()
+                    if metadados is not None:
+                        eventos.append(("metadata", metadados))
+                elif c == "{" and self._no_array_pontos and self._profundidade == 2:
+                    self._inicio_ponto = i
+                self._profundidade += 1
+            elif c in "}]":
+                self._profundidade -= 1
+                if self._no_array_pontos:
+                    if c == "}" and self._profundidade == 2 and self._inicio_ponto is not None:
+                        ponto = self._carregar(self.buffer[self._inicio_ponto:i + 1])
+                        if isinstance(ponto, dict):
+                            eventos.append(("ponto", ponto))
+                        self._inicio_ponto = None
+                    elif c == "]" and self._profundidade == 1:
+                        self._no_array_pontos = False
+                        self.array_pontos_fechado = True
+
+        return eventos
+
+    def _extrair_metadados(self) -> Optional[Dict[str, Any]]:
+        """Fechar o prefixo do objeto antes de "pontos_turisticos" e interpretá-lo"""
+        if self.metadados_emitidos:
+            return None
+        self.metadados_emitidos = True
+
+        prefixo = self.buffer[self._inicio_objeto:self._inicio_ultima_chave].rstrip()
+        if prefixo.endswith(","):
+            prefixo = prefixo[:-1]
+        dados = self._carregar(prefixo + "}")
+        return dados if isinstance(dados, dict) else {}
+
+    @staticmethod
+    def _carregar(texto: str) -> Any:
+        try:
+            return carregar_json(texto)
+        except ValueError:
+            return None
@@ -0,0 +1,229 @@
+"""
+Extração tolerante de JSON em respostas de modelos de linguagem
+
+Etapas, da mais barata para a mais cara:
+1. Parse direto (sem cercas de markdown)
+2. Objeto JSON mais externo, ignorando texto antes e depois
+3. Reparo de defeitos comuns: vírgulas sobrando, comentários, quebras de
+   linha literais dentro de strings
+4. Resposta truncada: mantém os elementos completos e fecha as estruturas
+
+Usa orjson quando instalado (parse bem mais rápido), com fallback para json.
+"""
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+
+    BACKEND_JSON = "orjson"
+
+    def carregar_json(texto: str) -> Any:
+        return orjson.loads(texto)
+
+except ImportError:  # pragma: no cover - depende do ambiente
+    BACKEND_JSON = "json"
+
+    def carregar_json(texto: str) -> Any:
+        return json.loads(texto)
+
+
+RESULTADO_OK = "ok"
+RESULTADO_REPARADO = "reparado"
+RESULTADO_RECUPERADO = "recuperado"
+
+# Profundidade máxima dos cortes ao recuperar respostas truncadas: objeto raiz
+# (1) e arrays dentro dele (2), de modo que só elementos completos sejam mantidos
+PROFUNDIDADE_RECUPERACAO = 2
+
+FECHAMENTOS = {"{": "}", "[": "]"}
+
+
+class JSONInvalidoError(ValueError):
+    """Nenhum objeto JSON pôde ser extraído da resposta"""
+
+
+class ExtratorJSON:
+    """Extrator com contadores de quantas respostas precisaram de reparo ou recuperação"""
+
+    def __init__(self):
+        self._contagem = {
+            RESULTADO_OK: 0,
+            RESULTADO_REPARADO: 0,
+            RESULTADO_RECUPERADO: 0,
+            "falha": 0,
+        }
+
+    def extrair(self, texto: str) -> Tuple[Dict[str, Any], str]:
+        """
+        Extrair o objeto JSON de uma resposta
+
+        Returns:
+            Tupla (dados, resultado) com resultado "ok", "reparado" ou "recuperado"
+
+        Raises:
+            JSONInvalidoError: se nenhuma etapa produzir um objeto JSON
+        """
+        try:
+            dados, resultado = self._extrair(texto)
+        except JSONInvalidoError:
+            self._contagem["falha"] += 1
+            raise
+
+        self._contagem[resultado] += 1
+        return dados, resultado
+
+    def estatisticas(self) -> Dict[str, Any]:
+        total = sum(self._contagem.values())
+        return {
+            "backend": BACKEND_JSON,
+            **self._contagem,
+            "taxa_reparo": round(self._contagem[RESULTADO_REPARADO] / total, 4) if total else 0.0,
+            "taxa_recuperacao": round(self._contagem[RESULTADO_RECUPERADO] / total, 4) if total else 0.0,
+        }
+
+    def _extrair(self, texto: str) -> Tuple[Dict[str, Any], str]:
+        # 1. Resposta limpa (caso comum)
+        dados = _carregar_objeto(_remover_cercas(texto))
+        if dados is not None:
+            return dados, RESULTADO_OK
+
+        inicio = texto.find("{")
+        if inicio < 0:
+            raise JSONInvalidoError("Nenhum objeto JSON encontrado na resposta")
+
+        # 2 e 3. Objeto mais externo, reparado em uma única passada
+        reparado, fim, pilha, cortes = _varrer(texto, inicio)
+        if fim is not None:
+            dados = _carregar_objeto(texto[inicio:fim])
+            if dados is not None:
+                return dados, RESULTADO_OK
+            dados = _carregar_objeto(reparado)
+            if dados is not None:
+                return dados, RESULTADO_REPARADO
+
+        # 4. Truncado: cortar no último elemento completo e fechar as estruturas
+        for posicao, pilha_corte in reversed(cortes):
+            candidato = reparado[:posicao].rstrip().rstrip(",") + "".join(
+                FECHAMENTOS[c] for c in reversed(pilha_corte)
+            )
+            dados = _carregar_objeto(candidato)
+            if dados is not None:
+                return dados, RESULTADO_RECUPERADO
+
+        raise JSONInvalidoError("Resposta não contém um objeto JSON recuperável")
+
+
+def _remover_cercas(texto: str) -> str:
+    """Remover cerca de markdown (```json ... ```)"""
+    limpo = texto.strip()
+    if limpo.startswith("```"):
+        limpo = limpo[limpo.find("\n") + 1:] if "\n" in limpo else limpo[3:]
+    if limpo.endswith("```"):
+        limpo = limpo[:-3]
+    return limpo.strip()
+
+
+def _carregar_objeto(texto: str) -> Optional[Dict[str, Any]]:
+    try:
+        dados = carregar_json(texto)
+    except ValueError:
+        return None
+    return dados if isinstance(dados, dict) else None
+
+
+def _varrer(texto: str, inicio: int) -> Tuple[str, Optional[int], List[str], List[Tuple[int, Tuple[str, ...]]]]:
+    """
+    Percorrer o objeto a partir de `inicio`, reparando-o ao mesmo tempo
+
+    Returns:
+        (texto reparado, fim do objeto no texto original ou None se truncado,
+         pilha de estruturas abertas, pontos de corte seguros no texto reparado
+         com a pilha correspondente)
+    """
+    saida: List[str] = []
+    tamanho_saida = 0
+    pilha: List[str] = []
+    cortes: List[Tuple[int, Tuple[str, ...]]] = []
+    virgula_pendente: Optional[int] = None  # índice em `saida` de uma vírgula ainda não confirmada
+
+    em_string = False
+    escape = False
+    i = inicio
+    n = len(texto)
+
+    def emitir(trecho: str):
+        nonlocal tamanho_saida
+        saida.append(trecho)
+        tamanho_saida += len(trecho)
+
+    while i < n:
+        c = texto[i]
+
+        if em_string:
+            if escape:
+                escape = False
+                emitir(c)
+            elif c == "\\":
+                escape = True
+                emitir(c)
+            elif c == '"':
+                em_string = False
+                emitir(c)
+            elif c == "\n":
+                emitir("\\n")
+            elif c == "\r":
+                emitir("\\r")
+            elif c == "\t":
+                emitir("\\t")
+            else:
+                emitir(c)
+            i += 1
+            continue
+
+        # Comentários (// ... e /* ... */) fora de strings
+        if c == "/" and i + 1 < n and texto[i + 1] in "/*":
+            if texto[i + 1] == "/":
+                fim_comentario = texto.find("\n", i)
+                i = n if fim_comentario < 0 else fim_comentario
+            else:
+                fim_comentario = texto.find("*/", i + 2)
+                i = n if fim_comentario < 0 else fim_comentario + 2
+            continue
+
+        if c in "}]":
+            if virgula_pendente is not None:
+                # Vírgula sobrando antes do fechamento
+                tamanho_saida -= len(saida[virgula_pendente])
+                saida[virgula_pendente] = ""
+                virgula_pendente = None
+            if pilha:
+                pilha.pop()
+            emitir(c)
+            i += 1
+            if not pilha:
+                return "".join(saida), i, pilha, cortes
+            if len(pilha) <= PROFUNDIDADE_RECUPERACAO:
+                cortes.append((tamanho_saida, tuple(pilha)))
+            continue
+
+        if c == ",":
+            if len(pilha) <= PROFUNDIDADE_RECUPERACAO:
+                cortes.append((tamanho_saida, tuple(pilha)))
+            virgula_pendente = len(saida)
+            emitir(c)
+            i += 1
+            continue
+
+        if not c.isspace():
+            virgula_pendente = None
+
+        if c == '"':
+            em_string = True
+        elif c in "{[":
+            pilha.append(c)
+
+        emitir(c)
+        i += 1
+
+    return "".join(saida), None, pilha, cortes
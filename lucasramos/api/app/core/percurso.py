@@ -0,0 +1,149 @@
+"""
+Ordenação dos pontos turísticos em um percurso eficiente origem → destino
+
+O modelo devolve os pontos em qualquer ordem, o que faz o roteiro ir e voltar.
+Aqui o percurso é tratado como um caminho aberto com extremos fixos (cidade de
+origem e cidade de destino):
+
+1. Matriz de distâncias haversine calculada de uma vez (NumPy)
+2. Construção pelo vizinho mais próximo a partir da origem
+3. Melhoria 2-opt (inversão de trechos) enquanto houver ganho e houver tempo;
+   para cada início de trecho, todos os fins possíveis são avaliados de uma vez
+
+A busca respeita um orçamento de tempo e nunca devolve um percurso mais longo
+que a ordem original.
+"""
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.geo import matriz_distancias_km
+
+Coordenada = Tuple[float, float]
+
+# Ganho mínimo (km) para aceitar uma troca 2-opt, evitando ciclos por arredondamento
+GANHO_MINIMO_KM = 1e-9
+
+
+def comprimento_percurso(distancias: np.ndarray, caminho: Sequence[int]) -> float:
+    """Soma das distâncias entre nós consecutivos do caminho"""
+    caminho = np.asarray(caminho)
+    return float(distancias[caminho[:-1], caminho[1:]].sum()) if len(caminho) > 1 else 0.0
+
+
+def _vizinho_mais_proximo(distancias: np.ndarray, inicio: int, fim: Optional[int]) -> List[int]:
+    """Caminho guloso a partir de `inicio`, terminando em `fim` (se houver)"""
+    n = len(distancias)
+    visitado = np.zeros(n, dtype=bool)
+    visitado[inicio] = True
+    if fim is not None:
+        visitado[fim] = True
+
+    caminho = [inicio]
+    atual = inicio
+    for _ in range(n - visitado.sum()):
+        candidatas = np.where(visitado, np.inf, distancias[atual])
+        atual = int(np.argmin(candidatas))
+        visitado[atual] = True
+        caminho.append(atual)
+
+    if fim is not None:
+        caminho.append(fim)
+    return caminho
+
+
+def _dois_opt(distancias: np.ndarray, caminho: List[int], fim_fixo: bool, prazo: float) -> Tuple[List[int], int]:
+    """
+    Melhoria 2-opt de um caminho aberto com o primeiro nó fixo (e o último, se `fim_fixo`)
+
+    Inverter caminho[i..k] troca as arestas (a=c[i-1], b=c[i]) e (c=c[k], e=c[k+1])
+    por (a, c) e (b, e); sem último nó fixo, o trecho pode ir até o fim do caminho
+    e só a primeira aresta muda.
+
+    Returns:
+        Tupla (caminho, trocas aplicadas)
+    """
+    caminho = np.asarray(caminho)
+    n = len(caminho)
+    ultimo_invertivel = n - 2 if fim_fixo else n - 1
+    trocas = 0
+
+    melhorou = True
+    while melhorou and time.perf_counter() < prazo:
+        melhorou = False
+        for i in range(1, ultimo_invertivel):
+            a, b = caminho[i - 1], caminho[i]
+            ks = np.arange(i + 1, ultimo_invertivel + 1)
+            c = caminho[ks]
+
+            ganho = distancias[a, b] - distancias[a, c]
+            tem_sucessor = ks + 1 < n
+            e = caminho[np.minimum(ks + 1, n - 1)]
+            ganho += np.where(tem_sucessor, distancias[c, e] - distancias[b, e], 0.0)
+
+            melhor = int(np.argmax(ganho))
+            if ganho[melhor] > GANHO_MINIMO_KM:
+                k = ks[melhor]
+                caminho[i:k + 1] = caminho[i:k + 1][::-1].copy()
+                trocas += 1
+                melhorou = True
+
+            if time.perf_counter() >= prazo:
+                break
+
+    return caminho.tolist(), trocas
+
+
+def ordenar_percurso(
+    coordenadas: List[Coordenada],
+    origem: Optional[Coordenada] = None,
+    destino: Optional[Coordenada] = None,
+    orcamento_ms: float = 5.0,
+) -> Tuple[List[int], Dict[str, Any]]:
+    """
+    Ordem de visita dos pontos que encurta o percurso origem → pontos → destino
+
+    Args:
+        coordenadas: (latitude, longitude) de cada ponto, na ordem original
+        origem: coordenada de partida; sem ela, o primeiro ponto é mantido como partida
+        destino: coordenada de chegada; sem ela, o último ponto visitado fica livre
+        orcamento_ms: tempo máximo da ordenação; a construção gulosa sempre termina,
+            o 2-opt para ao estourar o prazo
+
+    Returns:
+        Tupla (ordem, estatisticas): índices dos pontos na nova ordem e
+        km_antes, km_depois, trocas_2opt e tempo_ms
+    """
+    inicio_medicao = time.perf_counter()
+    n = len(coordenadas)
+    if n == 0:
+        return [], {"km_antes": 0.0, "km_depois": 0.0, "trocas_2opt": 0, "tempo_ms": 0.0}
+
+    # Nós: [origem] + pontos + [destino]; as âncoras ficam fixas nas pontas
+    nos = ([origem] if origem else []) + list(coordenadas) + ([destino] if destino else [])
+    deslocamento = 1 if origem else 0
+    distancias = matriz_distancias_km([no[0] for no in nos], [no[1] for no in nos])
+
+    inicio = 0
+    fim = len(nos) - 1 if destino else None
+    original = list(range(len(nos)))
+    km_antes = comprimento_percurso(distancias, original)
+
+    caminho = _vizinho_mais_proximo(distancias, inicio, fim)
+    caminho, trocas = _dois_opt(
+        distancias, caminho, fim_fixo=fim is not None,
+        prazo=inicio_medicao + orcamento_ms / 1000,
+    )
+    km_depois = comprimento_percurso(distancias, caminho)
+
+    if km_depois >= km_antes:
+        caminho, km_depois = original, km_antes
+
+    ordem = [no - deslocamento for no in caminho if deslocamento <= no < deslocamento + n]
+    return ordem, {
+        "km_antes": round(km_antes, 1),
+        "km_depois": round(km_depois, 1),
+        "trocas_2opt": trocas,
+        "tempo_ms": round((time.perf_counter() - inicio_medicao) * 1000, 3),
+    }
@@ -0,0 +1,172 @@
+"""
+Limitação de taxa por token bucket para chamadas ao modelo de linguagem
+
+O custo de cada chamada é medido em tokens estimados (prompt + resposta), com
+um bucket global por processo e um bucket por usuário. A cobrança é feita antes
+da chamada com a resposta estimada e ajustada depois com o tamanho real.
+"""
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# Aproximação usual de caracteres por token para textos em português
+CARACTERES_POR_TOKEN = 4
+
+
+def estimar_tokens(texto: str) -> int:
+    """Estimar número de tokens de um texto"""
+    return max(1, math.ceil(len(texto) / CARACTERES_POR_TOKEN))
+
+
+class LimiteExcedidoError(Exception):
+    """Cota de tokens esgotada; tentar novamente após `retry_after` segundos"""
+
+    def __init__(self, mensagem: str, retry_after: float):
+        super().__init__(mensagem)
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_segundos(self) -> int:
+        """Valor inteiro para o cabeçalho Retry-After"""
+        return max(1, math.ceil(self.retry_after))
+
+
+class TokenBucket:
+    """Bucket com capacidade máxima, reabastecido continuamente a uma taxa fixa"""
+
+    __slots__ = ("capacidade", "taxa_por_segundo", "_tokens", "_atualizado_em")
+
+    def __init__(self, capacidade: float, taxa_por_segundo: float):
+        self.capacidade = capacidade
+        self.taxa_por_segundo = taxa_por_segundo
+        self._tokens = capacidade
+        self._atualizado_em = time.monotonic()
+
+    @property
+    def disponivel(self) -> float:
+        self._reabastecer()
+        return self._tokens
+
+    def espera_para(self, custo: float) -> float:
+        """Segundos até haver `custo` tokens disponíveis (0 se já há)"""
+        falta = min(custo, self.capacidade) - self.disponivel
+        if falta <= 0:
+            return 0.0
+        return falta / self.taxa_por_segundo if self.taxa_por_segundo > 0 else math.inf
+
+    def consumir(self, custo: float):
+        """Debitar tokens (o saldo pode ficar negativo em ajustes pós-chamada)"""
+        self._reabastecer()
+        self._tokens = min(self.capacidade, self._tokens - custo)
+
+    def _reabastecer(self):
+        agora = time.monotonic()
+        self._tokens = min(
+            self.capacidade, self._tokens + (agora - self._atualizado_em) * self.taxa_por_segundo
+        )
+        self._atualizado_em = agora
+
+
+class LimitadorTokens:
+    """
+    Limitador global e por usuário, com contabilidade de consumo
+
+    Usuários inativos têm seus buckets descartados (LRU) acima de
+    `max_usuarios`; um bucket descartado volta cheio.
+    """
+
+    def __init__(
+        self,
+        tokens_por_minuto_global: int,
+        tokens_por_minuto_usuario: int,
+        max_usuarios: int = 10000,
+    ):
+        self.tokens_por_minuto_usuario = tokens_por_minuto_usuario
+        self.max_usuarios = max(1, max_usuarios)
+        self._global = TokenBucket(tokens_por_minuto_global, tokens_por_minuto_global / 60)
+        self._usuarios: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+        self._consumo_global = 0
+        self._consumo_usuarios: Dict[str, int] = {}
+        self._recusas_global = 0
+        self._recusas_usuario = 0
+
+    def reservar(self, usuario: Optional[str], custo: int):
+        """
+        Debitar o custo estimado dos buckets global e do usuário
+
+        Raises:
+            LimiteExcedidoError: se algum dos buckets não tiver saldo (nada é debitado)
+        """
+        bucket_usuario = self._bucket_usuario(usuario) if usuario else None
+
+        espera_usuario = bucket_usuario.espera_para(custo) if bucket_usuario else 0.0
+        if espera_usuario > 0:
+            self._recusas_usuario += 1
+            raise LimiteExcedidoError(
+                "Limite de consultas à IA por usuário excedido", retry_after=espera_usuario
+            )
+
+        espera_global = self._global.espera_para(custo)
+        if espera_global > 0:
+            self._recusas_global += 1
+            raise LimiteExcedidoError(
+                "Limite global de consultas à IA excedido", retry_after=espera_global
+            )
+
+        self._debitar(usuario, bucket_usuario, custo)
+
+    def ajustar(self, usuario: Optional[str], diferenca: int):
+        """Corrigir a cobrança após a chamada (positivo debita, negativo devolve)"""
+        if diferenca:
+            bucket_usuario = self._usuarios.get(usuario) if usuario else None
+            self._debitar(usuario, bucket_usuario, diferenca)
+
+    def estatisticas(self, top_usuarios: int = 10) -> Dict[str, Any]:
+        maiores = sorted(self._consumo_usuarios.items(), key=lambda item: item[1], reverse=True)
+        return {
+            "global": {
+                "capacidade": self._global.capacidade,
+                "disponivel": round(self._global.disponivel),
+                "tokens_por_minuto": round(self._global.taxa_por_segundo * 60),
+                "tokens_consumidos": self._consumo_global,
+                "recusas": self._recusas_global,
+            },
+            "usuarios": {
+                "tokens_por_minuto": self.tokens_por_minuto_usuario,
+                "buckets_ativos": len(self._usuarios),
+                "recusas": self._recusas_usuario,
+                "maiores_consumidores": [
+                    {
+                        "usuario": usuario,
+                        "tokens_consumidos": consumo,
+                        "disponivel": round(self._usuarios[usuario].disponivel) if usuario in self._usuarios else None,
+                    }
+                    for usuario, consumo in maiores[:top_usuarios]
+                ],
+            },
+        }
+
+    def _bucket_usuario(self, usuario: str) -> TokenBucket:
+        bucket = self._usuarios.get(usuario)
+        if bucket is None:
+            bucket = TokenBucket(self.tokens_por_minuto_usuario, self.tokens_por_minuto_usuario / 60)
+            self._usuarios[usuario] = bucket
+            if len(self._usuarios) > self.max_usuarios:
+                self._usuarios.popitem(last=False)
+        else:
+            self._usuarios.move_to_end(usuario)
+        return bucket
+
+    def _debitar(self, usuario: Optional[str], bucket_usuario: Optional[TokenBucket], custo: int):
+        self._global.consumir(custo)
+        self._consumo_global += custo
+        if bucket_usuario is not None:
+            bucket_usuario.consumir(custo)
+        if usuario:
+            self._consumo_usuarios[usuario] = self._consumo_usuarios.get(usuario, 0) + custo
+            if len(self._consumo_usuarios) > 2 * self.max_usuarios:
+                # Manter a contabilidade apenas dos maiores consumidores
+                maiores = sorted(self._consumo_usuarios.items(), key=lambda item: item[1], reverse=True)
+                self._consumo_usuarios = dict(maiores[:self.max_usuarios])
@@ -0,0 +1,140 @@
+"""
+Primitivas de resiliência para chamadas a serviços externos (ex: Gemini)
+
+- CircuitBreaker: falha rápido depois de erros consecutivos, testando o
+  serviço novamente após um período de espera
+- MonitorLatencia: janela de latências recentes para calcular percentis
+  (usada para decidir quando disparar requisições de hedge)
+"""
+import math
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+ESTADO_FECHADO = "fechado"
+ESTADO_ABERTO = "aberto"
+ESTADO_MEIO_ABERTO = "meio_aberto"
+
+
+class ServicoIndisponivelError(Exception):
+    """Serviço externo indisponível (circuito aberto ou prazo excedido)"""
+
+    def __init__(self, mensagem: str, retry_after: float = 1.0):
+        super().__init__(mensagem)
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_segundos(self) -> int:
+        """Valor inteiro para o cabeçalho Retry-After"""
+        return max(1, math.ceil(self.retry_after))
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker por contagem de falhas consecutivas
+
+    - fechado: chamadas liberadas; `limite_falhas` falhas seguidas abrem o circuito
+    - aberto: chamadas recusadas até passar `tempo_aberto_segundos`
+    - meio_aberto: uma única chamada de teste; sucesso fecha, falha reabre
+    """
+
+    def __init__(self, nome: str, limite_falhas: int, tempo_aberto_segundos: float):
+        self.nome = nome
+        self.limite_falhas = max(1, limite_falhas)
+        self.tempo_aberto_segundos = tempo_aberto_segundos
+
+        self._estado = ESTADO_FECHADO
+        self._falhas_consecutivas = 0
+        self._aberto_em = 0.0
+        self._teste_em_andamento = False
+
+        self._total_sucessos = 0
+        self._total_falhas = 0
+        self._total_recusadas = 0
+        self._aberturas = 0
+
+    @property
+    def estado(self) -> str:
+        if self._estado == ESTADO_ABERTO and self._tempo_restante() <= 0:
+            self._estado = ESTADO_MEIO_ABERTO
+        return self._estado
+
+    def verificar(self):
+        """
+        Liberar ou recusar uma chamada
+
+        Raises:
+            ServicoIndisponivelError: se o circuito estiver aberto (ou já houver
+                uma chamada de teste em andamento no estado meio aberto)
+        """
+        estado = self.estado
+        if estado == ESTADO_FECHADO:
+            return
+
+        if estado == ESTADO_MEIO_ABERTO and not self._teste_em_andamento:
+            self._teste_em_andamento = True
+            return
+
+        self._total_recusadas += 1
+        raise ServicoIndisponivelError(
+            f"Serviço {self.nome} temporariamente indisponível (circuito aberto)",
+            retry_after=max(self._tempo_restante(), 1.0),
+        )
+
+    def registrar_sucesso(self):
+        self._total_sucessos += 1
+        self._falhas_consecutivas = 0
+        self._teste_em_andamento = False
+        self._estado = ESTADO_FECHADO
+
+    def registrar_falha(self):
+        self._total_falhas += 1
+        self._falhas_consecutivas += 1
+        self._teste_em_andamento = False
+
+        if self._estado == ESTADO_MEIO_ABERTO or self._falhas_consecutivas >= self.limite_falhas:
+            if self._estado != ESTADO_ABERTO:
+                self._aberturas += 1
+            self._estado = ESTADO_ABERTO
+            self._aberto_em = time.monotonic()
+
+    def registrar_cancelamento(self):
+        """Chamada cancelada pelo cliente: não conta como sucesso nem falha"""
+        self._teste_em_andamento = False
+
+    def estatisticas(self) -> Dict[str, Any]:
+        estado = self.estado
+        return {
+            "estado": estado,
+            "falhas_consecutivas": self._falhas_consecutivas,
+            "limite_falhas": self.limite_falhas,
+            "reabre_em_segundos": round(self._tempo_restante(), 1) if estado == ESTADO_ABERTO else 0.0,
+            "sucessos": self._total_sucessos,
+            "falhas": self._total_falhas,
+            "recusadas": self._total_recusadas,
+            "aberturas": self._aberturas,
+        }
+
+    def _tempo_restante(self) -> float:
+        return self._aberto_em + self.tempo_aberto_segundos - time.monotonic()
+
+
+class MonitorLatencia:
+    """Janela deslizante das latências mais recentes (em segundos)"""
+
+    def __init__(self, tamanho_janela: int = 200):
+        self._amostras: Deque[float] = deque(maxlen=tamanho_janela)
+
+    def __len__(self) -> int:
+        return len(self._amostras)
+
+    def registrar(self, segundos: float):
+        self._amostras.append(segundos)
+
+    def percentil(self, p: float) -> Optional[float]:
+        """Percentil por posição mais próxima (None sem amostras)"""
+        if not self._amostras:
+            return None
+        ordenadas = sorted(self._amostras)
+        indice = max(0, min(len(ordenadas) - 1, math.ceil(p / 100 * len(ordenadas)) - 1))
+        return ordenadas[indice]
@@ -23,11 +23,18 @@ class PontoTuristico(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     nome = Column(String(255), nullable=False)
+    nome_normalizado = Column(String(255), nullable=True, index=True)
     descricao = Column(Text, nullable=True)
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
     cidade_id = Column(Integer, nullable=True, index=True)
     categoria = Column(String(100), nullable=True, index=True)
+    tempo_visita_estimado = Column(String(100), nullable=True)
+    endereco = Column(Text, nullable=True)
+    horario_funcionamento = Column(Text, nullable=True)
+    valor_entrada = Column(Text, nullable=True)
+    dicas_importantes = Column(Text, nullable=True)
+    fonte = Column(String(50), nullable=True)  # Origem do registro (ex: 'gemini')
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
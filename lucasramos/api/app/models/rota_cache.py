@@ -0,0 +1,20 @@
+"""
+Modelo SQLAlchemy para o cache persistente de rotas turísticas
+"""
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+class RotaCache(Base):
+    __tablename__ = "rotas_cache"
+
+    cache_key = Column(String(64), primary_key=True)
+    rota_json = Column(Text, nullable=False)  # RotaTuristica serializada
+    expira_em = Column(DateTime(timezone=True), nullable=False, index=True)
+    hits = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<RotaCache(cache_key='{self.cache_key}', hits={self.hits})>"
\ No newline at end of file
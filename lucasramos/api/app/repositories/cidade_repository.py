@@ -1,20 +1,366 @@
+import csv
+import io
+import itertools
+import logging
+import math
+import re
+import threading
+from sqlalchemy import func, or_, text
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from unidecode import unidecode
+from app.core.config import settings
+from app.core.corredor import caixa_do_corredor, distancias_ao_corredor
+from app.core.geo import haversine_km
+from app.core.indice_autocomplete import IndiceAutocomplete
+from app.core.indice_espacial import IndiceEspacial, KM_POR_GRAU
 from app.models.cidade import Cidade, PontoTuristico
 from app.schemas.cidade import CidadeCreate, CidadeUpdate, PontoTuristicoCreate
 
+logger = logging.getLogger(__name__)
+
+# Suporte geográfico do banco (migração 006)
+GEO_POSTGIS = "postgis"
+GEO_EARTHDISTANCE = "earthdistance"
+GEO_NENHUM = "nenhum"
+
+# Modo detectado por tabela, uma vez por processo
+_modos_geo_banco: Dict[str, str] = {}
+
+# Expressões SQL por modo: ponto consultado, filtro por raio (índice GiST) e ordenação KNN
+_SQL_GEO = {
+    GEO_POSTGIS: {
+        "filtro": "ST_DWithin({t}.geog, ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)::geography, :raio_m)",
+        "ordem": "{t}.geog <-> ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)::geography",
+    },
+    GEO_EARTHDISTANCE: {
+        "filtro": (
+            "earth_box(ll_to_earth(:lat, :lon), :raio_m) @> ll_to_earth({t}.latitude, {t}.longitude) "
+            "AND earth_distance(ll_to_earth(:lat, :lon), ll_to_earth({t}.latitude, {t}.longitude)) <= :raio_m"
+        ),
+        "ordem": "ll_to_earth({t}.latitude, {t}.longitude) <-> ll_to_earth(:lat, :lon)",
+    },
+}
+
+def _modo_geo_banco(db: Session, tabela: str) -> str:
+    """Detectar se a tabela tem índice PostGIS ou earthdistance (GEO_BANCO força o modo)"""
+    if tabela in _modos_geo_banco:
+        return _modos_geo_banco[tabela]
+    
+    configurado = settings.GEO_BANCO.lower()
+    modo = GEO_NENHUM
+    if configurado != GEO_NENHUM and db.get_bind().dialect.name == "postgresql":
+        try:
+            extensoes = {linha[0] for linha in db.execute(text("SELECT extname FROM pg_extension")).all()}
+            tem_geog = db.execute(text(
+                "SELECT 1 FROM information_schema.columns WHERE table_name = :tabela AND column_name = 'geog'"
+            ), {"tabela": tabela}).first() is not None
+        except Exception as e:
+            logger.warning(f"⚠️ Não foi possível detectar extensões geográficas: {e}")
+            db.rollback()
+            extensoes, tem_geog = set(), False
+        
+        if GEO_POSTGIS in extensoes and tem_geog and configurado in ("auto", GEO_POSTGIS):
+            modo = GEO_POSTGIS
+        elif GEO_EARTHDISTANCE in extensoes and configurado in ("auto", GEO_EARTHDISTANCE):
+            modo = GEO_EARTHDISTANCE
+    
+    logger.info(f"🌎 Consultas geográficas em {tabela}: {modo}")
+    _modos_geo_banco[tabela] = modo
+    return modo
+
+def _consultar_geo_banco(db: Session, modelo, latitude: float, longitude: float,
+                         raio_km: Optional[float] = None,
+                         k: Optional[int] = None) -> Optional[List[Tuple[float, object]]]:
+    """
+    Consulta por raio e/ou k-vizinhos usando o índice geográfico do banco
+    
+    Returns:
+        Lista de (distancia_km, registro) ordenada por distância, ou None se o
+        banco não tem suporte geográfico (o chamador usa o filtro por caixa)
+    """
+    modo = _modo_geo_banco(db, modelo.__tablename__)
+    if modo == GEO_NENHUM:
+        return None
+    
+    sql = {chave: expressao.format(t=modelo.__tablename__) for chave, expressao in _SQL_GEO[modo].items()}
+    query = db.query(modelo)
+    if raio_km is not None:
+        query = query.filter(text(sql["filtro"]))
+    query = query.order_by(text(sql["ordem"]))
+    if k is not None:
+        query = query.limit(k)
+    
+    registros = query.params(lat=latitude, lon=longitude, raio_m=(raio_km or 0) * 1000).all()
+    return [
+        (haversine_km(latitude, longitude, registro.latitude, registro.longitude), registro)
+        for registro in registros
+    ]
+
+# Busca de cidades por trigramas no banco (migração 007), detectada uma vez por processo
+_busca_trigramas_banco: Optional[bool] = None
+
+# Uma consulta só, servida pelo índice GIN em f_unaccent(nome_normalizado): nome
+# contendo o termo ou com uma palavra parecida (pg_trgm.word_similarity_threshold)
+_SQL_BUSCA_TRIGRAMAS = {
+    "filtro": "f_unaccent(cidades.nome_normalizado) LIKE :contem OR :termo <% f_unaccent(cidades.nome_normalizado)",
+    "exato": "f_unaccent(cidades.nome_normalizado) = :termo",
+    "prefixo": "f_unaccent(cidades.nome_normalizado) LIKE :prefixo",
+    "similaridade": "word_similarity(:termo, f_unaccent(cidades.nome_normalizado))",
+}
+
+def _tem_busca_trigramas(db: Session) -> bool:
+    """Detectar se o banco tem pg_trgm e f_unaccent (migração 007)"""
+    global _busca_trigramas_banco
+    if _busca_trigramas_banco is not None:
+        return _busca_trigramas_banco
+    
+    disponivel = False
+    if db.get_bind().dialect.name == "postgresql":
+        try:
+            disponivel = db.execute(text(
+                "SELECT 1 FROM pg_extension e, pg_proc p "
+                "WHERE e.extname = 'pg_trgm' AND p.proname = 'f_unaccent'"
+            )).first() is not None
+        except Exception as e:
+            logger.warning(f"⚠️ Não foi possível detectar pg_trgm: {e}")
+            db.rollback()
+    
+    logger.info(f"🔎 Busca de cidades no banco: {'trigramas' if disponivel else 'LIKE'}")
+    _busca_trigramas_banco = disponivel
+    return disponivel
+
+def _escapar_like(termo: str) -> str:
+    return termo.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _ordenar_por_ids(registros: list, ids: List[int]) -> list:
+    """Reordenar registros carregados com IN (...) na ordem dos ids"""
+    por_id = {registro.id: registro for registro in registros}
+    return [por_id[item_id] for item_id in ids if item_id in por_id]
+
+
+def _caixa_de_busca(latitude: float, raio_km: float) -> Tuple[float, float]:
+    """
+    Meia-largura (graus de latitude, graus de longitude) da caixa que contém o
+    círculo de raio_km: a longitude é alargada por 1/cos(lat) na borda mais
+    próxima do polo, onde um grau de longitude é mais curto
+    """
+    delta_lat = raio_km / KM_POR_GRAU
+    delta_lon = delta_lat / max(0.01, math.cos(math.radians(min(89.9, abs(latitude) + delta_lat))))
+    return delta_lat, delta_lon
+
+def _filtrar_por_distancia(registros: list, latitude: float, longitude: float,
+                           raio_km: float) -> List[Tuple[float, object]]:
+    """Distância haversine exata dos candidatos, ordenados e limitados ao raio"""
+    candidatos = [
+        (haversine_km(latitude, longitude, registro.latitude, registro.longitude), registro)
+        for registro in registros
+    ]
+    return sorted(
+        [(distancia, registro) for distancia, registro in candidatos if distancia <= raio_km],
+        key=lambda item: item[0]
+    )
+
+
+# Reconstruções dos índices em memória em andamento (id do índice), uma por índice
+_trava_reconstrucao = threading.Lock()
+_indices_em_reconstrucao: Set[int] = set()
+
+def _agendar_reconstrucao(indice, bind, carregar: Callable[[Session], list]):
+    """
+    Reconstruir o índice em uma thread, com sessão própria, e trocar as estruturas
+    de uma vez; até lá as consultas seguem no índice atual, sem esperar o banco
+    """
+    with _trava_reconstrucao:
+        if id(indice) in _indices_em_reconstrucao:
+            return
+        _indices_em_reconstrucao.add(id(indice))
+    
+    threading.Thread(
+        target=_reconstruir_indice,
+        args=(indice, bind, carregar),
+        name=f"indice-{type(indice).__name__}-{indice.nome}",
+        daemon=True,
+    ).start()
+
+def _reconstruir_indice(indice, bind, carregar: Callable[[Session], list]):
+    try:
+        while True:
+            versao = indice.versao
+            with Session(bind=bind) as db:
+                itens = carregar(db)
+            indice.reconstruir(itens)
+            # Alterado durante a carga: a troca pode ter descartado a alteração
+            if indice.versao == versao:
+                break
+        logger.info(f"🗂️ Índice {type(indice).__name__} de {indice.nome} reconstruído: {len(indice)} itens")
+    except Exception as e:
+        logger.warning(f"⚠️ Falha ao reconstruir o índice {type(indice).__name__} de {indice.nome}: {e}")
+    finally:
+        with _trava_reconstrucao:
+            _indices_em_reconstrucao.discard(id(indice))
+
+def _assinatura_tabela(db: Session, modelo) -> tuple:
+    """Contagem, maior id e última atualização: muda com inserções, remoções e atualizações"""
+    return tuple(db.query(func.count(modelo.id), func.max(modelo.id), func.max(modelo.updated_at)).one())
+
+def _carregar_posicoes(modelo) -> Callable[[Session], list]:
+    return lambda db: db.query(modelo.id, modelo.latitude, modelo.longitude).all()
+
+def _carregar_itens_autocomplete(db: Session) -> list:
+    return [
+        _item_autocomplete(cidade) for cidade in db.query(
+            Cidade.id, Cidade.nome, Cidade.uf, Cidade.latitude, Cidade.longitude, Cidade.ibge_id
+        )
+    ]
+
+def verificar_alteracoes_indices(db: Session):
+    """Invalidar os índices em memória das tabelas alteradas por outras instâncias ou scripts"""
+    CidadeRepository.verificar_alteracoes(db)
+    PontoTuristicoRepository.verificar_alteracoes(db)
+
+# Cidades por comando INSERT ... ON CONFLICT na importação do IBGE
+TAMANHO_LOTE_UPSERT = 1000
+
+# Colunas sobrescritas em cidades existentes: pela API do IBGE (nomes) e pelo snapshot (coordenadas)
+COLUNAS_IDENTIFICACAO = ("nome", "nome_normalizado", "uf")
+COLUNAS_COORDENADAS = ("latitude", "longitude")
+
+# Colunas enviadas no COPY da carga em massa
+COLUNAS_COPIA = ("ibge_id", "nome", "nome_normalizado", "uf", "latitude", "longitude")
+
+
+class _FluxoCSV(io.RawIOBase):
+    """Arquivo somente leitura que gera CSV sob demanda a partir de dicts (entrada do COPY)"""
+
+    def __init__(self, linhas: Iterable[Dict[str, Any]], colunas: Sequence[str]):
+        self._linhas = iter(linhas)
+        self._colunas = colunas
+        self._pendente = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, destino) -> int:
+        while len(self._pendente) < len(destino):
+            texto = io.StringIO()
+            escritor = csv.writer(texto, lineterminator="\n")
+            for linha in itertools.islice(self._linhas, 500):
+                escritor.writerow([linha[coluna] for coluna in self._colunas])
+            bloco = texto.getvalue().encode("utf-8")
+            if not bloco:
+                break
+            self._pendente += bloco
+
+        tamanho = min(len(destino), len(self._pendente))
+        destino[:tamanho] = self._pendente[:tamanho]
+        self._pendente = self._pendente[tamanho:]
+        return tamanho
+
+
+# Capitais (código IBGE): sem população no banco, sobem entre nomes igualmente relevantes
+CAPITAIS_IBGE = frozenset({
+    1200401, 2704302, 1600303, 1302603, 2927408, 2304400, 5300108, 3205309, 5208707,
+    2111300, 5103403, 5002704, 3106200, 1501402, 2507507, 4106902, 2611606, 2211001,
+    3304557, 2408102, 4314902, 1100205, 1400100, 4205407, 3550308, 2800308, 1721000,
+})
+
+# Termo no formato do autocomplete ("Campinas, SP"): a UF vira preferência
+_TERMO_COM_UF = re.compile(r"^(.*\S)\s*,\s*([A-Za-z]{2})$")
+
+
+def _dados_autocomplete(cidade) -> Dict[str, Any]:
+    """Campos da cidade devolvidos pelo autocomplete (linha do banco ou modelo)"""
+    return {
+        "id": cidade.id,
+        "nome": cidade.nome,
+        "uf": cidade.uf,
+        "latitude": cidade.latitude,
+        "longitude": cidade.longitude,
+        "ibge_id": cidade.ibge_id
+    }
+
+
+def _item_autocomplete(cidade) -> Tuple[int, str, str, float, Dict[str, Any]]:
+    peso = 1.0 if cidade.ibge_id in CAPITAIS_IBGE else 0.0
+    return cidade.id, cidade.nome, cidade.uf, peso, _dados_autocomplete(cidade)
+
+
+def separar_uf(termo: str) -> Tuple[str, Optional[str]]:
+    """Separar a UF de um termo "Cidade, UF" (sem UF, devolve o termo inteiro e None)"""
+    correspondencia = _TERMO_COM_UF.match(termo.strip())
+    if correspondencia:
+        return correspondencia.group(1), correspondencia.group(2).upper()
+    return termo, None
+
+
+def _insert_para(db: Session):
+    """insert() com ON CONFLICT do dialeto da sessão (PostgreSQL; SQLite em desenvolvimento)"""
+    return sqlite.insert if db.get_bind().dialect.name == "sqlite" else postgresql.insert
+
+
 class CidadeRepository:
     """Repository para operações com cidades"""
     
+    # Índice espacial das cidades, compartilhado pelo processo
+    _indice = IndiceEspacial("cidades", tamanho_celula_graus=0.5)
+    # Índice de nomes do autocomplete, também compartilhado pelo processo
+    _indice_nomes = IndiceAutocomplete("cidades", similaridade_minima=settings.AUTOCOMPLETE_SIMILARIDADE_MINIMA)
+    
+    # Assinatura da tabela na última verificação (detecta escritas de outras instâncias)
+    _assinatura: Optional[tuple] = None
+    
     def __init__(self, db: Session):
         self.db = db
     
+    @classmethod
+    def invalidar_indice(cls):
+        """Reconstruir os índices em memória em segundo plano (após escritas em lote)"""
+        cls._indice.invalidar()
+        cls._indice_nomes.invalidar()
+    
+    @classmethod
+    def verificar_alteracoes(cls, db: Session):
+        """Invalidar os índices se a tabela mudou desde a última verificação"""
+        assinatura = _assinatura_tabela(db, Cidade)
+        if cls._assinatura is not None and assinatura != cls._assinatura:
+            logger.info("🔄 Cidades alteradas fora deste processo: reconstruindo os índices")
+            cls.invalidar_indice()
+        cls._assinatura = assinatura
+    
+    def construir_indices(self):
+        """Construir os índices em memória agora (na inicialização, antes das requisições)"""
+        CidadeRepository._assinatura = _assinatura_tabela(self.db, Cidade)
+        if settings.INDICE_ESPACIAL:
+            self._indice.reconstruir(_carregar_posicoes(Cidade)(self.db))
+        if settings.AUTOCOMPLETE_EM_MEMORIA:
+            self._indice_nomes.reconstruir(_carregar_itens_autocomplete(self.db))
+    
+    def obter_indice(self) -> Optional[IndiceEspacial]:
+        """Índice espacial (None se desabilitado ou ainda não construído: consultar o banco)"""
+        if not settings.INDICE_ESPACIAL:
+            return None
+        if self._indice.desatualizado:
+            _agendar_reconstrucao(self._indice, self.db.get_bind(), _carregar_posicoes(Cidade))
+        return self._indice if self._indice.construido else None
+    
+    def obter_indice_nomes(self) -> Optional[IndiceAutocomplete]:
+        """Índice do autocomplete (None se desabilitado ou ainda não construído: consultar o banco)"""
+        if not settings.AUTOCOMPLETE_EM_MEMORIA:
+            return None
+        if self._indice_nomes.desatualizado:
+            _agendar_reconstrucao(self._indice_nomes, self.db.get_bind(), _carregar_itens_autocomplete)
+        return self._indice_nomes if self._indice_nomes.construido else None
+    
     def create(self, cidade: CidadeCreate) -> Cidade:
         """Criar nova cidade"""
         db_cidade = Cidade(**cidade.dict())
         self.db.add(db_cidade)
         self.db.commit()
         self.db.refresh(db_cidade)
+        self._indice.inserir(db_cidade.id, db_cidade.latitude, db_cidade.longitude)
+        self._indice_nomes.inserir(*_item_autocomplete(db_cidade))
         return db_cidade
     
     def get_by_id(self, cidade_id: int) -> Optional[Cidade]:
@@ -22,8 +368,9 @@ class CidadeRepository:
         return self.db.query(Cidade).filter(Cidade.id == cidade_id).first()
     
     def get_by_nome(self, nome: str, uf: Optional[str] = None) -> Optional[Cidade]:
-        """Buscar cidade por nome"""
-        query = self.db.query(Cidade).filter(Cidade.nome_normalizado == nome.lower())
+        """Buscar cidade por nome (sem distinção de acentos)"""
+        nome_normalizado = unidecode(nome.lower().strip())
+        query = self.db.query(Cidade).filter(Cidade.nome_normalizado == nome_normalizado)
         if uf:
             query = query.filter(Cidade.uf == uf.upper())
         return query.first()
@@ -31,7 +378,132 @@ class CidadeRepository:
     def get_by_ibge_id(self, ibge_id: int) -> Optional[Cidade]:
         """Buscar cidade por ID do IBGE"""
         return self.db.query(Cidade).filter(Cidade.ibge_id == ibge_id).first()
-    
+
+    def get_by_ibge_ids(self, ibge_ids: List[int]) -> List[Cidade]:
+        """Buscar várias cidades por ID do IBGE em uma consulta, na ordem pedida"""
+        if not ibge_ids:
+            return []
+        por_ibge_id = {
+            cidade.ibge_id: cidade
+            for cidade in self.db.query(Cidade).filter(Cidade.ibge_id.in_(ibge_ids)).all()
+        }
+        return [por_ibge_id[ibge_id] for ibge_id in dict.fromkeys(ibge_ids) if ibge_id in por_ibge_id]
+
+    def upsert_por_ibge_id(
+        self, registros: List[Dict[str, Any]], colunas_atualizadas: Sequence[str] = COLUNAS_IDENTIFICACAO
+    ) -> Dict[str, int]:
+        """
+        Inserir ou atualizar cidades pelo ibge_id com INSERT ... ON CONFLICT em lotes
+
+        Cada lote é um único comando. Cidades existentes só são reescritas quando
+        alguma das `colunas_atualizadas` mudou (por padrão nome, nome_normalizado
+        e uf; as coordenadas já gravadas são mantidas).
+
+        Args:
+            registros: dicts com nome, nome_normalizado, uf, latitude, longitude e ibge_id
+            colunas_atualizadas: colunas sobrescritas em cidades já existentes
+
+        Returns:
+            Dict com inseridas, atualizadas e inalteradas
+        """
+        # Um mesmo ibge_id duas vezes no comando faria o ON CONFLICT falhar
+        registros = list({registro["ibge_id"]: registro for registro in registros}.values())
+        inseridas = atualizadas = 0
+        for inicio in range(0, len(registros), TAMANHO_LOTE_UPSERT):
+            lote = registros[inicio:inicio + TAMANHO_LOTE_UPSERT]
+            existentes = self.db.query(func.count(Cidade.id)).filter(
+                Cidade.ibge_id.in_([registro["ibge_id"] for registro in lote])
+            ).scalar()
+
+            stmt = _insert_para(self.db)(Cidade).values(lote)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Cidade.ibge_id],
+                set_={
+                    **{coluna: stmt.excluded[coluna] for coluna in colunas_atualizadas},
+                    "updated_at": func.now()
+                },
+                where=or_(*(
+                    getattr(Cidade, coluna).is_distinct_from(stmt.excluded[coluna])
+                    for coluna in colunas_atualizadas
+                ))
+            ).returning(Cidade.ibge_id)
+
+            # Linhas devolvidas: inseridas + atualizadas (o WHERE pula as inalteradas)
+            gravadas = len(self.db.execute(stmt).fetchall())
+            inseridas += len(lote) - existentes
+            atualizadas += gravadas - (len(lote) - existentes)
+
+        self.db.commit()
+        if registros:
+            self.invalidar_indice()
+
+        return {
+            "inseridas": inseridas,
+            "atualizadas": atualizadas,
+            "inalteradas": len(registros) - inseridas - atualizadas
+        }
+
+    def copiar_municipios(
+        self, linhas: Iterable[Dict[str, Any]], colunas_atualizadas: Sequence[str] = COLUNAS_COORDENADAS
+    ) -> Dict[str, int]:
+        """
+        Carga em massa de municípios pelo caminho mais rápido do banco
+
+        No PostgreSQL as linhas são enviadas em fluxo com COPY para uma tabela
+        temporária e aplicadas com um único INSERT ... SELECT ... ON CONFLICT
+        (ibge_id); nos demais bancos, em lotes de upsert_por_ibge_id.
+
+        Args:
+            linhas: dicts com nome, nome_normalizado, uf, latitude, longitude e ibge_id
+            colunas_atualizadas: colunas sobrescritas em cidades já existentes
+                (por padrão só as coordenadas)
+
+        Returns:
+            Dict com inseridas, atualizadas e inalteradas
+        """
+        if self.db.get_bind().dialect.name != "postgresql":
+            return self.upsert_por_ibge_id(list(linhas), colunas_atualizadas)
+
+        colunas = ", ".join(COLUNAS_COPIA)
+        atualizacoes = ", ".join(f"{coluna} = EXCLUDED.{coluna}" for coluna in colunas_atualizadas)
+        mudou = " OR ".join(f"cidades.{coluna} IS DISTINCT FROM EXCLUDED.{coluna}" for coluna in colunas_atualizadas)
+
+        cursor = self.db.connection().connection.cursor()
+        try:
+            cursor.execute(
+                "CREATE TEMP TABLE cidades_carga "
+                "(ibge_id integer, nome varchar(255), nome_normalizado varchar(255), "
+                "uf varchar(2), latitude double precision, longitude double precision) ON COMMIT DROP"
+            )
+            cursor.copy_expert(
+                f"COPY cidades_carga ({colunas}) FROM STDIN WITH (FORMAT csv)",
+                _FluxoCSV(linhas, COLUNAS_COPIA)
+            )
+            cursor.execute("SELECT count(*) FROM cidades_carga")
+            total = cursor.fetchone()[0]
+
+            # DISTINCT ON: um mesmo ibge_id duas vezes faria o ON CONFLICT falhar
+            cursor.execute(
+                f"INSERT INTO cidades ({colunas}) "
+                f"SELECT DISTINCT ON (ibge_id) {colunas} FROM cidades_carga ORDER BY ibge_id "
+                f"ON CONFLICT (ibge_id) DO UPDATE SET {atualizacoes}, updated_at = now() "
+                f"WHERE {mudou} "
+                f"RETURNING (xmax = 0)"
+            )
+            gravadas = [inserida for (inserida,) in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+        self.db.commit()
+        self.invalidar_indice()
+
+        inseridas = sum(gravadas)
+        return {
+            "inseridas": inseridas,
+            "atualizadas": len(gravadas) - inseridas,
+            "inalteradas": total - len(gravadas)
+        }
+
     def get_all(self, skip: int = 0, limit: int = 100, uf: Optional[str] = None) -> List[Cidade]:
         """Listar cidades com paginação"""
         query = self.db.query(Cidade)
@@ -54,6 +526,8 @@ class CidadeRepository:
                 setattr(db_cidade, field, value)
             self.db.commit()
             self.db.refresh(db_cidade)
+            self._indice.inserir(db_cidade.id, db_cidade.latitude, db_cidade.longitude)
+            self._indice_nomes.inserir(*_item_autocomplete(db_cidade))
         return db_cidade
     
     def delete(self, cidade_id: int) -> bool:
@@ -62,32 +536,96 @@ class CidadeRepository:
         if db_cidade:
             self.db.delete(db_cidade)
             self.db.commit()
+            self._indice.remover(cidade_id)
+            self._indice_nomes.remover(cidade_id)
             return True
         return False
     
-    def buscar_proximas(self, latitude: float, longitude: float, raio_km: float = 50) -> List[Cidade]:
-        """Buscar cidades próximas a uma coordenada (simplificado)"""
-        # Implementação simplificada usando cálculo de distância euclidiana
-        # Em produção, use PostGIS ou similar para cálculos geográficos precisos
-        delta = raio_km / 111.0  # Aproximadamente 1 grau = 111 km
+    def buscar_proximas_com_distancia(self, latitude: float, longitude: float,
+                                      raio_km: float = 50) -> List[Tuple[float, Cidade]]:
+        """Cidades a até raio_km da coordenada, como (distancia_km, cidade) ordenadas por distância"""
+        indice = self.obter_indice()
+        if indice is not None:
+            resultados = indice.buscar_raio(latitude, longitude, raio_km)
+            cidades = self._carregar_por_ids([item_id for _, item_id in resultados])
+            distancias = {item_id: distancia for distancia, item_id in resultados}
+            return [(distancias[cidade.id], cidade) for cidade in cidades]
         
-        return self.db.query(Cidade).filter(
-            Cidade.latitude.between(latitude - delta, latitude + delta),
-            Cidade.longitude.between(longitude - delta, longitude + delta)
+        # Sem índice em memória: índice geográfico do banco (migração 006)
+        resultados = _consultar_geo_banco(self.db, Cidade, latitude, longitude, raio_km=raio_km)
+        if resultados is not None:
+            return resultados
+        
+        # Sem suporte geográfico: filtro por caixa no banco + distância exata
+        delta_lat, delta_lon = _caixa_de_busca(latitude, raio_km)
+        candidatas = self.db.query(Cidade).filter(
+            Cidade.latitude.between(latitude - delta_lat, latitude + delta_lat),
+            Cidade.longitude.between(longitude - delta_lon, longitude + delta_lon)
         ).all()
+        return _filtrar_por_distancia(candidatas, latitude, longitude, raio_km)
+    
+    def buscar_proximas(self, latitude: float, longitude: float, raio_km: float = 50) -> List[Cidade]:
+        """Buscar cidades a até raio_km de uma coordenada, da mais próxima para a mais distante"""
+        return [cidade for _, cidade in self.buscar_proximas_com_distancia(latitude, longitude, raio_km)]
+    
+    def buscar_k_mais_proximas(self, latitude: float, longitude: float, k: int = 10,
+                               raio_maximo_km: Optional[float] = None) -> List[Tuple[float, Cidade]]:
+        """As k cidades mais próximas da coordenada, como (distancia_km, cidade)"""
+        indice = self.obter_indice()
+        if indice is None:
+            resultados = _consultar_geo_banco(self.db, Cidade, latitude, longitude, raio_km=raio_maximo_km, k=k)
+            if resultados is not None:
+                return resultados
+            raio = raio_maximo_km if raio_maximo_km is not None else 500
+            return self.buscar_proximas_com_distancia(latitude, longitude, raio)[:k]
+        
+        resultados = indice.k_mais_proximos(latitude, longitude, k, raio_maximo_km)
+        cidades = self._carregar_por_ids([item_id for _, item_id in resultados])
+        distancias = {item_id: distancia for distancia, item_id in resultados}
+        return [(distancias[cidade.id], cidade) for cidade in cidades]
+    
+    def buscar_mais_proxima(self, latitude: float, longitude: float, raio_km: float = 50) -> Optional[Cidade]:
+        """Buscar a cidade mais próxima de uma coordenada dentro do raio"""
+        resultados = self.buscar_k_mais_proximas(latitude, longitude, k=1, raio_maximo_km=raio_km)
+        return resultados[0][1] if resultados else None
+    
+    def _carregar_por_ids(self, ids: List[int]) -> List[Cidade]:
+        if not ids:
+            return []
+        return _ordenar_por_ids(self.db.query(Cidade).filter(Cidade.id.in_(ids)).all(), ids)
     
-    def buscar_por_termo(self, termo: str, limit: int = 10) -> List[Cidade]:
+    def autocompletar(self, termo: str, limit: int = 10, uf: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Cidades para o autocomplete, pelo índice de nomes em memória (sem consultar o banco)
+
+        Um termo "Cidade, UF" prefere a UF informada. Com o índice desabilitado,
+        cai na busca no banco (trigramas da migração 007, ou LIKE).
+        """
+        termo, uf_termo = separar_uf(termo)
+        uf = uf or uf_termo
+        indice = self.obter_indice_nomes()
+        if indice is not None:
+            return [dados for _, dados in indice.buscar(termo, limit, uf)]
+        return [_dados_autocomplete(cidade) for cidade in self.buscar_por_termo(termo, limit, uf)]
+    
+    def buscar_por_termo(self, termo: str, limit: int = 10, uf: Optional[str] = None) -> List[Cidade]:
         """Buscar cidades por termo para autocomplete"""
-        termo_limpo = termo.strip().lower()
+        termo_limpo = unidecode(termo.strip().lower())
         if not termo_limpo:
             return []
         
+        # Cidades da UF preferida primeiro
+        ordem = [Cidade.nome.asc()]
+        if uf:
+            ordem.insert(0, (Cidade.uf != uf.upper()).asc())
+        
+        if _tem_busca_trigramas(self.db):
+            return self._buscar_por_trigramas(termo_limpo, limit, ordem)
+        
         # Busca por nome que comece com o termo ou contenha o termo
         query = self.db.query(Cidade).filter(
             Cidade.nome_normalizado.like(f'{termo_limpo}%')
-        ).order_by(
-            Cidade.nome.asc()
-        ).limit(limit)
+        ).order_by(*ordem).limit(limit)
         
         resultados = query.all()
         
@@ -95,25 +633,78 @@ class CidadeRepository:
         if not resultados:
             query = self.db.query(Cidade).filter(
                 Cidade.nome_normalizado.like(f'%{termo_limpo}%')
-            ).order_by(
-                Cidade.nome.asc()
-            ).limit(limit)
+            ).order_by(*ordem).limit(limit)
             resultados = query.all()
         
         return resultados
+    
+    def _buscar_por_trigramas(self, termo_limpo: str, limit: int, ordem: list) -> List[Cidade]:
+        """
+        Uma consulta indexada (migração 007) no lugar das duas varreduras por LIKE
+        
+        Ordem: nome igual ao termo, nome começando pelo termo, UF preferida,
+        similaridade de palavra e nome.
+        """
+        sql = _SQL_BUSCA_TRIGRAMAS
+        escapado = _escapar_like(termo_limpo)
+        return self.db.query(Cidade).filter(
+            text(f"({sql['filtro']})")
+        ).order_by(
+            text(f"({sql['exato']}) DESC"),
+            text(f"({sql['prefixo']}) DESC"),
+            *ordem[:-1],
+            text(f"{sql['similaridade']} DESC"),
+            *ordem[-1:]
+        ).limit(limit).params(
+            termo=termo_limpo, prefixo=f"{escapado}%", contem=f"%{escapado}%"
+        ).all()
 
 class PontoTuristicoRepository:
     """Repository para operações com pontos turísticos"""
     
+    # Índice espacial dos pontos turísticos, compartilhado pelo processo
+    _indice = IndiceEspacial("pontos_turisticos", tamanho_celula_graus=0.1)
+    
+    # Assinatura da tabela na última verificação (detecta escritas de outras instâncias)
+    _assinatura: Optional[tuple] = None
+    
     def __init__(self, db: Session):
         self.db = db
     
+    @classmethod
+    def invalidar_indice(cls):
+        """Reconstruir o índice espacial em segundo plano"""
+        cls._indice.invalidar()
+    
+    @classmethod
+    def verificar_alteracoes(cls, db: Session):
+        """Invalidar o índice se a tabela mudou desde a última verificação"""
+        assinatura = _assinatura_tabela(db, PontoTuristico)
+        if cls._assinatura is not None and assinatura != cls._assinatura:
+            cls.invalidar_indice()
+        cls._assinatura = assinatura
+    
+    def construir_indices(self):
+        """Construir o índice espacial agora (na inicialização, antes das requisições)"""
+        PontoTuristicoRepository._assinatura = _assinatura_tabela(self.db, PontoTuristico)
+        if settings.INDICE_ESPACIAL:
+            self._indice.reconstruir(_carregar_posicoes(PontoTuristico)(self.db))
+    
+    def obter_indice(self) -> Optional[IndiceEspacial]:
+        """Índice espacial (None se desabilitado ou ainda não construído: consultar o banco)"""
+        if not settings.INDICE_ESPACIAL:
+            return None
+        if self._indice.desatualizado:
+            _agendar_reconstrucao(self._indice, self.db.get_bind(), _carregar_posicoes(PontoTuristico))
+        return self._indice if self._indice.construido else None
+    
     def create(self, ponto: PontoTuristicoCreate) -> PontoTuristico:
         """Criar novo ponto turístico"""
         db_ponto = PontoTuristico(**ponto.dict())
         self.db.add(db_ponto)
         self.db.commit()
         self.db.refresh(db_ponto)
+        self._indice.inserir(db_ponto.id, db_ponto.latitude, db_ponto.longitude)
         return db_ponto
     
     def get_by_id(self, ponto_id: int) -> Optional[PontoTuristico]:
@@ -124,15 +715,151 @@ class PontoTuristicoRepository:
         """Buscar pontos turísticos por cidade"""
         return self.db.query(PontoTuristico).filter(PontoTuristico.cidade_id == cidade_id).all()
     
-    def get_proximos(self, latitude: float, longitude: float, raio_km: float = 20) -> List[PontoTuristico]:
-        """Buscar pontos turísticos próximos a uma coordenada"""
-        delta = raio_km / 111.0
+    def get_proximos_com_distancia(self, latitude: float, longitude: float,
+                                   raio_km: float = 20) -> List[Tuple[float, PontoTuristico]]:
+        """Pontos a até raio_km da coordenada, como (distancia_km, ponto) ordenados por distância"""
+        indice = self.obter_indice()
+        if indice is not None:
+            resultados = indice.buscar_raio(latitude, longitude, raio_km)
+            pontos = self._carregar_por_ids([item_id for _, item_id in resultados])
+            distancias = {item_id: distancia for distancia, item_id in resultados}
+            return [(distancias[ponto.id], ponto) for ponto in pontos]
+        
+        # Sem índice em memória: índice geográfico do banco (migração 006)
+        resultados = _consultar_geo_banco(self.db, PontoTuristico, latitude, longitude, raio_km=raio_km)
+        if resultados is not None:
+            return resultados
         
-        return self.db.query(PontoTuristico).filter(
-            PontoTuristico.latitude.between(latitude - delta, latitude + delta),
-            PontoTuristico.longitude.between(longitude - delta, longitude + delta)
+        # Sem suporte geográfico: filtro por caixa no banco + distância exata
+        delta_lat, delta_lon = _caixa_de_busca(latitude, raio_km)
+        candidatos = self.db.query(PontoTuristico).filter(
+            PontoTuristico.latitude.between(latitude - delta_lat, latitude + delta_lat),
+            PontoTuristico.longitude.between(longitude - delta_lon, longitude + delta_lon)
         ).all()
+        return _filtrar_por_distancia(candidatos, latitude, longitude, raio_km)
+    
+    def get_proximos(self, latitude: float, longitude: float, raio_km: float = 20) -> List[PontoTuristico]:
+        """Buscar pontos turísticos a até raio_km de uma coordenada, do mais próximo ao mais distante"""
+        return [ponto for _, ponto in self.get_proximos_com_distancia(latitude, longitude, raio_km)]
+    
+    def get_k_mais_proximos(self, latitude: float, longitude: float, k: int = 10,
+                            raio_maximo_km: Optional[float] = None) -> List[Tuple[float, PontoTuristico]]:
+        """Os k pontos turísticos mais próximos da coordenada, como (distancia_km, ponto)"""
+        indice = self.obter_indice()
+        if indice is None:
+            resultados = _consultar_geo_banco(self.db, PontoTuristico, latitude, longitude, raio_km=raio_maximo_km, k=k)
+            if resultados is not None:
+                return resultados
+            raio = raio_maximo_km if raio_maximo_km is not None else 100
+            return self.get_proximos_com_distancia(latitude, longitude, raio)[:k]
+        
+        resultados = indice.k_mais_proximos(latitude, longitude, k, raio_maximo_km)
+        pontos = self._carregar_por_ids([item_id for _, item_id in resultados])
+        distancias = {item_id: distancia for distancia, item_id in resultados}
+        return [(distancias[ponto.id], ponto) for ponto in pontos]
+    
+    def get_no_corredor(self, vertices: List[Tuple[float, float]], largura_km: float = 30,
+                        categorias: Optional[List[str]] = None,
+                        excluir_cidades: Optional[List[int]] = None,
+                        limit: Optional[int] = None) -> List[Tuple[float, float, float, PontoTuristico]]:
+        """
+        Pontos a até largura_km de uma polilinha (ex: origem → destino)
+        
+        Pré-filtra pela caixa do corredor (índice em memória ou índice lat/lon do
+        banco) e calcula as distâncias exatas de todos os candidatos de uma vez.
+        
+        Returns:
+            Lista de (desvio_km, distancia_km, fracao_percurso, ponto) ordenada
+            pelo desvio que o ponto acrescenta à viagem
+        """
+        lat_min, lat_max, lon_min, lon_max = caixa_do_corredor(vertices, largura_km)
+        
+        indice = self.obter_indice()
+        if indice is not None:
+            candidatos = indice.buscar_caixa(lat_min, lat_max, lon_min, lon_max)
+        else:
+            candidatos = self.db.query(
+                PontoTuristico.id, PontoTuristico.latitude, PontoTuristico.longitude
+            ).filter(
+                PontoTuristico.latitude.between(lat_min, lat_max),
+                PontoTuristico.longitude.between(lon_min, lon_max)
+            ).all()
+        if not candidatos:
+            return []
+        
+        ids = [candidato[0] for candidato in candidatos]
+        distancias, desvios, fracoes = distancias_ao_corredor(
+            [candidato[1] for candidato in candidatos],
+            [candidato[2] for candidato in candidatos],
+            vertices
+        )
+        
+        selecionados = sorted(
+            (float(desvios[i]), float(distancias[i]), float(fracoes[i]), ids[i])
+            for i in range(len(ids))
+            if distancias[i] <= largura_km
+        )
+        
+        # Carregar só o necessário; categorias filtradas no banco, mantendo a ordem
+        resultados = []
+        for inicio in range(0, len(selecionados), 500):
+            lote = selecionados[inicio:inicio + 500]
+            query = self.db.query(PontoTuristico).filter(PontoTuristico.id.in_([item[3] for item in lote]))
+            if categorias:
+                query = query.filter(PontoTuristico.categoria.in_(categorias))
+            if excluir_cidades:
+                query = query.filter(or_(
+                    PontoTuristico.cidade_id.is_(None),
+                    PontoTuristico.cidade_id.notin_(excluir_cidades)
+                ))
+            por_id = {ponto.id: ponto for ponto in query.all()}
+            resultados.extend(
+                (desvio, distancia, fracao, por_id[ponto_id])
+                for desvio, distancia, fracao, ponto_id in lote
+                if ponto_id in por_id
+            )
+            if limit is not None and len(resultados) >= limit:
+                return resultados[:limit]
+        return resultados
     
     def get_all(self, skip: int = 0, limit: int = 100) -> List[PontoTuristico]:
         """Listar pontos turísticos com paginação"""
-        return self.db.query(PontoTuristico).offset(skip).limit(limit).all()
\ No newline at end of file
+        return self.db.query(PontoTuristico).offset(skip).limit(limit).all()
+    
+    def buscar_duplicado(self, nome_normalizado: str, latitude: float, longitude: float,
+                         raio_km: float = 1.0) -> Optional[PontoTuristico]:
+        """Buscar ponto com o mesmo nome normalizado a até raio_km da coordenada"""
+        delta_lat, delta_lon = _caixa_de_busca(latitude, raio_km)
+        
+        candidatos = self.db.query(PontoTuristico).filter(
+            PontoTuristico.nome_normalizado == nome_normalizado,
+            PontoTuristico.latitude.between(latitude - delta_lat, latitude + delta_lat),
+            PontoTuristico.longitude.between(longitude - delta_lon, longitude + delta_lon)
+        ).all()
+        
+        for ponto in candidatos:
+            if haversine_km(latitude, longitude, ponto.latitude, ponto.longitude) <= raio_km:
+                return ponto
+        return None
+    
+    def get_by_cidade_e_categorias(self, cidade_id: int, categorias: Optional[List[str]] = None,
+                                   limit: int = 10) -> List[PontoTuristico]:
+        """Buscar pontos de uma cidade, opcionalmente filtrando por categorias"""
+        query = self.db.query(PontoTuristico).filter(PontoTuristico.cidade_id == cidade_id)
+        if categorias:
+            query = query.filter(PontoTuristico.categoria.in_(categorias))
+        return query.order_by(PontoTuristico.id.asc()).limit(limit).all()
+    
+    def salvar_varios(self, pontos: List[PontoTuristico]) -> None:
+        """Adicionar/atualizar vários pontos em uma única transação"""
+        self.db.add_all(pontos)
+        self.db.flush()
+        posicoes = [(ponto.id, ponto.latitude, ponto.longitude) for ponto in pontos]
+        self.db.commit()
+        for posicao in posicoes:
+            self._indice.inserir(*posicao)
+    
+    def _carregar_por_ids(self, ids: List[int]) -> List[PontoTuristico]:
+        if not ids:
+            return []
+        return _ordenar_por_ids(self.db.query(PontoTuristico).filter(PontoTuristico.id.in_(ids)).all(), ids)
\ No newline at end of file
@@ -0,0 +1,95 @@
+"""
+Repository para o cache persistente de rotas turísticas
+"""
+from datetime import datetime, timezone
+from typing import Optional, Tuple, Dict, Any
+from sqlalchemy import bindparam, update, delete, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.rota_cache import RotaCache
+
+class RotaCacheRepository:
+    """Repository para gerenciar o cache de rotas compartilhado entre workers"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def buscar_valida(self, cache_key: str) -> Optional[Tuple[str, datetime]]:
+        """
+        Buscar rota não expirada (somente leitura; os hits são gravados em lote)
+
+        Returns:
+            Tupla (rota_json, expira_em) ou None se não houver entrada válida
+        """
+        resultado = self.db.query(RotaCache.rota_json, RotaCache.expira_em).filter(
+            RotaCache.cache_key == cache_key,
+            RotaCache.expira_em > datetime.now(timezone.utc)
+        ).first()
+
+        if not resultado:
+            return None
+        return resultado[0], resultado[1]
+
+    def salvar(self, cache_key: str, rota_json: str, expira_em: datetime) -> None:
+        """Inserir ou atualizar rota no cache"""
+        stmt = insert(RotaCache).values(
+            cache_key=cache_key,
+            rota_json=rota_json,
+            expira_em=expira_em,
+            hits=0
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[RotaCache.cache_key],
+            set_={
+                "rota_json": stmt.excluded.rota_json,
+                "expira_em": stmt.excluded.expira_em,
+                "updated_at": func.now()
+            }
+        )
+        self.db.execute(stmt)
+        self.db.commit()
+
+    def registrar_hits(self, hits: Dict[str, int]) -> int:
+        """Somar hits acumulados por chave (uma instrução executada para o lote todo)"""
+        if not hits:
+            return 0
+
+        tabela = RotaCache.__table__
+        self.db.execute(
+            update(tabela)
+            .where(tabela.c.cache_key == bindparam("chave"))
+            .values(hits=tabela.c.hits + bindparam("incremento")),
+            [{"chave": chave, "incremento": total} for chave, total in hits.items()]
+        )
+        self.db.commit()
+        return len(hits)
+
+    def remover_expiradas(self) -> int:
+        """Remover entradas expiradas"""
+        resultado = self.db.execute(
+            delete(RotaCache).where(RotaCache.expira_em <= datetime.now(timezone.utc))
+        )
+        self.db.commit()
+        return resultado.rowcount
+
+    def limpar(self) -> int:
+        """Remover todas as entradas do cache"""
+        resultado = self.db.execute(delete(RotaCache))
+        self.db.commit()
+        return resultado.rowcount
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Obter estatísticas do cache persistente"""
+        agora = datetime.now(timezone.utc)
+        total, validas, hits = self.db.query(
+            func.count(RotaCache.cache_key),
+            func.count(RotaCache.cache_key).filter(RotaCache.expira_em > agora),
+            func.coalesce(func.sum(RotaCache.hits), 0)
+        ).one()
+
+        return {
+            "total_entradas": total,
+            "entradas_validas": validas,
+            "total_hits": int(hits)
+        }
\ No newline at end of file
@@ -2,9 +2,10 @@
 Repository para operações com Roteiros
 """
 import json
-from typing import List, Optional
+from datetime import datetime
+from typing import List, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, and_
+from sqlalchemy import desc, and_, func
 
 from app.models.roteiro import Roteiro
 from app.schemas.roteiro import RoteiroCreate, RoteiroUpdate
@@ -38,6 +39,12 @@ class RoteiroRepository:
             and_(Roteiro.id == roteiro_id, Roteiro.usuario_id == usuario_id)
         ).first()
 
+    def get_versao(self, roteiro_id: int, usuario_id: int) -> Optional[Tuple[int, datetime]]:
+        """(id, data_atualizacao) do roteiro, sem carregar o conteúdo (apenas do usuário logado)"""
+        return self.db.query(Roteiro.id, Roteiro.data_atualizacao).filter(
+            and_(Roteiro.id == roteiro_id, Roteiro.usuario_id == usuario_id)
+        ).first()
+
     def get_by_user(self, usuario_id: int, skip: int = 0, limit: int = 100) -> List[Roteiro]:
         """Listar roteiros do usuário"""
         return self.db.query(Roteiro).filter(
@@ -72,6 +79,15 @@ class RoteiroRepository:
         """Contar roteiros do usuário"""
         return self.db.query(Roteiro).filter(Roteiro.usuario_id == usuario_id).count()
 
+    def pares_mais_solicitados(self, limit: int = 50) -> List[tuple]:
+        """Pares origem/destino (e preferências) mais salvos, do mais frequente ao menos"""
+        total = func.count(Roteiro.id).label("total")
+        return self.db.query(
+            Roteiro.origem, Roteiro.destino, Roteiro.preferencias, total
+        ).group_by(
+            Roteiro.origem, Roteiro.destino, Roteiro.preferencias
+        ).order_by(desc(total)).limit(limit).all()
+
     def search_by_title(self, usuario_id: int, titulo: str) -> List[Roteiro]:
         """Buscar roteiros por título"""
         return self.db.query(Roteiro).filter(
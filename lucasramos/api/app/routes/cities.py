@@ -1,42 +1,101 @@
-from fastapi import APIRouter, Depends, Query
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from app.core.database import get_db
+from app.core.http_cache import cache_control_cidades, resposta_json_condicional
 from app.services.cidade_service import CidadeService
-from app.schemas.cidade import AutocompleteResponse
+from app.schemas.cidade import AutocompleteResponse, CidadesProximasResponse, DistanciasResponse
 
 router = APIRouter()
 
 @router.get("/")
 async def listar_cidades(
+    request: Request,
     page: int = Query(1, ge=1, description="Número da página"),
     db: Session = Depends(get_db)
 ):
-    """Listar cidades com paginação de 50 itens por página"""
+    """Listar cidades com paginação de 50 itens por página (com ETag; `If-None-Match` → 304)"""
     service = CidadeService(db)
     resultado = service.listar_cidades_paginadas(page=page, per_page=50)
-    return resultado
+    return resposta_json_condicional(request, resultado, cache_control_cidades())
 
 @router.get("/search", response_model=AutocompleteResponse)
 async def buscar_cidades_autocomplete(
+    request: Request,
     q: str = Query(..., min_length=2, description="Termo de busca (mínimo 2 caracteres)"),
     limit: int = Query(10, ge=1, le=50, description="Limite de resultados (máximo 50)"),
+    uf: Optional[str] = Query(None, min_length=2, max_length=2, description="UF preferida na ordenação"),
     db: Session = Depends(get_db)
 ):
     """
     Buscar cidades para autocomplete
     
-    - **q**: Termo de busca (nome da cidade)
+    - **q**: Termo de busca (nome da cidade; acentos são ignorados, "Campinas, SP" prefere a UF)
     - **limit**: Número máximo de resultados (padrão: 10, máximo: 50)
+    - **uf**: UF cujas cidades aparecem primeiro (não filtra)
+    
+    Responde do índice de nomes em memória, sem consultar o banco. Vêm primeiro
+    o nome exato, depois os nomes que começam com o termo, os que têm uma
+    palavra começando com ele e, por fim, os parecidos (erros de digitação).
     
-    Retorna uma lista de cidades que começam com o termo informado.
-    Se não encontrar resultados, busca cidades que contenham o termo.
+    A resposta traz `ETag` e `Cache-Control`; com `If-None-Match` igual, responde 304.
     
     **Exemplo de uso:**
     ```
     GET /api/v1/cities/search?q=rio&limit=5
     GET /api/v1/cities/search?q=são paulo&limit=10
+    GET /api/v1/cities/search?q=florianopolsi
+    GET /api/v1/cities/search?q=santa rita&uf=PB
+    ```
+    """
+    service = CidadeService(db)
+    resultado = service.buscar_cidades_autocomplete(termo=q, limit=limit, uf=uf)
+    return resposta_json_condicional(request, resultado, cache_control_cidades())
+
+@router.get("/proximas", response_model=CidadesProximasResponse)
+async def buscar_cidades_proximas(
+    latitude: float = Query(..., ge=-90, le=90, description="Latitude de referência"),
+    longitude: float = Query(..., ge=-180, le=180, description="Longitude de referência"),
+    k: int = Query(10, ge=1, le=100, description="Número de cidades (máximo 100)"),
+    raio_km: Optional[float] = Query(None, gt=0, le=2000, description="Distância máxima em km"),
+    db: Session = Depends(get_db)
+):
+    """
+    Buscar as k cidades mais próximas de uma coordenada
+    
+    Usa o índice espacial em memória; as cidades vêm ordenadas pela distância
+    haversine (em linha reta), informada em `distancia_km`.
+    
+    **Exemplo de uso:**
+    ```
+    GET /api/v1/cities/proximas?latitude=-23.55&longitude=-46.63&k=5
+    GET /api/v1/cities/proximas?latitude=-22.9&longitude=-43.2&k=20&raio_km=100
     ```
     """
     service = CidadeService(db)
-    resultado = service.buscar_cidades_autocomplete(termo=q, limit=limit)
-    return resultado
\ No newline at end of file
+    return service.buscar_cidades_proximas(latitude, longitude, k, raio_km)
+
+@router.get("/distancias", response_model=DistanciasResponse)
+async def estimar_distancias(
+    origem: int = Query(..., description="ID IBGE da cidade de origem"),
+    destinos: List[int] = Query(..., max_length=500, description="IDs IBGE das cidades de destino (máximo 500)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Estimar distância e tempo de viagem de uma cidade para várias outras
+    
+    Calculado localmente, de uma vez para todos os destinos: distância de grande
+    círculo, distância rodoviária (linha reta × `DISTANCIA_FATOR_RODOVIARIO`) e
+    tempo de carro (`VELOCIDADE_MEDIA_KMH`). São os mesmos valores usados nos
+    campos `distancia_aproximada` e `tempo_viagem_estimado` das rotas.
+    
+    **Exemplo de uso:**
+    ```
+    GET /api/v1/cities/distancias?origem=3550308&destinos=3304557&destinos=4106902
+    ```
+    """
+    service = CidadeService(db)
+    resultado = service.estimar_distancias(origem, destinos)
+    if resultado is None:
+        raise HTTPException(status_code=404, detail="Cidade de origem não encontrada")
+    return resultado
@@ -2,10 +2,16 @@
 Rotas para gerenciamento de Roteiros Salvos
 """
 from typing import List, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Header
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Request
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
+from app.core.http_cache import (
+    CACHE_CONTROL_PRIVADO,
+    gerar_etag,
+    resposta_json_condicional,
+    resposta_nao_modificada,
+)
 from app.services.auth_service import AuthService
 from app.services.roteiro_service import RoteiroService
 from app.schemas.roteiro import (
@@ -91,14 +97,31 @@ def estatisticas_roteiros(
 @router.get("/{roteiro_id}", response_model=RoteiroResponse)
 def obter_roteiro(
     roteiro_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     usuario_id: int = Depends(get_current_user_id)
 ):
     """
     Obter roteiro específico
+    
+    O `ETag` acompanha `data_atualizacao`; com `If-None-Match` igual, responde 304
+    consultando só o id e a data, sem carregar nem serializar o roteiro.
     """
     service = RoteiroService(db)
-    return service.obter_roteiro(roteiro_id, usuario_id)
+    versao_id, data_atualizacao = service.obter_versao_roteiro(roteiro_id, usuario_id)
+    nao_modificada = resposta_nao_modificada(
+        request, gerar_etag("roteiro", versao_id, data_atualizacao.isoformat()), CACHE_CONTROL_PRIVADO
+    )
+    if nao_modificada is not None:
+        return nao_modificada
+
+    roteiro = service.obter_roteiro(roteiro_id, usuario_id)
+    return resposta_json_condicional(
+        request,
+        roteiro,
+        CACHE_CONTROL_PRIVADO,
+        etag=gerar_etag("roteiro", roteiro.id, roteiro.data_atualizacao.isoformat())
+    )
 
 @router.get("/{roteiro_id}/completo")
 def obter_roteiro_completo(
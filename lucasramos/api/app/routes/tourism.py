@@ -1,23 +1,84 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+import json
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
 from app.core.database import get_db
+from app.core.http_cache import (
+    cabecalhos_cache,
+    cache_control_cidades,
+    cache_control_rotas,
+    resposta_json_condicional,
+    resposta_nao_modificada,
+)
+from app.core.rate_limit import LimiteExcedidoError
+from app.core.resiliencia import ServicoIndisponivelError
+from app.services.auth_service import AuthService
 from app.services.turismo_service import TurismoService
 from app.services.gemini_service import GeminiService
+from app.services.ponto_turistico_service import PontoTuristicoService
+from app.schemas.cidade import PontosCorredorResponse, PontosProximosResponse
 from app.schemas.turismo import SolicitacaoRota, RespostaTurismo
-from typing import Optional
+from typing import Optional, Awaitable, TypeVar
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-def get_turismo_service(db: Session = Depends(get_db)) -> TurismoService:
+T = TypeVar("T")
+
+# Intervalo para verificar se o cliente ainda está conectado
+INTERVALO_VERIFICACAO_DESCONEXAO = 0.5
+
+def get_usuario_cota(
+    request: Request,
+    authorization: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+) -> str:
+    """Dependency para identificar quem consome a cota de tokens da IA (usuário ou IP)"""
+    if authorization and authorization.startswith("Bearer "):
+        user_data = AuthService(db).verificar_token(authorization.replace("Bearer ", ""))
+        if user_data:
+            return f"usuario:{user_data['id']}"
+    
+    return f"ip:{request.client.host if request.client else 'desconhecido'}"
+
+def get_turismo_service(
+    db: Session = Depends(get_db),
+    usuario: str = Depends(get_usuario_cota)
+) -> TurismoService:
     """Dependency para obter instância do TurismoService"""
-    return TurismoService(db)
+    return TurismoService(db, usuario=usuario)
+
+async def _executar_enquanto_conectado(request: Request, operacao: Awaitable[T]) -> T:
+    """
+    Executar operação cancelando-a se o cliente desconectar
+
+    Evita que chamadas longas ao Gemini continuem ocupando vagas de
+    concorrência depois que o cliente já desistiu da requisição.
+    """
+    tarefa = asyncio.ensure_future(operacao)
+    try:
+        while True:
+            done, _ = await asyncio.wait({tarefa}, timeout=INTERVALO_VERIFICACAO_DESCONEXAO)
+            if done:
+                return tarefa.result()
+            if await request.is_disconnected():
+                logger.info("Cliente desconectou, cancelando consulta em andamento")
+                tarefa.cancel()
+                raise HTTPException(
+                    status_code=499,
+                    detail="Cliente encerrou a requisição"
+                )
+    finally:
+        if not tarefa.done():
+            tarefa.cancel()
 
 @router.post("/route", response_model=RespostaTurismo)
 async def obter_rota_turistica(
     solicitacao: SolicitacaoRota,
+    request: Request,
     turismo_service: TurismoService = Depends(get_turismo_service)
 ):
     """
@@ -42,8 +103,48 @@ async def obter_rota_turistica(
         "preferencias": "pontos históricos e culturais"
     }
     ```
+    
+    Com o Gemini indisponível (circuit breaker aberto ou prazo excedido), responde
+    503 imediatamente com o cabeçalho `Retry-After`. Se a cota de tokens da IA
+    (global ou do usuário/IP) estiver esgotada, responde 429 com `Retry-After`;
+    rotas em cache não consomem cota.
+    
+    Respostas repetidas saem de um cache de bytes já serializados, comprimidos
+    com gzip quando o cliente envia `Accept-Encoding: gzip`. A resposta traz
+    `ETag`; reenviando-o em `If-None-Match`, o cliente recebe 304 sem corpo.
+    O cabeçalho `X-Cache` (`HIT`/`MISS`) indica se o corpo saiu desse cache.
+    Para cache em navegador ou proxy reverso, use a variante `GET /route`.
+    """
+    
+    return await _responder_rota(solicitacao, request, turismo_service)
+
+@router.get("/route", response_model=RespostaTurismo)
+async def obter_rota_turistica_get(
+    request: Request,
+    solicitacao: SolicitacaoRota = Depends(),
+    turismo_service: TurismoService = Depends(get_turismo_service)
+):
+    """
+    🗺️ Obter rota turística (variante GET, cacheável por navegadores e proxies)
+    
+    Mesmos parâmetros do `POST /route`, na query string:
+    ```
+    GET /api/v1/tourism/route?cidade_origem=Rio de Janeiro&uf_origem=RJ&cidade_destino=São Paulo&uf_destino=SP
+    ```
+    
+    A resposta traz `ETag` e `Cache-Control: public, max-age=...`; com
+    `If-None-Match` igual ao ETag atual, responde 304.
     """
     
+    return await _responder_rota(solicitacao, request, turismo_service)
+
+async def _responder_rota(
+    solicitacao: SolicitacaoRota,
+    request: Request,
+    turismo_service: TurismoService
+) -> Response:
+    """Consultar a rota e responder com o corpo serializado, ETag e 304 condicional"""
+    
     try:
         logger.info(f"Nova solicitação de rota: {solicitacao.cidade_origem} → {solicitacao.cidade_destino}")
         
@@ -54,21 +155,52 @@ async def obter_rota_turistica(
                 detail="As cidades de origem e destino devem ser diferentes"
             )
         
-        # Obter rota turística
-        resultado = await turismo_service.obter_rota_turistica(solicitacao)
+        # Obter rota turística (já serializada)
+        resultado, em_cache, erro = await _executar_enquanto_conectado(
+            request,
+            turismo_service.obter_rota_turistica_serializada(solicitacao)
+        )
         
         # Verificar se houve erro
-        if not resultado.sucesso:
+        if erro:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=resultado.erro or "Erro desconhecido ao processar solicitação"
+                detail=erro
             )
         
-        return resultado
+        usar_gzip = bool(resultado.corpo_gzip) and "gzip" in request.headers.get("accept-encoding", "").lower()
+        etag = resultado.etag_gzip if usar_gzip else resultado.etag
+        
+        nao_modificada = resposta_nao_modificada(request, etag, cache_control_rotas(), vary="Accept-Encoding")
+        if nao_modificada is not None:
+            return nao_modificada
+        
+        headers = cabecalhos_cache(etag, cache_control_rotas(), vary="Accept-Encoding")
+        # Por requisição: HIT quando o corpo saiu do cache de respostas serializadas
+        headers["X-Cache"] = "HIT" if em_cache else "MISS"
+        if usar_gzip:
+            headers["Content-Encoding"] = "gzip"
+            return Response(content=resultado.corpo_gzip, media_type="application/json", headers=headers)
+        
+        return Response(content=resultado.corpo, media_type="application/json", headers=headers)
         
     except HTTPException:
         # Re-raise HTTP exceptions
         raise
+    except LimiteExcedidoError as e:
+        # Cota de tokens da IA esgotada (respostas em cache não são cobradas)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after_segundos)}
+        )
+    except ServicoIndisponivelError as e:
+        # Falhar rápido enquanto o Gemini está degradado
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after_segundos)}
+        )
     except Exception as e:
         logger.error(f"Erro inesperado na rota turística: {e}")
         raise HTTPException(
@@ -76,8 +208,71 @@ async def obter_rota_turistica(
             detail="Erro interno do servidor. Tente novamente mais tarde."
         )
 
+@router.post("/route/stream")
+async def obter_rota_turistica_stream(
+    solicitacao: SolicitacaoRota,
+    turismo_service: TurismoService = Depends(get_turismo_service)
+):
+    """
+    ⚡ Obter rota turística em streaming (NDJSON)
+    
+    Mesma consulta do `POST /route`, mas a resposta é enviada como uma linha
+    JSON por evento, à medida que o Gemini gera o conteúdo:
+    
+    - `{"tipo": "metadata", ...}`: origem, destino, distância e tempo de viagem
+    - `{"tipo": "ponto", ...}`: cada ponto turístico assim que estiver completo
+    - `{"tipo": "fim", ...}`: recomendações gerais e melhor época de visita
+    - `{"tipo": "erro", ...}`: falha durante a consulta (com `retry_after` se o Gemini estiver indisponível)
+    
+    Como no `POST /route`, cota de tokens esgotada ou Gemini indisponível antes
+    do primeiro evento respondem 429/503 com `Retry-After`; só falhas no meio do
+    streaming chegam como evento de erro.
+    
+    Se a conexão for encerrada pelo cliente, a consulta ao Gemini é cancelada.
+    """
+    
+    if solicitacao.cidade_origem.strip().lower() == solicitacao.cidade_destino.strip().lower():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="As cidades de origem e destino devem ser diferentes"
+        )
+    
+    # O primeiro evento sai antes da resposta: a cota e o circuit breaker já
+    # foram verificados e uma recusa ainda pode virar o status HTTP
+    eventos = turismo_service.obter_rota_turistica_stream(solicitacao)
+    try:
+        primeiro = await eventos.__anext__()
+    except StopAsyncIteration:
+        primeiro = None
+    except LimiteExcedidoError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after_segundos)}
+        )
+    except ServicoIndisponivelError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after_segundos)}
+        )
+    
+    async def gerar_linhas():
+        if primeiro is None:
+            return
+        yield json.dumps(primeiro, ensure_ascii=False) + "\n"
+        async for evento in eventos:
+            yield json.dumps(evento, ensure_ascii=False) + "\n"
+    
+    return StreamingResponse(
+        gerar_linhas(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/cities")
 async def listar_cidades_disponiveis(
+    request: Request,
     uf: Optional[str] = None,
     page: int = 1,
     size: int = 50,
@@ -90,7 +285,8 @@ async def listar_cidades_disponiveis(
     - **page**: Página (inicia em 1)
     - **size**: Itens por página (máximo 100)
     
-    Retorna lista paginada de cidades cadastradas no sistema.
+    Retorna lista paginada de cidades cadastradas no sistema, com `ETag`
+    (`If-None-Match` → 304) e `Cache-Control`.
     """
     
     try:
@@ -117,7 +313,7 @@ async def listar_cidades_disponiveis(
             offset=offset
         )
         
-        return {
+        return resposta_json_condicional(request, {
             "cidades": resultado["cidades"],
             "paginacao": {
                 "page": page,
@@ -126,7 +322,7 @@ async def listar_cidades_disponiveis(
                 "total_pages": (resultado["total"] + size - 1) // size,
                 "has_next": resultado["tem_proxima_pagina"]
             }
-        }
+        }, cache_control_cidades())
         
     except HTTPException:
         raise
@@ -137,6 +333,56 @@ async def listar_cidades_disponiveis(
             detail="Erro interno ao listar cidades"
         )
 
+@router.get("/pontos/proximos", response_model=PontosProximosResponse)
+async def buscar_pontos_proximos(
+    latitude: float = Query(..., ge=-90, le=90, description="Latitude de referência"),
+    longitude: float = Query(..., ge=-180, le=180, description="Longitude de referência"),
+    k: int = Query(10, ge=1, le=100, description="Número de pontos (máximo 100)"),
+    raio_km: Optional[float] = Query(None, gt=0, le=500, description="Distância máxima em km"),
+    db: Session = Depends(get_db)
+):
+    """
+    📍 Buscar os k pontos turísticos catalogados mais próximos de uma coordenada
+    
+    Consulta o índice espacial em memória (sem varrer o banco); os pontos vêm
+    ordenados pela distância haversine, informada em `distancia_km`.
+    
+    **Exemplo de uso:**
+    ```
+    GET /api/v1/tourism/pontos/proximos?latitude=-22.95&longitude=-43.21&k=5&raio_km=10
+    ```
+    """
+    
+    return PontoTuristicoService(db).buscar_pontos_proximos(latitude, longitude, k, raio_km)
+
+@router.get("/pontos/corredor", response_model=PontosCorredorResponse)
+async def buscar_pontos_no_corredor(
+    solicitacao: SolicitacaoRota = Depends(),
+    largura_km: Optional[float] = Query(None, gt=0, le=200, description="Distância máxima do caminho em km"),
+    limite: int = Query(20, ge=1, le=100, description="Número máximo de pontos"),
+    turismo_service: TurismoService = Depends(get_turismo_service)
+):
+    """
+    🛣️ Buscar pontos turísticos catalogados ao longo do caminho entre duas cidades
+    
+    Sem consultar a IA: seleciona os pontos a até `largura_km` da linha
+    origem → destino, com menor desvio (`desvio_km`), na ordem da viagem.
+    
+    **Exemplo de uso:**
+    ```
+    GET /api/v1/tourism/pontos/corredor?cidade_origem=São Paulo&uf_origem=SP&cidade_destino=Rio de Janeiro&uf_destino=RJ&largura_km=20
+    ```
+    """
+    
+    resultado, erro = await turismo_service.buscar_pontos_no_corredor(solicitacao, largura_km, limite)
+    if erro:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=erro
+        )
+    
+    return resultado
+
 @router.get("/stats")
 async def estatisticas_banco(
     turismo_service: TurismoService = Depends(get_turismo_service)
@@ -170,6 +416,11 @@ async def estatisticas_cache():
     - Total de entradas
     - Entradas válidas vs expiradas
     - Tempo de vida do cache
+    - Uso de memória, evictions e hit ratio do cache em memória
+    - Chamadas ao Gemini coalescidas (single-flight)
+    - Rotas servidas após o TTL soft e revalidadas em segundo plano
+    - Estado do circuit breaker e hedges das chamadas ao Gemini
+    - Buckets de tokens (global e por usuário) e recusas por cota
     """
     try:
         stats = GeminiService.obter_estatisticas_cache()
@@ -177,7 +428,15 @@ async def estatisticas_cache():
             "cache_stats": stats,
             "performance": {
                 "cache_hit_benefit": "Resposta instantânea vs 3-5 segundos",
-                "ttl_configurado": f"{stats['cache_ttl_horas']:.1f} horas"
+                "ttl_configurado": f"{stats['cache_ttl_horas']:.1f} horas",
+                "ttl_maximo": f"{stats['cache_ttl_maximo_horas']:.1f} horas",
+                "respostas_expiradas": stats["revalidacao"]["respostas_expiradas"],
+                "circuit_breaker": stats["circuit_breaker"]["estado"],
+                "tokens_disponiveis_global": stats["rate_limit"]["global"]["disponivel"],
+                "hit_ratio": stats["memoria"]["hit_ratio"],
+                "hit_ratio_respostas_serializadas": stats["respostas_serializadas"]["hit_ratio"],
+                "evictions": stats["memoria"]["evictions"],
+                "bytes_usados": stats["memoria"]["bytes_usados"]
             }
         }
     except Exception as e:
@@ -221,6 +480,10 @@ async def tourism_home():
                 "descricao": "Obter rota turística entre duas cidades",
                 "tecnologia": "Google Gemini AI + Cache inteligente"
             },
+            {
+                "endpoint": "POST /route/stream",
+                "descricao": "Obter rota turística em streaming (NDJSON), ponto a ponto"
+            },
             {
                 "endpoint": "GET /cities",
                 "descricao": "Listar cidades disponíveis no banco"
@@ -241,7 +504,7 @@ async def tourism_home():
         "performance": {
             "primeira_consulta": "3-5 segundos (Gemini AI)",
             "consultas_repetidas": "Instantâneo (Cache)",
-            "cache_ttl": "24 horas"
+            "cache_ttl": "24 horas (revalidado em segundo plano até 72 horas)"
         },
         "configuracao_necessaria": [
             "GEMINI_API_KEY no arquivo .env",
@@ -46,6 +46,38 @@ class AutocompleteResponse(BaseModel):
     limit: int = Field(..., description="Limite aplicado na busca")
     message: Optional[str] = Field(None, description="Mensagem adicional")
 
+class CidadeProxima(CidadeAutocomplete):
+    """Cidade com a distância até a coordenada consultada"""
+    distancia_km: float = Field(..., description="Distância em linha reta (km)")
+
+class CidadesProximasResponse(BaseModel):
+    """Schema para resposta da busca de cidades mais próximas"""
+    cidades: List[CidadeProxima] = Field(..., description="Cidades ordenadas por distância")
+    total: int = Field(..., description="Total de cidades encontradas")
+    latitude: float = Field(..., description="Latitude consultada")
+    longitude: float = Field(..., description="Longitude consultada")
+    k: int = Field(..., description="Número máximo de cidades pedido")
+    raio_km: Optional[float] = Field(None, description="Raio máximo aplicado (km)")
+
+class CidadeReferencia(BaseModel):
+    nome: str = Field(..., description="Nome da cidade")
+    uf: str = Field(..., description="Sigla do estado")
+    ibge_id: Optional[int] = Field(None, description="ID do IBGE")
+
+class DistanciaCidade(CidadeReferencia):
+    """Distância e tempo de viagem estimados até uma cidade de destino"""
+    distancia_linha_reta_km: float = Field(..., description="Distância de grande círculo (km)")
+    distancia_rodoviaria_km: float = Field(..., description="Distância pela estrada estimada com o fator rodoviário (km)")
+    tempo_viagem_horas: float = Field(..., description="Tempo de viagem de carro estimado (horas)")
+
+class DistanciasResponse(BaseModel):
+    """Schema para resposta das distâncias estimadas de uma cidade para várias outras"""
+    origem: CidadeReferencia = Field(..., description="Cidade de origem")
+    destinos: List[DistanciaCidade] = Field(..., description="Estimativas na ordem pedida")
+    nao_encontrados: List[int] = Field(..., description="IDs IBGE de destino não cadastrados")
+    fator_rodoviario: float = Field(..., description="Razão estrada / linha reta aplicada")
+    velocidade_media_kmh: float = Field(..., description="Velocidade média aplicada (km/h)")
+
 class PontoTuristicoBase(BaseModel):
     nome: str = Field(..., description="Nome do ponto turístico")
     descricao: Optional[str] = Field(None, description="Descrição do ponto turístico")
@@ -65,6 +97,33 @@ class PontoTuristicoResponse(PontoTuristicoBase):
     class Config:
         from_attributes = True
 
+class PontoTuristicoProximo(PontoTuristicoBase):
+    """Ponto turístico com a distância até a coordenada consultada"""
+    id: int
+    cidade_id: Optional[int] = None
+    distancia_km: float = Field(..., description="Distância em linha reta (km)")
+
+class PontosProximosResponse(BaseModel):
+    """Schema para resposta da busca de pontos turísticos mais próximos"""
+    pontos: List[PontoTuristicoProximo] = Field(..., description="Pontos ordenados por distância")
+    total: int = Field(..., description="Total de pontos encontrados")
+    latitude: float = Field(..., description="Latitude consultada")
+    longitude: float = Field(..., description="Longitude consultada")
+    k: int = Field(..., description="Número máximo de pontos pedido")
+    raio_km: Optional[float] = Field(None, description="Raio máximo aplicado (km)")
+
+class PontoTuristicoCorredor(PontoTuristicoProximo):
+    """Ponto turístico ao longo do caminho (distancia_km é a distância até o caminho)"""
+    desvio_km: float = Field(..., description="Distância extra para incluir o ponto na viagem (km)")
+
+class PontosCorredorResponse(BaseModel):
+    """Schema para resposta da busca de pontos ao longo do caminho origem → destino"""
+    origem: str = Field(..., description="Cidade de origem (Cidade, UF)")
+    destino: str = Field(..., description="Cidade de destino (Cidade, UF)")
+    largura_km: float = Field(..., description="Distância máxima até o caminho (km)")
+    pontos: List[PontoTuristicoCorredor] = Field(..., description="Pontos na ordem da viagem")
+    total: int = Field(..., description="Total de pontos encontrados")
+
 class RotaTuristicaRequest(BaseModel):
     cidade_origem: str = Field(..., description="Nome da cidade de origem")
     cidade_destino: str = Field(..., description="Nome da cidade de destino")
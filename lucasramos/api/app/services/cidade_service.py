@@ -1,5 +1,8 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.geo import estimar_viagem, estimar_viagens_lote, formatar_distancia, formatar_tempo_viagem
+from app.models.cidade import Cidade
 from app.repositories.cidade_repository import CidadeRepository
 
 class CidadeService:
@@ -67,13 +70,14 @@ class CidadeService:
             }
         }
     
-    def buscar_cidades_autocomplete(self, termo: str, limit: int = 10) -> Dict[str, Any]:
+    def buscar_cidades_autocomplete(self, termo: str, limit: int = 10, uf: Optional[str] = None) -> Dict[str, Any]:
         """
         Buscar cidades para autocomplete
         
         Args:
             termo: Termo de busca
             limit: Limite de resultados (padrão 10)
+            uf: UF preferida na ordenação (opcional; também aceita "Cidade, UF" no termo)
             
         Returns:
             Dict com lista de cidades encontradas
@@ -86,25 +90,118 @@ class CidadeService:
                 "message": "Digite pelo menos 2 caracteres"
             }
         
-        # Buscar cidades via repository
-        cidades = self.repository.buscar_por_termo(termo, limit)
+        # Buscar cidades via repository (índice de nomes em memória)
+        cidades = self.repository.autocompletar(termo, limit, uf)
         
         # Preparar resposta
         cidades_lista = []
         for cidade in cidades:
             cidades_lista.append({
+                **cidade,
+                "nome_completo": f"{cidade['nome']}, {cidade['uf']}"
+            })
+        
+        return {
+            "cidades": cidades_lista,
+            "total": len(cidades_lista),
+            "termo_busca": termo,
+            "limit": limit
+        }
+    
+    def buscar_cidades_proximas(self, latitude: float, longitude: float, k: int = 10,
+                                raio_km: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Buscar as k cidades mais próximas de uma coordenada
+        
+        Args:
+            latitude: Latitude do ponto de referência
+            longitude: Longitude do ponto de referência
+            k: Número máximo de cidades
+            raio_km: Distância máxima (opcional)
+            
+        Returns:
+            Dict com as cidades ordenadas por distância
+        """
+        resultados = self.repository.buscar_k_mais_proximas(latitude, longitude, k, raio_km)
+        
+        cidades_lista = [
+            {
                 "id": cidade.id,
                 "nome": cidade.nome,
                 "uf": cidade.uf,
                 "latitude": cidade.latitude,
                 "longitude": cidade.longitude,
                 "nome_completo": f"{cidade.nome}, {cidade.uf}",
-                "ibge_id": cidade.ibge_id
-            })
+                "ibge_id": cidade.ibge_id,
+                "distancia_km": round(distancia, 3)
+            }
+            for distancia, cidade in resultados
+        ]
         
         return {
             "cidades": cidades_lista,
             "total": len(cidades_lista),
-            "termo_busca": termo,
-            "limit": limit
-        }
\ No newline at end of file
+            "latitude": latitude,
+            "longitude": longitude,
+            "k": k,
+            "raio_km": raio_km
+        }
+    
+    @staticmethod
+    def dados_viagem(cidade_origem: Cidade, cidade_destino: Cidade) -> Dict[str, str]:
+        """
+        Distância e tempo de viagem estimados localmente, nos campos de RotaTuristica
+        
+        Returns:
+            Dict com distancia_aproximada e tempo_viagem_estimado
+        """
+        distancia, tempo = estimar_viagem(
+            cidade_origem.latitude, cidade_origem.longitude,
+            cidade_destino.latitude, cidade_destino.longitude
+        )
+        return {
+            "distancia_aproximada": formatar_distancia(distancia),
+            "tempo_viagem_estimado": formatar_tempo_viagem(tempo)
+        }
+    
+    def estimar_distancias(self, origem_ibge_id: int, destinos_ibge_ids: List[int]) -> Optional[Dict[str, Any]]:
+        """
+        Distância em linha reta, distância rodoviária e tempo estimados de uma
+        cidade para várias outras, calculados de uma vez (vetorizado)
+        
+        Args:
+            origem_ibge_id: ID IBGE da cidade de origem
+            destinos_ibge_ids: IDs IBGE das cidades de destino
+            
+        Returns:
+            Dict com as estimativas por destino ou None se a origem não existir
+        """
+        origem = self.repository.get_by_ibge_id(origem_ibge_id)
+        if not origem:
+            return None
+        
+        destinos = self.repository.get_by_ibge_ids(destinos_ibge_ids)
+        rodoviarias, tempos = estimar_viagens_lote(
+            origem.latitude, origem.longitude,
+            [cidade.latitude for cidade in destinos],
+            [cidade.longitude for cidade in destinos]
+        )
+        fator = settings.DISTANCIA_FATOR_RODOVIARIO
+        
+        return {
+            "origem": {"nome": origem.nome, "uf": origem.uf, "ibge_id": origem.ibge_id},
+            "destinos": [
+                {
+                    "nome": cidade.nome,
+                    "uf": cidade.uf,
+                    "ibge_id": cidade.ibge_id,
+                    "distancia_linha_reta_km": round(float(rodoviaria) / fator, 1),
+                    "distancia_rodoviaria_km": round(float(rodoviaria), 1),
+                    "tempo_viagem_horas": round(float(tempo), 2)
+                }
+                for cidade, rodoviaria, tempo in zip(destinos, rodoviarias, tempos)
+            ],
+            "nao_encontrados": sorted(set(destinos_ibge_ids) - {cidade.ibge_id for cidade in destinos}),
+            "fator_rodoviario": fator,
+            "velocidade_media_kmh": settings.VELOCIDADE_MEDIA_KMH
+        }
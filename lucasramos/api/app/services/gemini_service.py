@@ -1,31 +1,152 @@
-import google.generativeai as genai
-import json
+import asyncio
 import hashlib
-from typing import Optional, Dict, Any
-from datetime import datetime, timedelta
+import re
+import time
+from contextvars import ContextVar
+from typing import Optional, Dict, Any, AsyncIterator, Awaitable, Callable, List, Tuple
+from datetime import datetime, timedelta, timezone
 from app.core.config import settings
+from app.core.cache import CacheLRU, RespostaSerializada
+from app.core.database import SessionLocal
+from app.core.json_incremental import ParserRotaIncremental
+from app.core.json_llm import ExtratorJSON, JSONInvalidoError, RESULTADO_OK, RESULTADO_RECUPERADO
+from app.core.rate_limit import LimitadorTokens, LimiteExcedidoError, estimar_tokens
+from app.core.resiliencia import CircuitBreaker, MonitorLatencia, ServicoIndisponivelError
+from app.repositories.rota_cache_repository import RotaCacheRepository
+from app.services.ibge_service import IBGEService
+from app.services.llm_backend import LLMBackend, criar_backend
+from app.services.ponto_turistico_service import PontoTuristicoService
 from app.schemas.turismo import RotaTuristica, PontoTuristico, CoordenadaGPS
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Campos da rota enviados antes dos pontos turísticos no streaming
+CAMPOS_METADATA_ROTA = (
+    "cidade_origem",
+    "cidade_destino",
+    "distancia_aproximada",
+    "tempo_viagem_estimado",
+)
 
-class GeminiService:
-    """Service para integração com Google Gemini AI com sistema de cache"""
+# Estrutura de ponto turístico pedida nos prompts de rota composta
+FORMATO_PONTO_JSON = """{{
+                "nome": "Nome do Ponto Turístico",
+                "descricao": "Descrição curta do local",
+                "coordenadas": {{"latitude": -23.5505, "longitude": -46.6333}},
+                "tempo_visita_estimado": "2 horas",
+                "categoria": "histórico|natural|cultural|religioso|gastronômico",
+                "endereco": "Endereço aproximado",
+                "horario_funcionamento": "Seg-Dom 9h às 17h",
+                "valor_entrada": "Gratuito ou R$ XX",
+                "dicas_importantes": "Dica útil"
+                }}"""
 
-    # Cache estático para compartilhar entre instâncias
-    _cache: Dict[str, Dict[str, Any]] = {}
-    _cache_ttl = timedelta(hours=24)  # Cache expira em 24 horas
+# Ligado dentro das tarefas de revalidação em segundo plano (e herdado pelas
+# tarefas que elas criam): a cota cobrada é só a global, não a de quem pediu
+_revalidacao_em_curso: ContextVar[bool] = ContextVar("revalidacao_em_curso", default=False)
+
+# Origem de uma rota consultada (metadata "fonte" das respostas)
+ROTA_DO_CACHE = "cache"  # Rota inteira em cache (memória, PostgreSQL ou sentido inverso)
+ROTA_DO_BANCO = "banco"  # Composta sem chamar o Gemini (partes do catálogo de pontos ou em cache)
+ROTA_DO_GEMINI = "gemini"  # Gerada (ao menos em parte) pelo Gemini
+
+# Palavras ignoradas ao canonizar preferências para a chave do cache
+PALAVRAS_IGNORADAS_PREFERENCIAS = {"a", "as", "o", "os", "e", "de", "da", "das", "do", "dos", "com", "em", "para", "por"}
 
-    def __init__(self):
-        """Inicializar serviço Gemini"""
-        if not settings.GEMINI_API_KEY:
-            raise ValueError(
-                "GEMINI_API_KEY não configurada. Configure no arquivo .env"
-            )
 
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel("gemini-2.5-flash")
+class GeminiService:
+    """
+    Service para integração com Google Gemini AI com sistema de cache
+
+    O cache tem duas camadas: um LRU limitado em memória (L1, por processo) e a
+    tabela rotas_cache no PostgreSQL (L2, compartilhada entre workers e deploys).
+    """
+
+    # Stale-while-revalidate: após o TTL "soft" a rota ainda é servida e
+    # revalidada em segundo plano; só após o TTL "hard" a requisição espera o Gemini
+    _cache_ttl = timedelta(hours=settings.ROUTE_CACHE_SOFT_TTL_HORAS)
+    _cache_ttl_maximo = max(_cache_ttl, timedelta(hours=settings.ROUTE_CACHE_HARD_TTL_HORAS))
+
+    # Cache estático para compartilhar entre instâncias (L1)
+    _cache: CacheLRU[RotaTuristica] = CacheLRU(
+        ttl_segundos=_cache_ttl_maximo.total_seconds(),
+        max_entradas=settings.ROUTE_CACHE_MAX_ENTRADAS,
+        max_bytes=settings.ROUTE_CACHE_MAX_BYTES,
+        tamanho_fn=lambda rota: len(rota.model_dump_json().encode()),
+    )
+
+    # Respostas HTTP de rotas já serializadas, por chave de cache (caminho quente)
+    _cache_respostas: CacheLRU[RespostaSerializada] = CacheLRU(
+        ttl_segundos=settings.ROUTE_CACHE_RESPOSTA_TTL_SEGUNDOS,
+        max_entradas=settings.ROUTE_CACHE_MAX_ENTRADAS,
+        max_bytes=settings.ROUTE_CACHE_MAX_BYTES // 2,
+        tamanho_fn=lambda resposta: resposta.tamanho,
+    )
+
+    # Limite global de chamadas simultâneas ao Gemini (compartilhado entre instâncias)
+    _semaforo: Optional[asyncio.Semaphore] = None
+
+    # Circuit breaker e latências recentes das chamadas ao backend (por processo)
+    _circuit_breaker = CircuitBreaker(
+        nome="Gemini",
+        limite_falhas=settings.GEMINI_CB_LIMITE_FALHAS,
+        tempo_aberto_segundos=settings.GEMINI_CB_TEMPO_ABERTO_SEGUNDOS,
+    )
+    _latencias = MonitorLatencia()
+
+    # Extração tolerante do JSON das respostas (com métricas de reparo)
+    _extrator_json = ExtratorJSON()
+
+    # Cota de tokens do modelo, global e por usuário (cache hits não são cobrados)
+    _limitador = LimitadorTokens(
+        tokens_por_minuto_global=settings.LLM_TOKENS_POR_MINUTO_GLOBAL,
+        tokens_por_minuto_usuario=settings.LLM_TOKENS_POR_MINUTO_USUARIO,
+    )
+    _estatisticas_hedge: Dict[str, int] = {
+        "hedges_disparados": 0,
+        "hedges_vencedores": 0,
+        "hedges_sem_cota": 0,
+    }
+
+    # Single-flight: gerações em andamento por chave de cache
+    _em_andamento: Dict[str, Dict[str, Any]] = {}
+    _estatisticas_single_flight: Dict[str, int] = {
+        "chamadas_gemini": 0,
+        "chamadas_coalescidas": 0,
+    }
+
+    # Rotas servidas invertendo uma rota B→A já em cache
+    _hits_rota_reversa = 0
+
+    # Hits do cache persistente ainda não gravados (somados em lote pela manutenção)
+    _hits_persistente_pendentes: Dict[str, int] = {}
+
+    # Revalidações em segundo plano de rotas servidas após o TTL soft
+    _revalidacoes: Dict[str, "asyncio.Future[RotaTuristica]"] = {}
+    _estatisticas_revalidacao: Dict[str, int] = {
+        "respostas_expiradas": 0,
+        "revalidacoes": 0,
+        "falhas": 0,
+    }
+
+    def __init__(self, backend: Optional[LLMBackend] = None, usuario: Optional[str] = None):
+        """
+        Inicializar serviço Gemini
+
+        Args:
+            backend: Backend de geração; padrão é o configurado em LLM_BACKEND
+                (Gemini ou o backend local para benchmarks)
+            usuario: Identificador de quem consome a cota de tokens (usuário
+                autenticado ou IP); gerações coalescidas são cobradas de quem as iniciou
+                e revalidações em segundo plano, só do bucket global
+        """
+        self.backend = backend or criar_backend()
+        self.usuario = usuario
+
+        # Origem da última rota consultada por esta instância (ROTA_DO_*)
+        self.fonte: Optional[str] = None
+        self._chamadas_backend = 0
 
     def _gerar_cache_key(
         self,
@@ -34,79 +155,348 @@ class GeminiService:
         uf_origem: Optional[str] = None,
         uf_destino: Optional[str] = None,
         preferencias: Optional[str] = None,
+        ibge_id_origem: Optional[int] = None,
+        ibge_id_destino: Optional[int] = None,
     ) -> str:
-        """Gerar chave única para cache baseada nos parâmetros da consulta"""
-        # Normalizar dados para cache
-        origem = f"{cidade_origem.lower().strip()}"
-        if uf_origem:
-            origem += f"-{uf_origem.upper().strip()}"
-
-        destino = f"{cidade_destino.lower().strip()}"
-        if uf_destino:
-            destino += f"-{uf_destino.upper().strip()}"
+        """
+        Gerar chave única para cache baseada nos parâmetros da consulta
 
-        prefs = preferencias.lower().strip() if preferencias else ""
+        A chave é canônica: cidades resolvidas no banco usam o ID do IBGE,
+        nomes são comparados sem acentos e as preferências são tokenizadas e
+        ordenadas, de modo que variações equivalentes compartilham a entrada.
+        """
+        origem = self._canonizar_cidade(cidade_origem, uf_origem, ibge_id_origem)
+        destino = self._canonizar_cidade(cidade_destino, uf_destino, ibge_id_destino)
+        prefs = self._canonizar_preferencias(preferencias)
 
         # Criar string única e gerar hash
-        cache_string = f"{origem}|{destino}|{prefs}"
+        cache_string = f"v2|{origem}|{destino}|{prefs}"
         return hashlib.md5(cache_string.encode()).hexdigest()
 
+    @staticmethod
+    def _canonizar_cidade(
+        nome: str, uf: Optional[str] = None, ibge_id: Optional[int] = None
+    ) -> str:
+        """Forma canônica de uma cidade para a chave do cache"""
+        if ibge_id:
+            return f"ibge:{ibge_id}"
+
+        cidade = IBGEService.normalizar_nome(nome)
+        if uf:
+            cidade += f"-{uf.upper().strip()}"
+        return cidade
+
+    @staticmethod
+    def _canonizar_preferencias(preferencias: Optional[str]) -> str:
+        """Forma canônica das preferências: sem acentos, pontuação, ordem ou repetição"""
+        if not preferencias:
+            return ""
+
+        tokens = re.findall(r"\w+", IBGEService.normalizar_nome(preferencias))
+        return " ".join(sorted(set(tokens) - PALAVRAS_IGNORADAS_PREFERENCIAS))
+
+    def _gerar_cache_keys(
+        self,
+        cidade_origem: str,
+        cidade_destino: str,
+        uf_origem: Optional[str] = None,
+        uf_destino: Optional[str] = None,
+        preferencias: Optional[str] = None,
+        ibge_id_origem: Optional[int] = None,
+        ibge_id_destino: Optional[int] = None,
+    ) -> Tuple[str, str]:
+        """Gerar chaves do cache para o sentido pedido e para o sentido inverso"""
+        cache_key = self._gerar_cache_key(
+            cidade_origem, cidade_destino, uf_origem, uf_destino,
+            preferencias, ibge_id_origem, ibge_id_destino,
+        )
+        chave_reversa = self._gerar_cache_key(
+            cidade_destino, cidade_origem, uf_destino, uf_origem,
+            preferencias, ibge_id_destino, ibge_id_origem,
+        )
+        return cache_key, chave_reversa
+
+    def gerar_chave_resposta(
+        self,
+        cidade_origem: str,
+        cidade_destino: str,
+        uf_origem: Optional[str] = None,
+        uf_destino: Optional[str] = None,
+        preferencias: Optional[str] = None,
+        ibge_id_origem: Optional[int] = None,
+        ibge_id_destino: Optional[int] = None,
+    ) -> str:
+        """Chave da resposta serializada de uma rota (a mesma da rota em cache)"""
+        return self._gerar_cache_key(
+            cidade_origem, cidade_destino, uf_origem, uf_destino,
+            preferencias, ibge_id_origem, ibge_id_destino,
+        )
+
+    @classmethod
+    def obter_resposta_serializada(cls, chave: str) -> Optional[RespostaSerializada]:
+        """Buscar resposta HTTP já serializada da rota"""
+        return cls._cache_respostas.obter(chave)
+
+    @classmethod
+    def salvar_resposta_serializada(cls, chave: str, corpo: bytes) -> RespostaSerializada:
+        """Guardar corpo final da resposta (e a versão gzip, se habilitada)"""
+        resposta = RespostaSerializada(corpo, comprimir=settings.ROUTE_CACHE_GZIP)
+        cls._cache_respostas.definir(chave, resposta)
+        return resposta
+
     def _limpar_cache_expirado(self):
         """Limpar entradas expiradas do cache"""
-        agora = datetime.now()
-        keys_expiradas = []
-
-        for key, dados in self._cache.items():
-            if agora - dados["timestamp"] > self._cache_ttl:
-                keys_expiradas.append(key)
-
-        for key in keys_expiradas:
-            del self._cache[key]
-            logger.info(f"Cache expirado removido: {key}")
-
-    def _salvar_no_cache(self, cache_key: str, rota: RotaTuristica):
-        """Salvar resultado no cache"""
-        self._cache[cache_key] = {"rota": rota, "timestamp": datetime.now()}
-        logger.info(f"Resultado salvo no cache: {cache_key}")
-
-    def _buscar_no_cache(self, cache_key: str) -> Optional[RotaTuristica]:
-        """Buscar resultado no cache"""
-        if cache_key in self._cache:
-            dados = self._cache[cache_key]
-
-            # Verificar se não expirou
-            if datetime.now() - dados["timestamp"] <= self._cache_ttl:
-                logger.info(f"Cache hit: {cache_key}")
-                return dados["rota"]
-            else:
-                # Remover entrada expirada
-                del self._cache[cache_key]
-                logger.info(f"Cache expirado removido: {cache_key}")
-
-        return None
+        removidas = self._cache.remover_expirados()
+        if removidas:
+            logger.info(f"Cache expirado removido: {removidas} entrada(s)")
+
+    def _salvar_no_cache(
+        self, cache_key: str, rota: RotaTuristica, timestamp: Optional[datetime] = None
+    ):
+        """Salvar resultado no cache (descartando a resposta serializada anterior)"""
+        self._cache_respostas.remover(cache_key)
+        criado_em = timestamp.timestamp() if timestamp else None
+        if self._cache.definir(cache_key, rota, criado_em=criado_em):
+            logger.info(f"Resultado salvo no cache: {cache_key}")
+        else:
+            logger.warning(f"Rota excede o orçamento de memória do cache: {cache_key}")
+
+    def _buscar_no_cache(self, cache_key: str) -> Optional[Tuple[RotaTuristica, datetime]]:
+        """Buscar resultado no cache, com o momento em que foi gerado"""
+        entrada = self._cache.obter_entrada(cache_key)
+        if not entrada:
+            return None
+
+        logger.info(f"Cache hit: {cache_key}")
+        return entrada.valor, datetime.fromtimestamp(entrada.criado_em, timezone.utc)
+
+    def _buscar_no_cache_persistente(self, cache_key: str) -> Optional[Tuple[RotaTuristica, datetime]]:
+        """Buscar resultado no cache do PostgreSQL e promovê-lo para o cache em memória"""
+        if not settings.ROUTE_CACHE_PERSISTENTE:
+            return None
+
+        try:
+            with SessionLocal() as db:
+                resultado = RotaCacheRepository(db).buscar_valida(cache_key)
+
+            if not resultado:
+                return None
+
+            rota_json, expira_em = resultado
+            rota = RotaTuristica.model_validate_json(rota_json)
+            pendentes = GeminiService._hits_persistente_pendentes
+            pendentes[cache_key] = pendentes.get(cache_key, 0) + 1
+
+            # A entrada em memória herda o tempo de vida restante da persistente
+            gerada_em = expira_em - self._cache_ttl_maximo
+            self._salvar_no_cache(cache_key, rota, timestamp=gerada_em)
+
+            logger.info(f"Cache persistente hit: {cache_key}")
+            return rota, gerada_em
+
+        except Exception as e:
+            logger.warning(f"Cache persistente indisponível (leitura): {e}")
+            return None
+
+    def _salvar_no_cache_persistente(self, cache_key: str, rota: RotaTuristica):
+        """Salvar resultado no cache do PostgreSQL"""
+        if not settings.ROUTE_CACHE_PERSISTENTE:
+            return
+
+        try:
+            with SessionLocal() as db:
+                RotaCacheRepository(db).salvar(
+                    cache_key,
+                    rota.model_dump_json(),
+                    datetime.now(timezone.utc) + self._cache_ttl_maximo,
+                )
+        except Exception as e:
+            logger.warning(f"Cache persistente indisponível (escrita): {e}")
+
+    def _buscar_rota_em_cache(
+        self,
+        cache_key: str,
+        chave_reversa: Optional[str] = None,
+        revalidar: Optional[Callable[[], Awaitable[RotaTuristica]]] = None,
+        aceitar_expirada: bool = True,
+    ) -> Optional[RotaTuristica]:
+        """
+        Buscar rota nas camadas de cache (memória → PostgreSQL)
+
+        Com ROUTE_CACHE_REVERSO habilitado, uma rota B→A em cache atende A→B
+        com a ordem dos pontos invertida. Rotas com mais idade que o TTL soft
+        são servidas mesmo assim e, se `revalidar` for informado, regeneradas em
+        segundo plano; com `aceitar_expirada=False` são tratadas como ausentes.
+        """
+        encontrada = self._buscar_no_cache(cache_key) or self._buscar_no_cache_persistente(cache_key)
+
+        if not encontrada and settings.ROUTE_CACHE_REVERSO and chave_reversa:
+            reversa = self._buscar_no_cache(chave_reversa) or self._buscar_no_cache_persistente(chave_reversa)
+            if reversa:
+                rota_reversa, gerada_em = reversa
+                encontrada = self._inverter_rota(rota_reversa), gerada_em
+                self._salvar_no_cache(cache_key, encontrada[0], timestamp=gerada_em)
+                GeminiService._hits_rota_reversa += 1
+                logger.info(f"🔁 Rota servida a partir do sentido inverso: {chave_reversa[:8]}...")
+
+        if not encontrada:
+            return None
+
+        rota, gerada_em = encontrada
+        if datetime.now(timezone.utc) - gerada_em >= self._cache_ttl:
+            if not aceitar_expirada:
+                return None
+            GeminiService._estatisticas_revalidacao["respostas_expiradas"] += 1
+            if revalidar:
+                self._agendar_revalidacao(cache_key, revalidar)
+        return rota
+
+    @classmethod
+    def _agendar_revalidacao(
+        cls, cache_key: str, gerar: Callable[[], Awaitable[RotaTuristica]]
+    ):
+        """Regerar rota expirada em segundo plano (uma única vez por chave)"""
+        if cache_key in cls._revalidacoes or cache_key in cls._em_andamento:
+            return
+
+        logger.info(f"♻️  Revalidando rota em segundo plano: {cache_key[:8]}...")
+        cls._estatisticas_revalidacao["revalidacoes"] += 1
+        tarefa = asyncio.ensure_future(cls._revalidar(cache_key, gerar))
+        cls._revalidacoes[cache_key] = tarefa
+        tarefa.add_done_callback(lambda t: cls._finalizar_revalidacao(cache_key, t))
+
+    @classmethod
+    async def _revalidar(
+        cls, cache_key: str, gerar: Callable[[], Awaitable[RotaTuristica]]
+    ) -> RotaTuristica:
+        """Geração da revalidação, fora da cota do usuário que encontrou a rota expirada"""
+        # A tarefa tem cópia própria do contexto: a marca não vaza para a requisição
+        _revalidacao_em_curso.set(True)
+        return await cls._executar_single_flight(cache_key, gerar)
+
+    @classmethod
+    def _finalizar_revalidacao(cls, cache_key: str, tarefa: "asyncio.Future[RotaTuristica]"):
+        cls._revalidacoes.pop(cache_key, None)
+        if tarefa.cancelled():
+            return
+        if tarefa.exception():
+            cls._estatisticas_revalidacao["falhas"] += 1
+            logger.warning(f"Falha ao revalidar rota em segundo plano: {tarefa.exception()}")
+
+    @staticmethod
+    def _inverter_rota(rota: RotaTuristica) -> RotaTuristica:
+        """Inverter sentido da rota (origem ↔ destino e ordem dos pontos)"""
+        return rota.model_copy(
+            update={
+                "cidade_origem": rota.cidade_destino,
+                "cidade_destino": rota.cidade_origem,
+                "pontos_turisticos": list(reversed(rota.pontos_turisticos)),
+            }
+        )
+
+    def _catalogar_pontos(self, rota: RotaTuristica):
+        """Gravar pontos gerados em pontos_turisticos para montar partes de rotas futuras do banco"""
+        if not settings.PERSISTIR_PONTOS_GERADOS:
+            return
+
+        try:
+            with SessionLocal() as db:
+                PontoTuristicoService(db).registrar_pontos_gerados(rota)
+        except Exception as e:
+            logger.warning(f"Não foi possível catalogar pontos turísticos: {e}")
 
     @classmethod
     def obter_estatisticas_cache(cls) -> Dict[str, Any]:
         """Obter estatísticas do cache"""
-        total_entradas = len(cls._cache)
-        agora = datetime.now()
-        entradas_validas = sum(
-            1
-            for dados in cls._cache.values()
-            if agora - dados["timestamp"] <= cls._cache_ttl
-        )
+        cls._cache.remover_expirados()
+        memoria = cls._cache.estatisticas()
 
         return {
-            "total_entradas": total_entradas,
-            "entradas_validas": entradas_validas,
-            "entradas_expiradas": total_entradas - entradas_validas,
+            "total_entradas": memoria["entradas"],
+            "entradas_validas": memoria["entradas"],
+            "entradas_expiradas": 0,
             "cache_ttl_horas": cls._cache_ttl.total_seconds() / 3600,
+            "cache_ttl_maximo_horas": cls._cache_ttl_maximo.total_seconds() / 3600,
+            "memoria": memoria,
+            "respostas_serializadas": cls._cache_respostas.estatisticas(),
+            "single_flight": {
+                **cls._estatisticas_single_flight,
+                "geracoes_em_andamento": len(cls._em_andamento),
+            },
+            "hits_rota_reversa": cls._hits_rota_reversa,
+            "revalidacao": {
+                **cls._estatisticas_revalidacao,
+                "revalidacoes_em_andamento": len(cls._revalidacoes),
+            },
+            "persistente": cls._estatisticas_cache_persistente(),
+            "parsing_json": cls._extrator_json.estatisticas(),
+            "circuit_breaker": cls._circuit_breaker.estatisticas(),
+            "rate_limit": {
+                "habilitado": settings.LLM_RATE_LIMIT,
+                **cls._limitador.estatisticas(),
+            },
+            "hedge": {
+                **cls._estatisticas_hedge,
+                "habilitado": settings.GEMINI_HEDGE,
+                "atraso_atual_segundos": cls._atraso_hedge(),
+            },
         }
 
+    @classmethod
+    async def manter_cache_persistente_periodicamente(cls):
+        """Tarefa de fundo: manutenção do cache persistente a cada ROUTE_CACHE_MANUTENCAO_SEGUNDOS"""
+        while True:
+            await cls.manter_cache_persistente()
+            await asyncio.sleep(settings.ROUTE_CACHE_MANUTENCAO_SEGUNDOS)
+
+    @classmethod
+    async def manter_cache_persistente(cls):
+        """
+        Gravar em lote os hits acumulados e remover do PostgreSQL as rotas
+        expiradas (inclusive as partes por cidade e por trecho), fora do event loop
+        """
+        if not settings.ROUTE_CACHE_PERSISTENTE:
+            return
+
+        hits, cls._hits_persistente_pendentes = cls._hits_persistente_pendentes, {}
+        try:
+            removidas = await asyncio.to_thread(cls._executar_manutencao_persistente, hits)
+            if removidas:
+                logger.info(f"🧹 Cache persistente: {removidas} rota(s) expirada(s) removida(s)")
+        except Exception as e:
+            logger.warning(f"Cache persistente indisponível (manutenção): {e}")
+
+    @staticmethod
+    def _executar_manutencao_persistente(hits: Dict[str, int]) -> int:
+        """Gravar hits e remover expiradas (síncrono); retorna o número de entradas removidas"""
+        with SessionLocal() as db:
+            repository = RotaCacheRepository(db)
+            repository.registrar_hits(hits)
+            return repository.remover_expiradas()
+
+    @staticmethod
+    def _estatisticas_cache_persistente() -> Optional[Dict[str, Any]]:
+        """Obter estatísticas do cache persistente (None se desabilitado/indisponível)"""
+        if not settings.ROUTE_CACHE_PERSISTENTE:
+            return None
+
+        try:
+            with SessionLocal() as db:
+                return RotaCacheRepository(db).estatisticas()
+        except Exception as e:
+            logger.warning(f"Cache persistente indisponível (estatísticas): {e}")
+            return None
+
     @classmethod
     def limpar_cache(cls):
-        """Limpar todo o cache"""
-        cls._cache.clear()
+        """Limpar todo o cache (memória e PostgreSQL)"""
+        cls._cache.limpar()
+        cls._cache_respostas.limpar()
+
+        if settings.ROUTE_CACHE_PERSISTENTE:
+            with SessionLocal() as db:
+                RotaCacheRepository(db).limpar()
+
         logger.info("Cache completamente limpo")
 
     def _criar_prompt_turismo(
@@ -160,8 +550,6 @@ class GeminiService:
             {{
             "cidade_origem": "{origem}",
             "cidade_destino": "{destino}",
-            "distancia_aproximada": "XXX km",
-            "tempo_viagem_estimado": "X horas de carro",
             "pontos_turisticos": [
                 {{
                 "nome": "Nome do Ponto Turístico",
@@ -191,6 +579,59 @@ class GeminiService:
             """
         return prompt
 
+    def _criar_prompt_pontos_cidade(
+        self, cidade: str, uf: Optional[str] = None, preferencias: Optional[str] = None
+    ) -> str:
+        """Criar prompt para os pontos turísticos de uma única cidade (rota composta)"""
+        local = f"{cidade}, {uf}" if uf else cidade
+        preferencias_texto = f"\nPreferências do usuário: {preferencias}" if preferencias else ""
+
+        return f"""
+            Você é um especialista em turismo brasileiro. Liste de 4 a 6 atrações turísticas reais da cidade {local}.
+            {preferencias_texto}
+            Responda EXCLUSIVAMENTE com um JSON válido, com coordenadas GPS reais compatíveis com o OpenStreetMap,
+            sem hospedagem, restaurantes ou rodovias:
+
+            {{
+            "cidade_origem": "{local}",
+            "cidade_destino": "{local}",
+            "pontos_turisticos": [
+                {FORMATO_PONTO_JSON.format()}
+            ]
+            }}
+            """
+
+    def _criar_prompt_trecho(
+        self,
+        cidade_origem: str,
+        cidade_destino: str,
+        uf_origem: Optional[str] = None,
+        uf_destino: Optional[str] = None,
+        preferencias: Optional[str] = None,
+    ) -> str:
+        """Criar prompt apenas para o trecho entre as cidades (rota composta)"""
+        origem = f"{cidade_origem}, {uf_origem}" if uf_origem else cidade_origem
+        destino = f"{cidade_destino}, {uf_destino}" if uf_destino else cidade_destino
+        preferencias_texto = f"\nPreferências do usuário: {preferencias}" if preferencias else ""
+
+        return f"""
+            Você é um especialista em turismo brasileiro. Considere a viagem de carro de {origem} até {destino}.
+            {preferencias_texto}
+            Liste de 2 a 5 atrações turísticas reais localizadas AO LONGO DO CAMINHO, em cidades intermediárias.
+            NÃO inclua atrações de {origem} nem de {destino}. Se não houver atrações relevantes, retorne a lista vazia.
+            Responda EXCLUSIVAMENTE com um JSON válido, com coordenadas GPS reais compatíveis com o OpenStreetMap:
+
+            {{
+            "cidade_origem": "{origem}",
+            "cidade_destino": "{destino}",
+            "pontos_turisticos": [
+                {FORMATO_PONTO_JSON.format()}
+            ],
+            "recomendacoes_gerais": "Recomendações para o trajeto (segurança, clima, estrada, paradas)",
+            "melhor_epoca_visita": "Melhor época para a viagem"
+            }}
+            """
+
     async def consultar_rota_turistica(
         self,
         cidade_origem: str,
@@ -198,6 +639,8 @@ class GeminiService:
         uf_origem: Optional[str] = None,
         uf_destino: Optional[str] = None,
         preferencias: Optional[str] = None,
+        ibge_id_origem: Optional[int] = None,
+        ibge_id_destino: Optional[int] = None,
     ) -> RotaTuristica:
         """
         Consultar Gemini para obter rota turística (com cache)
@@ -208,6 +651,8 @@ class GeminiService:
             uf_origem: UF da cidade origem (opcional)
             uf_destino: UF da cidade destino (opcional)
             preferencias: Preferências de turismo (opcional)
+            ibge_id_origem: ID IBGE da cidade origem, se resolvida no banco (opcional)
+            ibge_id_destino: ID IBGE da cidade destino, se resolvida no banco (opcional)
 
         Returns:
             RotaTuristica: Dados estruturados da rota turística
@@ -222,28 +667,87 @@ class GeminiService:
             )
 
             # Gerar chave do cache
-            cache_key = self._gerar_cache_key(
+            cache_key, chave_reversa = self._gerar_cache_keys(
                 cidade_origem=cidade_origem,
                 cidade_destino=cidade_destino,
                 uf_origem=uf_origem,
                 uf_destino=uf_destino,
                 preferencias=preferencias,
+                ibge_id_origem=ibge_id_origem,
+                ibge_id_destino=ibge_id_destino,
             )
 
             # Limpar cache expirado
             self._limpar_cache_expirado()
 
-            # Tentar buscar no cache primeiro
-            rota_cache = self._buscar_no_cache(cache_key)
+            gerar = self._gerador_rota(
+                cache_key=cache_key,
+                cidade_origem=cidade_origem,
+                cidade_destino=cidade_destino,
+                uf_origem=uf_origem,
+                uf_destino=uf_destino,
+                preferencias=preferencias,
+                ibge_id_origem=ibge_id_origem,
+                ibge_id_destino=ibge_id_destino,
+            )
+
+            # Tentar buscar no cache primeiro (memória, PostgreSQL e sentido inverso)
+            rota_cache = self._buscar_rota_em_cache(
+                cache_key, chave_reversa, revalidar=lambda: gerar(revalidacao=True)
+            )
             if rota_cache:
                 logger.info(f"🚀 Resposta do cache (instantânea): {cache_key[:8]}...")
+                self.fonte = ROTA_DO_CACHE
                 return rota_cache
 
-            # Se não encontrou no cache, consultar Gemini
-            logger.info(f"🤖 Consultando Gemini (primeira vez): {cache_key[:8]}...")
+            # Se não encontrou no cache, gerar a rota (coalescendo duplicatas); na
+            # rota composta, só as partes sem cache nem cobertura no banco vão ao Gemini
+            coalescida = cache_key in self._em_andamento
+            chamadas_antes = self._chamadas_backend
+            rota = await self._executar_single_flight(cache_key, gerar)
+            self.fonte = (
+                ROTA_DO_GEMINI if coalescida or self._chamadas_backend > chamadas_antes else ROTA_DO_BANCO
+            )
+            return rota
+
+        except (ServicoIndisponivelError, LimiteExcedidoError):
+            raise
+        except Exception as e:
+            logger.error(f"Erro ao consultar rota turística: {e}")
+            raise Exception(f"Erro na consulta ao Gemini: {str(e)}")
 
-            # Criar prompt estruturado
-            prompt = self._criar_prompt_turismo(
+    def _gerador_rota(
+        self,
+        cache_key: str,
+        cidade_origem: str,
+        cidade_destino: str,
+        uf_origem: Optional[str] = None,
+        uf_destino: Optional[str] = None,
+        preferencias: Optional[str] = None,
+        ibge_id_origem: Optional[int] = None,
+        ibge_id_destino: Optional[int] = None,
+    ) -> Callable[..., Awaitable[RotaTuristica]]:
+        """
+        Função que gera a rota do par (composta ou com prompt completo) e a salva no cache
+
+        Chamada com `revalidacao=True`, a rota composta regenera as partes expiradas
+        em vez de reaproveitá-las.
+        """
+        if settings.ROTA_COMPOSTA:
+            gerar = lambda revalidacao=False: self._compor_rota(
+                cache_key=cache_key,
+                cidade_origem=cidade_origem,
+                cidade_destino=cidade_destino,
+                uf_origem=uf_origem,
+                uf_destino=uf_destino,
+                preferencias=preferencias,
+                ibge_id_origem=ibge_id_origem,
+                ibge_id_destino=ibge_id_destino,
+                revalidacao=revalidacao,
+            )
+        else:
+            gerar = lambda revalidacao=False: self._gerar_rota(
+                cache_key=cache_key,
                 cidade_origem=cidade_origem,
                 cidade_destino=cidade_destino,
                 uf_origem=uf_origem,
@@ -251,68 +755,659 @@ class GeminiService:
                 preferencias=preferencias,
             )
 
-            # Consultar Gemini
-            response = await self._consultar_gemini_async(prompt)
+        return gerar
 
-            # Parsing do JSON
-            rota_data = self._parse_response_json(response)
+    async def consultar_rota_turistica_stream(
+        self,
+        cidade_origem: str,
+        cidade_destino: str,
+        uf_origem: Optional[str] = None,
+        uf_destino: Optional[str] = None,
+        preferencias: Optional[str] = None,
+        ibge_id_origem: Optional[int] = None,
+        ibge_id_destino: Optional[int] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Consultar rota turística emitindo eventos à medida que o Gemini gera a resposta
 
-            # Validar e criar objeto Pydantic
-            rota = self._criar_rota_turistica(rota_data)
+        Eventos emitidos, em ordem:
+        - {"tipo": "metadata", ...}: origem e destino (distância e tempo de viagem
+          são estimados localmente pelo TurismoService, não pedidos ao Gemini)
+        - {"tipo": "ponto", ...}: cada ponto turístico assim que o objeto é fechado
+        - {"tipo": "fim", ...}: recomendações gerais e melhor época de visita
 
-            # Salvar no cache
-            self._salvar_no_cache(cache_key, rota)
+        Em cache hit, os mesmos eventos são emitidos imediatamente.
+        """
+        cache_key, chave_reversa = self._gerar_cache_keys(
+            cidade_origem=cidade_origem,
+            cidade_destino=cidade_destino,
+            uf_origem=uf_origem,
+            uf_destino=uf_destino,
+            preferencias=preferencias,
+            ibge_id_origem=ibge_id_origem,
+            ibge_id_destino=ibge_id_destino,
+        )
 
-            logger.info(
-                f"Rota turística criada com {len(rota.pontos_turisticos)} pontos"
+        self._limpar_cache_expirado()
+
+        gerar = self._gerador_rota(
+            cache_key=cache_key,
+            cidade_origem=cidade_origem,
+            cidade_destino=cidade_destino,
+            uf_origem=uf_origem,
+            uf_destino=uf_destino,
+            preferencias=preferencias,
+            ibge_id_origem=ibge_id_origem,
+            ibge_id_destino=ibge_id_destino,
+        )
+
+        rota_cache = self._buscar_rota_em_cache(
+            cache_key, chave_reversa, revalidar=lambda: gerar(revalidacao=True)
+        )
+        if rota_cache:
+            logger.info(f"🚀 Streaming a partir do cache: {cache_key[:8]}...")
+            self.fonte = ROTA_DO_CACHE
+            for evento in self.eventos_rota(rota_cache, cache=True):
+                yield evento
+            return
+
+        # Geração da mesma chave em andamento (stream ou não): aguardar o resultado
+        if cache_key in self._em_andamento:
+            self.fonte = ROTA_DO_GEMINI
+            rota = await self._executar_single_flight(cache_key, gerar)
+            for evento in self.eventos_rota(rota, cache=False):
+                yield evento
+            return
+
+        # Pontos das duas cidades em cache ou no catálogo: só o trecho (curto) pode
+        # precisar do Gemini, então a rota é composta em vez de gerada em streaming
+        if settings.ROTA_COMPOSTA and all(await asyncio.gather(
+            self._pontos_cidade_sem_ia(cidade_origem, uf_origem, ibge_id_origem, preferencias),
+            self._pontos_cidade_sem_ia(cidade_destino, uf_destino, ibge_id_destino, preferencias),
+        )):
+            chamadas_antes = self._chamadas_backend
+            rota = await self._executar_single_flight(cache_key, gerar)
+            self.fonte = ROTA_DO_GEMINI if self._chamadas_backend > chamadas_antes else ROTA_DO_BANCO
+            for evento in self.eventos_rota(rota, cache=False):
+                yield evento
+            return
+
+        logger.info(f"🤖 Consultando Gemini em streaming: {cache_key[:8]}...")
+        self.fonte = ROTA_DO_GEMINI
+
+        # Registrar a geração para que requisições concorrentes da mesma chave a
+        # aguardem; o stream conta como interessado, então elas não a cancelam
+        futuro = asyncio.get_running_loop().create_future()
+        voo = {"tarefa": futuro, "aguardando": 1}
+        GeminiService._em_andamento[cache_key] = voo
+        GeminiService._estatisticas_single_flight["chamadas_gemini"] += 1
+        futuro.add_done_callback(lambda _: GeminiService._em_andamento.pop(cache_key, None))
+        # Sem ninguém aguardando, a exceção é lida aqui (evita o aviso do asyncio)
+        futuro.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+        try:
+            prompt = self._criar_prompt_turismo(
+                cidade_origem=cidade_origem,
+                cidade_destino=cidade_destino,
+                uf_origem=uf_origem,
+                uf_destino=uf_destino,
+                preferencias=preferencias,
             )
+
+            parser = ParserRotaIncremental()
+            pontos_emitidos = set()
+
+            async for texto in self._consultar_gemini_stream(prompt):
+                for tipo, dados in parser.alimentar(texto):
+                    if tipo == "metadata":
+                        yield self._evento_metadata(dados, cache=False)
+                    else:
+                        ponto = self._criar_ponto_turistico(dados)
+                        if ponto:
+                            pontos_emitidos.add(IBGEService.normalizar_nome(ponto.nome))
+                            yield {"tipo": "ponto", "dados": ponto.model_dump()}
+
+            # Resposta completa: validar, salvar no cache e liberar quem aguarda
+            rota = self._criar_rota_turistica(self._parse_response_json(parser.buffer))
+            self._salvar_no_cache(cache_key, rota)
+            self._salvar_no_cache_persistente(cache_key, rota)
+            self._catalogar_pontos(rota)
+            futuro.set_result(rota)
+
+            # Metadados e pontos que o parser incremental não reconheceu, mas o
+            # parse completo recuperou (o cliente recebe a mesma rota do cache)
+            if not parser.metadados_emitidos:
+                yield self._evento_metadata(rota.model_dump(), cache=False)
+            for ponto in rota.pontos_turisticos:
+                if IBGEService.normalizar_nome(ponto.nome) not in pontos_emitidos:
+                    yield {"tipo": "ponto", "dados": ponto.model_dump()}
+
+            yield self._evento_fim(rota)
+
+        except BaseException as e:
+            # Falha ou cliente desconectado antes do fim: quem aguardava recebe o erro
+            if not futuro.done():
+                futuro.set_exception(
+                    e if isinstance(e, Exception) else Exception("Geração em streaming interrompida")
+                )
+            raise
+        finally:
+            voo["aguardando"] -= 1
+
+    @classmethod
+    def eventos_rota(cls, rota: RotaTuristica, cache: bool) -> List[Dict[str, Any]]:
+        """Eventos de streaming de uma rota já completa"""
+        eventos = [cls._evento_metadata(rota.model_dump(), cache=cache)]
+        eventos.extend({"tipo": "ponto", "dados": ponto.model_dump()} for ponto in rota.pontos_turisticos)
+        eventos.append(cls._evento_fim(rota))
+        return eventos
+
+    @staticmethod
+    def _evento_metadata(dados: Dict[str, Any], cache: bool) -> Dict[str, Any]:
+        """Montar evento de metadados da rota"""
+        return {
+            "tipo": "metadata",
+            "dados": {campo: dados.get(campo) for campo in CAMPOS_METADATA_ROTA},
+            "cache": cache,
+        }
+
+    @staticmethod
+    def _evento_fim(rota: RotaTuristica) -> Dict[str, Any]:
+        """Montar evento de encerramento da rota"""
+        return {
+            "tipo": "fim",
+            "dados": {
+                "recomendacoes_gerais": rota.recomendacoes_gerais,
+                "melhor_epoca_visita": rota.melhor_epoca_visita,
+                "total_pontos_turisticos": len(rota.pontos_turisticos),
+            },
+        }
+
+    async def _gerar_rota(
+        self,
+        cache_key: str,
+        cidade_origem: str,
+        cidade_destino: str,
+        uf_origem: Optional[str] = None,
+        uf_destino: Optional[str] = None,
+        preferencias: Optional[str] = None,
+    ) -> RotaTuristica:
+        """Gerar rota consultando o Gemini e salvar no cache"""
+        logger.info(f"🤖 Consultando Gemini (primeira vez): {cache_key[:8]}...")
+
+        # Criar prompt estruturado
+        prompt = self._criar_prompt_turismo(
+            cidade_origem=cidade_origem,
+            cidade_destino=cidade_destino,
+            uf_origem=uf_origem,
+            uf_destino=uf_destino,
+            preferencias=preferencias,
+        )
+
+        rota = await self._gerar_e_cachear(cache_key, prompt)
+
+        logger.info(
+            f"Rota turística criada com {len(rota.pontos_turisticos)} pontos"
+        )
+        return rota
+
+    async def _gerar_e_cachear(self, cache_key: str, prompt: str) -> RotaTuristica:
+        """Consultar o Gemini com o prompt, salvar o resultado no cache e catalogar os pontos"""
+        # Consultar Gemini
+        response = await self._consultar_gemini_async(prompt)
+
+        # Parsing do JSON
+        rota_data = self._parse_response_json(response)
+
+        # Validar e criar objeto Pydantic
+        rota = self._criar_rota_turistica(rota_data)
+
+        # Salvar no cache (memória e PostgreSQL) e catalogar os pontos
+        self._salvar_no_cache(cache_key, rota)
+        self._salvar_no_cache_persistente(cache_key, rota)
+        self._catalogar_pontos(rota)
+
+        return rota
+
+    async def _compor_rota(
+        self,
+        cache_key: str,
+        cidade_origem: str,
+        cidade_destino: str,
+        uf_origem: Optional[str] = None,
+        uf_destino: Optional[str] = None,
+        preferencias: Optional[str] = None,
+        ibge_id_origem: Optional[int] = None,
+        ibge_id_destino: Optional[int] = None,
+        revalidacao: bool = False,
+    ) -> RotaTuristica:
+        """
+        Compor rota a partir de partes cacheadas independentemente
+
+        Os pontos de cada cidade são cacheados por cidade (e preferências) e
+        reaproveitados por todos os pares que a incluem; só o trecho entre as
+        cidades é específico do par e traz as recomendações e a melhor época.
+        Pontos de cidade ausentes do cache saem do catálogo do banco quando há
+        cobertura; o Gemini é chamado só para as partes restantes, em paralelo.
+        Na revalidação, partes expiradas também são regeneradas.
+        """
+        logger.info(f"🧩 Compondo rota por partes: {cache_key[:8]}...")
+
+        pontos_origem, trecho, pontos_destino = await asyncio.gather(
+            self._obter_pontos_cidade(
+                cidade_origem, uf_origem, ibge_id_origem, preferencias, revalidacao
+            ),
+            self._obter_trecho(
+                cidade_origem, cidade_destino, uf_origem, uf_destino,
+                preferencias, ibge_id_origem, ibge_id_destino, revalidacao,
+            ),
+            self._obter_pontos_cidade(
+                cidade_destino, uf_destino, ibge_id_destino, preferencias, revalidacao
+            ),
+        )
+
+        # Juntar origem → trecho → destino sem repetir atrações
+        pontos: List[PontoTuristico] = []
+        nomes_vistos = set()
+        for parte in (pontos_origem, trecho, pontos_destino):
+            for ponto in parte.pontos_turisticos:
+                nome = IBGEService.normalizar_nome(ponto.nome)
+                if nome not in nomes_vistos:
+                    nomes_vistos.add(nome)
+                    pontos.append(ponto)
+
+        rota = trecho.model_copy(
+            update={
+                "cidade_origem": pontos_origem.cidade_origem,
+                "cidade_destino": pontos_destino.cidade_destino,
+                "pontos_turisticos": pontos,
+            }
+        )
+
+        # As partes já estão no cache persistente; a rota composta fica só em memória
+        self._salvar_no_cache(cache_key, rota)
+
+        logger.info(f"Rota turística composta com {len(rota.pontos_turisticos)} pontos")
+        return rota
+
+    async def _obter_pontos_cidade(
+        self,
+        cidade: str,
+        uf: Optional[str] = None,
+        ibge_id: Optional[int] = None,
+        preferencias: Optional[str] = None,
+        revalidacao: bool = False,
+    ) -> RotaTuristica:
+        """Obter conjunto de pontos de uma cidade (cache, banco ou Gemini), como rota cidade→cidade"""
+        cache_key = self._chave_pontos_cidade(cidade, uf, ibge_id, preferencias)
+        gerar = lambda: self._gerar_pontos_cidade(cache_key, cidade, uf, ibge_id, preferencias)
+
+        rota = self._buscar_rota_em_cache(
+            cache_key, revalidar=gerar, aceitar_expirada=not revalidacao
+        )
+        if rota:
             return rota
 
+        return await self._executar_single_flight(cache_key, gerar)
+
+    def _chave_pontos_cidade(
+        self,
+        cidade: str,
+        uf: Optional[str] = None,
+        ibge_id: Optional[int] = None,
+        preferencias: Optional[str] = None,
+    ) -> str:
+        """Chave do cache dos pontos de uma cidade (compartilhada por todos os pares)"""
+        cidade_canonica = self._canonizar_cidade(cidade, uf, ibge_id)
+        prefs = self._canonizar_preferencias(preferencias)
+        return hashlib.md5(f"cidade|{cidade_canonica}|{prefs}".encode()).hexdigest()
+
+    async def _gerar_pontos_cidade(
+        self,
+        cache_key: str,
+        cidade: str,
+        uf: Optional[str] = None,
+        ibge_id: Optional[int] = None,
+        preferencias: Optional[str] = None,
+    ) -> RotaTuristica:
+        """Pontos da cidade catalogados no banco, se houver cobertura; senão, gerados pelo Gemini"""
+        rota = await asyncio.to_thread(self._pontos_cidade_do_banco, cidade, uf, ibge_id, preferencias)
+        if rota is not None:
+            logger.info(f"🗄️ Pontos de {rota.cidade_origem} montados a partir do banco")
+            self._salvar_no_cache(cache_key, rota)
+            return rota
+
+        return await self._gerar_e_cachear(
+            cache_key, self._criar_prompt_pontos_cidade(cidade, uf, preferencias)
+        )
+
+    async def _pontos_cidade_sem_ia(
+        self,
+        cidade: str,
+        uf: Optional[str] = None,
+        ibge_id: Optional[int] = None,
+        preferencias: Optional[str] = None,
+    ) -> bool:
+        """Se os pontos da cidade estão em cache ou no banco (os do banco ficam no cache)"""
+        cache_key = self._chave_pontos_cidade(cidade, uf, ibge_id, preferencias)
+        if self._buscar_rota_em_cache(cache_key, aceitar_expirada=False) is not None:
+            return True
+
+        rota = await asyncio.to_thread(self._pontos_cidade_do_banco, cidade, uf, ibge_id, preferencias)
+        if rota is None:
+            return False
+        self._salvar_no_cache(cache_key, rota)
+        return True
+
+    @staticmethod
+    def _pontos_cidade_do_banco(
+        cidade: str,
+        uf: Optional[str] = None,
+        ibge_id: Optional[int] = None,
+        preferencias: Optional[str] = None,
+    ) -> Optional[RotaTuristica]:
+        """Montar os pontos da cidade com o catálogo (síncrono; chamado fora do event loop)"""
+        try:
+            with SessionLocal() as db:
+                return PontoTuristicoService(db).montar_pontos_cidade(cidade, uf, ibge_id, preferencias)
         except Exception as e:
-            logger.error(f"Erro ao consultar rota turística: {e}")
-            raise Exception(f"Erro na consulta ao Gemini: {str(e)}")
+            logger.warning(f"Erro ao montar pontos da cidade a partir do banco: {e}")
+            return None
 
-    async def _consultar_gemini_async(self, prompt: str) -> str:
-        """Consulta assíncrona ao Gemini"""
+    async def _obter_trecho(
+        self,
+        cidade_origem: str,
+        cidade_destino: str,
+        uf_origem: Optional[str] = None,
+        uf_destino: Optional[str] = None,
+        preferencias: Optional[str] = None,
+        ibge_id_origem: Optional[int] = None,
+        ibge_id_destino: Optional[int] = None,
+        revalidacao: bool = False,
+    ) -> RotaTuristica:
+        """Obter trecho entre as cidades (cache ou Gemini), sem os pontos das próprias cidades"""
+        origem = self._canonizar_cidade(cidade_origem, uf_origem, ibge_id_origem)
+        destino = self._canonizar_cidade(cidade_destino, uf_destino, ibge_id_destino)
+        prefs = self._canonizar_preferencias(preferencias)
+        cache_key = hashlib.md5(f"trecho|{origem}|{destino}|{prefs}".encode()).hexdigest()
+        chave_reversa = hashlib.md5(f"trecho|{destino}|{origem}|{prefs}".encode()).hexdigest()
+
+        prompt = self._criar_prompt_trecho(
+            cidade_origem, cidade_destino, uf_origem, uf_destino, preferencias
+        )
+        gerar = lambda: self._gerar_e_cachear(cache_key, prompt)
+
+        rota = self._buscar_rota_em_cache(
+            cache_key, chave_reversa, revalidar=gerar, aceitar_expirada=not revalidacao
+        )
+        if rota:
+            return rota
+
+        return await self._executar_single_flight(cache_key, gerar)
+
+    @classmethod
+    async def _executar_single_flight(
+        cls, cache_key: str, gerar: Callable[[], Awaitable[RotaTuristica]]
+    ) -> RotaTuristica:
+        """
+        Executar geração de rota com coalescência de requisições idênticas
+
+        A primeira requisição para uma chave dispara a geração; requisições
+        concorrentes com a mesma chave aguardam o mesmo resultado. A geração só
+        é cancelada quando todos os interessados desistirem.
+        """
+        voo = cls._em_andamento.get(cache_key)
+        if voo is None:
+            voo = {"tarefa": asyncio.ensure_future(gerar()), "aguardando": 0}
+            cls._em_andamento[cache_key] = voo
+            cls._estatisticas_single_flight["chamadas_gemini"] += 1
+            voo["tarefa"].add_done_callback(
+                lambda _: cls._em_andamento.pop(cache_key, None)
+            )
+        else:
+            cls._estatisticas_single_flight["chamadas_coalescidas"] += 1
+            logger.info(f"🔗 Aguardando geração em andamento: {cache_key[:8]}...")
+
+        voo["aguardando"] += 1
         try:
-            response = self.model.generate_content(prompt)
+            return await asyncio.shield(voo["tarefa"])
+        except asyncio.CancelledError:
+            if voo["aguardando"] == 1 and not voo["tarefa"].done():
+                voo["tarefa"].cancel()
+            raise
+        finally:
+            voo["aguardando"] -= 1
+
+    @classmethod
+    def _obter_semaforo(cls) -> asyncio.Semaphore:
+        """Obter semáforo global que limita chamadas simultâneas ao Gemini"""
+        if cls._semaforo is None:
+            cls._semaforo = asyncio.Semaphore(max(1, settings.GEMINI_MAX_CONCURRENCY))
+        return cls._semaforo
 
-            if not response or not response.text:
-                raise Exception("Resposta vazia do Gemini")
+    async def _consultar_gemini_async(self, prompt: str) -> str:
+        """
+        Consulta assíncrona ao Gemini
 
-            return response.text.strip()
+        Usa o cliente assíncrono nativo para não bloquear o event loop, respeitando
+        o limite global de concorrência. O prazo vale para a espera por vaga mais a
+        geração; com o circuito aberto a chamada falha imediatamente. Se a
+        requisição for cancelada (ex: cliente desconectou), a chamada é abortada.
+        """
+        custo_estimado = self._reservar_tokens(prompt)
+        self._chamadas_backend += 1
+        breaker = self._circuit_breaker
+        try:
+            breaker.verificar()
+        except ServicoIndisponivelError:
+            self._ajustar_tokens(-custo_estimado)
+            raise
 
+        try:
+            texto = await asyncio.wait_for(
+                self._consultar_com_hedge(prompt),
+                timeout=settings.GEMINI_TIMEOUT_SECONDS,
+            )
+        except asyncio.CancelledError:
+            breaker.registrar_cancelamento()
+            raise
+        except asyncio.TimeoutError:
+            breaker.registrar_falha()
+            logger.error(
+                f"Tempo limite de {settings.GEMINI_TIMEOUT_SECONDS}s excedido na consulta ao Gemini"
+            )
+            raise ServicoIndisponivelError(
+                "Tempo limite excedido na comunicação com Gemini",
+                retry_after=settings.GEMINI_CB_TEMPO_ABERTO_SEGUNDOS,
+            )
         except Exception as e:
+            breaker.registrar_falha()
             logger.error(f"Erro na consulta ao Gemini: {e}")
             raise Exception(f"Falha na comunicação com Gemini: {str(e)}")
 
-    def _parse_response_json(self, response_text: str) -> Dict[str, Any]:
-        """Parse da resposta JSON do Gemini"""
+        breaker.registrar_sucesso()
+        self._ajustar_tokens(estimar_tokens(texto) - settings.LLM_TOKENS_RESPOSTA_ESTIMADOS)
+        return texto
+
+    def _reservar_tokens(self, prompt: str) -> int:
+        """
+        Cobrar da cota os tokens estimados da chamada (prompt + resposta)
+
+        Raises:
+            LimiteExcedidoError: cota global ou do usuário esgotada
+        """
+        if not settings.LLM_RATE_LIMIT:
+            return 0
+
+        custo = estimar_tokens(prompt) + settings.LLM_TOKENS_RESPOSTA_ESTIMADOS
+        usuario = self._usuario_cobrado()
+        try:
+            self._limitador.reservar(usuario, custo)
+        except LimiteExcedidoError as e:
+            origem = "revalidação" if _revalidacao_em_curso.get() else usuario or "anônimo"
+            logger.warning(f"🚦 {e} ({origem}), tente em {e.retry_after_segundos}s")
+            raise
+        return custo
+
+    def _ajustar_tokens(self, diferenca: int):
+        """Corrigir a cobrança com o tamanho real da resposta"""
+        if settings.LLM_RATE_LIMIT:
+            self._limitador.ajustar(self._usuario_cobrado(), diferenca)
+
+    def _usuario_cobrado(self) -> Optional[str]:
+        """Bucket de usuário a cobrar: nenhum (só o global) em revalidações em segundo plano"""
+        return None if _revalidacao_em_curso.get() else self.usuario
+
+    async def _chamar_backend(self, prompt: str) -> str:
+        """Uma chamada ao backend dentro do limite de concorrência, registrando a latência"""
+        async with self._obter_semaforo():
+            inicio = time.perf_counter()
+            texto = await self.backend.gerar(prompt)
+            self._latencias.registrar(time.perf_counter() - inicio)
+            return texto
+
+    @classmethod
+    def _atraso_hedge(cls) -> Optional[float]:
+        """Atraso antes da requisição de hedge (None se desabilitado ou sem amostras)"""
+        if not settings.GEMINI_HEDGE or len(cls._latencias) < settings.GEMINI_HEDGE_MIN_AMOSTRAS:
+            return None
+        return cls._latencias.percentil(settings.GEMINI_HEDGE_PERCENTIL)
+
+    async def _consultar_com_hedge(self, prompt: str) -> str:
+        """
+        Consultar o backend com hedge opcional
+
+        Se a primeira chamada passar do percentil configurado das latências
+        recentes (e houver vaga de concorrência), uma segunda chamada idêntica é
+        disparada; vale a primeira resposta bem-sucedida e a outra é cancelada.
+
+        O hedge é cobrado da cota como uma chamada nova (sem saldo, não é
+        disparado); da chamada perdedora só o prompt fica cobrado, a resposta
+        estimada é devolvida.
+        """
+        atraso = self._atraso_hedge()
+        if atraso is None:
+            return await self._chamar_backend(prompt)
+
+        principal = asyncio.ensure_future(self._chamar_backend(prompt))
+        tarefas = {principal}
         try:
-            # Limpar possível texto extra
-            response_clean = response_text.strip()
+            done, _ = await asyncio.wait(tarefas, timeout=atraso)
+            if not done and not self._obter_semaforo().locked() and self._reservar_hedge(prompt):
+                GeminiService._estatisticas_hedge["hedges_disparados"] += 1
+                logger.info(f"🏁 Gemini acima do p{settings.GEMINI_HEDGE_PERCENTIL:g} ({atraso:.1f}s), disparando hedge")
+                tarefas.add(asyncio.ensure_future(self._chamar_backend(prompt)))
+
+            pendentes = set(tarefas)
+            erro: Optional[BaseException] = None
+            while pendentes:
+                done, pendentes = await asyncio.wait(pendentes, return_when=asyncio.FIRST_COMPLETED)
+                for tarefa in done:
+                    if tarefa.exception() is None:
+                        if tarefa is not principal:
+                            GeminiService._estatisticas_hedge["hedges_vencedores"] += 1
+                        return tarefa.result()
+                    erro = tarefa.exception()
+            raise erro
+        finally:
+            for tarefa in tarefas:
+                tarefa.cancel()
+            if len(tarefas) > 1:
+                self._ajustar_tokens(-settings.LLM_TOKENS_RESPOSTA_ESTIMADOS)
+
+    def _reservar_hedge(self, prompt: str) -> bool:
+        """Cobrar o hedge da cota; sem saldo, seguir só com a chamada principal"""
+        try:
+            self._reservar_tokens(prompt)
+        except LimiteExcedidoError:
+            GeminiService._estatisticas_hedge["hedges_sem_cota"] += 1
+            return False
+        return True
 
-            # Remover markdown se presente
-            if response_clean.startswith("```json"):
-                response_clean = response_clean[7:]
-            if response_clean.endswith("```"):
-                response_clean = response_clean[:-3]
+    async def _consultar_gemini_stream(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Consulta ao Gemini em streaming, emitindo o texto conforme é gerado
 
-            response_clean = response_clean.strip()
+        Respeita o mesmo limite de concorrência e o mesmo circuit breaker das
+        consultas normais; o tempo limite vale para a geração completa.
+        """
+        loop = asyncio.get_running_loop()
+        prazo = loop.time() + settings.GEMINI_TIMEOUT_SECONDS
+        self._reservar_tokens(prompt)
+        self._chamadas_backend += 1
+        breaker = self._circuit_breaker
+        try:
+            breaker.verificar()
+        except ServicoIndisponivelError:
+            self._ajustar_tokens(-(estimar_tokens(prompt) + settings.LLM_TOKENS_RESPOSTA_ESTIMADOS))
+            raise
+        tokens_resposta = 0
 
-            # Parse JSON
-            data = json.loads(response_clean)
+        try:
+            async with self._obter_semaforo():
+                pedacos = self.backend.gerar_stream(prompt).__aiter__()
 
-            if not isinstance(data, dict):
-                raise ValueError("Resposta não é um objeto JSON válido")
+                try:
+                    while True:
+                        try:
+                            texto = await asyncio.wait_for(
+                                pedacos.__anext__(), timeout=max(0.0, prazo - loop.time())
+                            )
+                        except StopAsyncIteration:
+                            break
+
+                        tokens_resposta += estimar_tokens(texto)
+                        yield texto
+                finally:
+                    await pedacos.aclose()
+
+        except (asyncio.CancelledError, GeneratorExit):
+            breaker.registrar_cancelamento()
+            raise
+        except asyncio.TimeoutError:
+            breaker.registrar_falha()
+            logger.error(
+                f"Tempo limite de {settings.GEMINI_TIMEOUT_SECONDS}s excedido no streaming do Gemini"
+            )
+            raise ServicoIndisponivelError(
+                "Tempo limite excedido na comunicação com Gemini",
+                retry_after=settings.GEMINI_CB_TEMPO_ABERTO_SEGUNDOS,
+            )
+        except Exception as e:
+            breaker.registrar_falha()
+            logger.error(f"Erro no streaming do Gemini: {e}")
+            raise Exception(f"Falha na comunicação com Gemini: {str(e)}")
 
-            return data
+        breaker.registrar_sucesso()
+        self._ajustar_tokens(tokens_resposta - settings.LLM_TOKENS_RESPOSTA_ESTIMADOS)
 
-        except json.JSONDecodeError as e:
+    def _parse_response_json(self, response_text: str) -> Dict[str, Any]:
+        """
+        Parse da resposta JSON do Gemini
+
+        Tolera texto ao redor do JSON, cercas de markdown e defeitos comuns
+        (vírgulas sobrando, comentários); respostas truncadas mantêm os pontos
+        turísticos completos em vez de falhar a requisição inteira.
+        """
+        try:
+            data, resultado = self._extrator_json.extrair(response_text)
+        except JSONInvalidoError as e:
             logger.error(f"Erro no parsing JSON: {e}")
             logger.error(f"Resposta recebida: {response_text[:500]}...")
             raise Exception(f"Resposta do Gemini não é um JSON válido: {str(e)}")
 
+        if resultado == RESULTADO_RECUPERADO and not data.get("pontos_turisticos"):
+            # Truncada antes do primeiro ponto completo: não vale a pena cachear
+            raise Exception("Resposta do Gemini truncada antes dos pontos turísticos")
+
+        if resultado != RESULTADO_OK:
+            logger.warning(
+                f"🩹 JSON da resposta {resultado} "
+                f"({len(data.get('pontos_turisticos') or [])} pontos aproveitados)"
+            )
+
+        return data
+
     def _criar_rota_turistica(self, data: Dict[str, Any]) -> RotaTuristica:
         """Criar objeto RotaTuristica a partir dos dados"""
         try:
@@ -323,37 +1418,10 @@ class GeminiService:
             # Processar pontos turísticos
             pontos_turisticos = []
             for ponto_data in data.get("pontos_turisticos", []):
-                try:
-                    # Criar coordenadas
-                    coord_data = ponto_data.get("coordenadas", {})
-                    coordenadas = CoordenadaGPS(
-                        latitude=coord_data.get("latitude", 0.0),
-                        longitude=coord_data.get("longitude", 0.0),
-                    )
-
-                    # Criar ponto turístico
-                    ponto = PontoTuristico(
-                        nome=ponto_data.get("nome", "Nome não informado"),
-                        descricao=ponto_data.get(
-                            "descricao", "Descrição não disponível"
-                        ),
-                        coordenadas=coordenadas,
-                        tempo_visita_estimado=ponto_data.get(
-                            "tempo_visita_estimado", "Não informado"
-                        ),
-                        categoria=ponto_data.get("categoria", "geral"),
-                        endereco=ponto_data.get("endereco"),
-                        horario_funcionamento=ponto_data.get("horario_funcionamento"),
-                        valor_entrada=ponto_data.get("valor_entrada"),
-                        dicas_importantes=ponto_data.get("dicas_importantes"),
-                    )
-
+                ponto = self._criar_ponto_turistico(ponto_data)
+                if ponto:
                     pontos_turisticos.append(ponto)
 
-                except Exception as e:
-                    logger.warning(f"Erro ao processar ponto turístico: {e}")
-                    continue
-
             # Criar rota turística
             rota = RotaTuristica(
                 cidade_origem=data.get("cidade_origem", "Não informado"),
@@ -370,3 +1438,34 @@ class GeminiService:
         except Exception as e:
             logger.error(f"Erro ao criar RotaTuristica: {e}")
             raise Exception(f"Erro ao processar dados da rota: {str(e)}")
+
+    def _criar_ponto_turistico(self, ponto_data: Dict[str, Any]) -> Optional[PontoTuristico]:
+        """Criar PontoTuristico a partir dos dados (None se inválido)"""
+        try:
+            # Criar coordenadas
+            coord_data = ponto_data.get("coordenadas", {})
+            coordenadas = CoordenadaGPS(
+                latitude=coord_data.get("latitude", 0.0),
+                longitude=coord_data.get("longitude", 0.0),
+            )
+
+            # Criar ponto turístico
+            return PontoTuristico(
+                nome=ponto_data.get("nome", "Nome não informado"),
+                descricao=ponto_data.get(
+                    "descricao", "Descrição não disponível"
+                ),
+                coordenadas=coordenadas,
+                tempo_visita_estimado=ponto_data.get(
+                    "tempo_visita_estimado", "Não informado"
+                ),
+                categoria=ponto_data.get("categoria", "geral"),
+                endereco=ponto_data.get("endereco"),
+                horario_funcionamento=ponto_data.get("horario_funcionamento"),
+                valor_entrada=ponto_data.get("valor_entrada"),
+                dicas_importantes=ponto_data.get("dicas_importantes"),
+            )
+
+        except Exception as e:
+            logger.warning(f"Erro ao processar ponto turístico: {e}")
+            return None
\ No newline at end of file
@@ -1,11 +1,13 @@
 import asyncio
+import time
 import httpx
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from unidecode import unidecode
 from sqlalchemy.orm import Session
-from app.models.cidade import Cidade
+from app.core.config import settings
 from app.repositories.cidade_repository import CidadeRepository
+from app.services.municipios_snapshot_service import MunicipiosSnapshotService
 
 logger = logging.getLogger(__name__)
 
@@ -17,7 +19,11 @@ class IBGEService:
     def __init__(self, db: Session):
         self.db = db
         self.repository = CidadeRepository(db)
-        self.client = httpx.AsyncClient(timeout=30.0)
+        # Cliente único para todas as requisições (conexões reaproveitadas)
+        self.client = httpx.AsyncClient(
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=max(1, settings.IBGE_CONCORRENCIA))
+        )
     
     async def close(self):
         """Fechar o cliente HTTP"""
@@ -43,7 +49,8 @@ class IBGEService:
             logger.error(f"Erro ao buscar municípios para UF {uf}: {e}")
             raise
     
-    def normalizar_nome(self, nome: str) -> str:
+    @staticmethod
+    def normalizar_nome(nome: str) -> str:
         """Normalizar nome da cidade removendo acentos e convertendo para lowercase"""
         return unidecode(nome.lower().strip())
     
@@ -91,98 +98,152 @@ class IBGEService:
         
         return {"latitude": latitude, "longitude": longitude}
     
+    def _registros_municipios(self, uf: str, municipios: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Converter a resposta do IBGE em linhas da tabela cidades"""
+        registros = []
+        for municipio in municipios:
+            nome = municipio.get("nome", "")
+            ibge_id = municipio.get("id")
+            
+            if not nome or not ibge_id:
+                continue
+            
+            # Coordenadas (só usadas em cidades novas): as reais do snapshot,
+            # ou aproximadas pela UF para municípios fora dele
+            coordenadas = MunicipiosSnapshotService.coordenadas(ibge_id)
+            if coordenadas is None:
+                aproximadas = self._gerar_coordenadas_aproximadas(uf)
+                coordenadas = (aproximadas["latitude"], aproximadas["longitude"])
+            registros.append({
+                "nome": nome,
+                "nome_normalizado": self.normalizar_nome(nome),
+                "uf": uf.upper(),
+                "latitude": coordenadas[0],
+                "longitude": coordenadas[1],
+                "ibge_id": ibge_id
+            })
+        return registros
+    
+    def _gravar_municipios(self, uf: str, municipios: List[Dict[str, Any]], busca_ms: float) -> Dict[str, Any]:
+        """Gravar os municípios de uma UF com um upsert em lote"""
+        inicio = time.perf_counter()
+        try:
+            contagem = self.repository.upsert_por_ibge_id(self._registros_municipios(uf, municipios))
+        except Exception:
+            self.db.rollback()
+            raise
+        gravacao_ms = (time.perf_counter() - inicio) * 1000
+        
+        print(
+            f"✅ UF {uf}: {contagem['inseridas']} inseridas, {contagem['atualizadas']} atualizadas, "
+            f"{contagem['inalteradas']} inalteradas (busca {busca_ms:.0f} ms, gravação {gravacao_ms:.0f} ms)"
+        )
+        
+        return {
+            "uf": uf.upper(),
+            "cidades_inseridas": contagem["inseridas"],
+            "cidades_atualizadas": contagem["atualizadas"],
+            "cidades_inalteradas": contagem["inalteradas"],
+            "total": sum(contagem.values()),
+            "tempos_ms": {"busca": round(busca_ms, 1), "gravacao": round(gravacao_ms, 1)}
+        }
+    
+    async def _buscar_municipios_da_uf(
+        self, uf: str, semaforo: asyncio.Semaphore
+    ) -> Tuple[str, Optional[List[Dict[str, Any]]], float, Optional[Exception]]:
+        """
+        Buscar os municípios da UF respeitando o limite de requisições simultâneas
+        
+        Returns:
+            Tupla (uf, municipios, busca_ms, erro); em caso de falha, municipios é None
+        """
+        async with semaforo:
+            inicio = time.perf_counter()
+            try:
+                municipios = await self.get_municipios_por_uf(uf)
+            except Exception as e:
+                return uf, None, (time.perf_counter() - inicio) * 1000, e
+            return uf, municipios, (time.perf_counter() - inicio) * 1000, None
+    
     async def popular_cidades_por_uf(self, uf: str) -> Dict[str, Any]:
         """Popular banco de dados com cidades de uma UF"""
         try:
             print(f"🔍 Buscando municípios da UF: {uf}")
+            inicio = time.perf_counter()
             municipios = await self.get_municipios_por_uf(uf.upper())
-            
-            cidades_inseridas = 0
-            cidades_atualizadas = 0
-            
-            for municipio in municipios:
-                nome = municipio.get("nome", "")
-                ibge_id = municipio.get("id")
-                
-                if not nome or not ibge_id:
-                    continue
-                
-                # Verificar se cidade já existe
-                cidade_existente = self.repository.get_by_ibge_id(ibge_id)
-                
-                # Gerar coordenadas aproximadas
-                coordenadas = self._gerar_coordenadas_aproximadas(uf)
-                
-                if cidade_existente:
-                    # Atualizar cidade existente se necessário
-                    cidades_atualizadas += 1
-                else:
-                    # Criar nova cidade
-                    nova_cidade = Cidade(
-                        nome=nome,
-                        nome_normalizado=self.normalizar_nome(nome),
-                        uf=uf.upper(),
-                        latitude=coordenadas["latitude"],
-                        longitude=coordenadas["longitude"],
-                        ibge_id=ibge_id
-                    )
-                    self.db.add(nova_cidade)
-                    cidades_inseridas += 1
-            
-            self.db.commit()
-            print(f"✅ UF {uf}: {cidades_inseridas} inseridas, {cidades_atualizadas} atualizadas")
-            
-            return {
-                "uf": uf.upper(),
-                "cidades_inseridas": cidades_inseridas,
-                "cidades_atualizadas": cidades_atualizadas,
-                "total": cidades_inseridas + cidades_atualizadas
-            }
+            return self._gravar_municipios(uf.upper(), municipios, (time.perf_counter() - inicio) * 1000)
             
         except Exception as e:
-            self.db.rollback()
             logger.error(f"Erro ao popular cidades da UF {uf}: {e}")
             raise
     
     async def popular_todas_cidades(self) -> Dict[str, Any]:
-        """Popular banco de dados com todas as cidades do Brasil"""
+        """
+        Popular banco de dados com todas as cidades do Brasil
+        
+        As UFs são buscadas em paralelo (até IBGE_CONCORRENCIA requisições
+        simultâneas no mesmo cliente HTTP) e cada uma é gravada com um upsert
+        em lote assim que chega.
+        """
+        inicio_total = time.perf_counter()
         try:
             print("🌎 Iniciando busca de todos os estados...")
+            inicio = time.perf_counter()
             estados = await self.get_estados()
+            estados_ms = (time.perf_counter() - inicio) * 1000
             
             resultado = {
                 "estados_processados": 0,
                 "total_cidades_inseridas": 0,
                 "total_cidades_atualizadas": 0,
+                "total_cidades_inalteradas": 0,
+                "ufs_com_erro": [],
                 "detalhes": []
             }
             
-            for estado in estados:
-                uf = estado.get("sigla")
-                nome_estado = estado.get("nome")
+            semaforo = asyncio.Semaphore(max(1, settings.IBGE_CONCORRENCIA))
+            ufs = [estado.get("sigla") for estado in estados if estado.get("sigla")]
+            tarefas = [self._buscar_municipios_da_uf(uf, semaforo) for uf in ufs]
+            
+            inicio_busca = time.perf_counter()
+            gravacao_ms = 0.0
+            for tarefa in asyncio.as_completed(tarefas):
+                uf, municipios, busca_ms, erro = await tarefa
+                if erro is not None:
+                    print(f"❌ Erro ao buscar UF {uf}: {erro}")
+                    resultado["ufs_com_erro"].append(uf)
+                    continue
                 
-                if uf:
-                    try:
-                        print(f"📍 Processando {nome_estado} ({uf})...")
-                        resultado_uf = await self.popular_cidades_por_uf(uf)
-                        resultado["detalhes"].append(resultado_uf)
-                        resultado["total_cidades_inseridas"] += resultado_uf["cidades_inseridas"]
-                        resultado["total_cidades_atualizadas"] += resultado_uf["cidades_atualizadas"]
-                        resultado["estados_processados"] += 1
-                        
-                        # Pequena pausa para não sobrecarregar a API do IBGE
-                        await asyncio.sleep(0.1)
-                        
-                    except Exception as e:
-                        print(f"❌ Erro ao processar UF {uf}: {e}")
-                        continue
+                try:
+                    resultado_uf = self._gravar_municipios(uf, municipios, busca_ms)
+                except Exception as e:
+                    print(f"❌ Erro ao gravar UF {uf}: {e}")
+                    resultado["ufs_com_erro"].append(uf)
+                    continue
+                
+                gravacao_ms += resultado_uf["tempos_ms"]["gravacao"]
+                resultado["detalhes"].append(resultado_uf)
+                resultado["total_cidades_inseridas"] += resultado_uf["cidades_inseridas"]
+                resultado["total_cidades_atualizadas"] += resultado_uf["cidades_atualizadas"]
+                resultado["total_cidades_inalteradas"] += resultado_uf["cidades_inalteradas"]
+                resultado["estados_processados"] += 1
             
-            await self.close()
-            print(f"🎉 Processo concluído! {resultado['estados_processados']} estados processados")
+            resultado["detalhes"].sort(key=lambda detalhe: detalhe["uf"])
+            resultado["tempos_ms"] = {
+                "estados": round(estados_ms, 1),
+                "municipios_e_gravacao": round((time.perf_counter() - inicio_busca) * 1000, 1),
+                "gravacao": round(gravacao_ms, 1),
+                "total": round((time.perf_counter() - inicio_total) * 1000, 1)
+            }
             
+            print(
+                f"🎉 Processo concluído! {resultado['estados_processados']} estados processados "
+                f"em {resultado['tempos_ms']['total'] / 1000:.1f} s"
+            )
             return resultado
             
         except Exception as e:
             logger.error(f"Erro ao popular todas as cidades: {e}")
+            raise
+        finally:
             await self.close()
-            raise
\ No newline at end of file
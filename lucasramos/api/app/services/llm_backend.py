@@ -0,0 +1,188 @@
+"""
+Backends de modelo de linguagem usados pelo GeminiService
+
+- GeminiBackend: Google Gemini (produção)
+- FakeLLMBackend: gerador local de rotas realistas, com latência e taxa de falha
+  configuráveis, para benchmarks de carga e desenvolvimento sem gastar cota
+"""
+import asyncio
+import hashlib
+import json
+import random
+import re
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import google.generativeai as genai
+
+from app.core.config import settings
+
+# Atrações sintéticas usadas pelo backend local
+CATEGORIAS_FAKE = ["histórico", "natural", "cultural", "religioso", "gastronômico"]
+TIPOS_ATRACAO_FAKE = {
+    "histórico": ["Centro Histórico", "Casarão Colonial", "Forte", "Museu Histórico"],
+    "natural": ["Parque Estadual", "Cachoeira", "Mirante", "Trilha da Serra"],
+    "cultural": ["Teatro Municipal", "Centro Cultural", "Feira de Artesanato", "Museu de Arte"],
+    "religioso": ["Catedral", "Igreja Matriz", "Santuário", "Mosteiro"],
+    "gastronômico": ["Mercado Municipal", "Rota do Café", "Polo Gastronômico", "Feira Livre"],
+}
+
+
+class LLMBackend(ABC):
+    """Interface de um backend de geração de texto a partir de prompts"""
+
+    nome: str = "abstrato"
+
+    @abstractmethod
+    async def gerar(self, prompt: str) -> str:
+        """Gerar resposta completa para o prompt"""
+
+    @abstractmethod
+    def gerar_stream(self, prompt: str) -> AsyncIterator[str]:
+        """Gerar resposta emitindo o texto em pedaços à medida que é produzido"""
+
+
+class GeminiBackend(LLMBackend):
+    """Backend Google Gemini"""
+
+    nome = "gemini"
+
+    def __init__(self, modelo: str = "gemini-2.5-flash"):
+        if not settings.GEMINI_API_KEY:
+            raise ValueError(
+                "GEMINI_API_KEY não configurada. Configure no arquivo .env"
+            )
+
+        genai.configure(api_key=settings.GEMINI_API_KEY)
+        self.model = genai.GenerativeModel(modelo)
+
+    async def gerar(self, prompt: str) -> str:
+        response = await self.model.generate_content_async(prompt)
+
+        if not response or not response.text:
+            raise Exception("Resposta vazia do Gemini")
+
+        return response.text.strip()
+
+    async def gerar_stream(self, prompt: str) -> AsyncIterator[str]:
+        response = await self.model.generate_content_async(prompt, stream=True)
+
+        async for chunk in response:
+            try:
+                texto = chunk.text
+            except ValueError:
+                # Pedaço sem texto (ex: apenas metadados de segurança)
+                continue
+
+            if texto:
+                yield texto
+
+
+class FakeLLMBackend(LLMBackend):
+    """
+    Backend local que responde aos prompts de rota com JSON realista
+
+    A resposta é determinística para um mesmo prompt (cidades e pontos
+    derivados do hash), enquanto latência e falhas seguem os parâmetros
+    configurados, para reproduzir o comportamento do Gemini sob carga.
+    """
+
+    nome = "fake"
+
+    def __init__(
+        self,
+        latencia_ms: Optional[float] = None,
+        variacao_ms: Optional[float] = None,
+        taxa_falha: Optional[float] = None,
+    ):
+        self.latencia_ms = settings.FAKE_LLM_LATENCIA_MS if latencia_ms is None else latencia_ms
+        self.variacao_ms = settings.FAKE_LLM_VARIACAO_MS if variacao_ms is None else variacao_ms
+        self.taxa_falha = settings.FAKE_LLM_TAXA_FALHA if taxa_falha is None else taxa_falha
+
+    async def gerar(self, prompt: str) -> str:
+        await self._simular_latencia()
+        return self._criar_resposta(prompt)
+
+    async def gerar_stream(self, prompt: str) -> AsyncIterator[str]:
+        resposta = self._criar_resposta(prompt)
+        tamanho_pedaco = 64
+        pedacos = [resposta[i:i + tamanho_pedaco] for i in range(0, len(resposta), tamanho_pedaco)]
+
+        # Primeiro pedaço após ~1/4 da latência, o restante distribuído até o fim
+        await self._simular_latencia(fracao=0.25)
+        intervalo = self._latencia_sorteada() * 0.75 / max(1, len(pedacos))
+        for pedaco in pedacos:
+            yield pedaco
+            await asyncio.sleep(intervalo)
+
+    def _latencia_sorteada(self) -> float:
+        """Latência em segundos: média configurada ± variação uniforme"""
+        latencia = self.latencia_ms + random.uniform(-self.variacao_ms, self.variacao_ms)
+        return max(0.0, latencia) / 1000
+
+    async def _simular_latencia(self, fracao: float = 1.0):
+        await asyncio.sleep(self._latencia_sorteada() * fracao)
+        if self.taxa_falha and random.random() < self.taxa_falha:
+            raise Exception("Falha simulada do backend local")
+
+    @staticmethod
+    def _extrair_campo(prompt: str, campo: str) -> Optional[str]:
+        match = re.search(rf'"{campo}"\s*:\s*"([^"]+)"', prompt)
+        return match.group(1) if match else None
+
+    def _criar_resposta(self, prompt: str) -> str:
+        """Montar JSON de rota a partir das cidades citadas no prompt"""
+        origem = self._extrair_campo(prompt, "cidade_origem") or "Origem"
+        destino = self._extrair_campo(prompt, "cidade_destino") or "Destino"
+
+        semente = int(hashlib.md5(prompt.encode()).hexdigest()[:8], 16)
+        aleatorio = random.Random(semente)
+
+        lat_origem, lon_origem = self._coordenadas_cidade(origem)
+        lat_destino, lon_destino = self._coordenadas_cidade(destino)
+
+        pontos: List[Dict[str, Any]] = []
+        total_pontos = aleatorio.randint(4, 7)
+        for i in range(total_pontos):
+            # Pontos distribuídos ao longo do segmento origem → destino
+            fracao = i / max(1, total_pontos - 1)
+            categoria = aleatorio.choice(CATEGORIAS_FAKE)
+            tipo = aleatorio.choice(TIPOS_ATRACAO_FAKE[categoria])
+            cidade = origem if fracao < 0.5 else destino
+            pontos.append({
+                "nome": f"{tipo} de {cidade.split(',')[0]} {i + 1}",
+                "descricao": f"{tipo} tradicional, um dos destaques da região.",
+                "coordenadas": {
+                    "latitude": round(lat_origem + (lat_destino - lat_origem) * fracao + aleatorio.uniform(-0.05, 0.05), 6),
+                    "longitude": round(lon_origem + (lon_destino - lon_origem) * fracao + aleatorio.uniform(-0.05, 0.05), 6),
+                },
+                "tempo_visita_estimado": f"{aleatorio.randint(1, 4)} horas",
+                "categoria": categoria,
+                "endereco": f"Rua Principal, {aleatorio.randint(1, 2000)} - {cidade}",
+                "horario_funcionamento": "Ter-Dom 9h às 17h",
+                "valor_entrada": aleatorio.choice(["Gratuito", "R$ 10", "R$ 25", "R$ 40"]),
+                "dicas_importantes": "Chegue cedo para evitar filas.",
+            })
+
+        return json.dumps({
+            "cidade_origem": origem,
+            "cidade_destino": destino,
+            "pontos_turisticos": pontos,
+            "recomendacoes_gerais": "Planeje paradas a cada 2 horas e confira as condições da estrada.",
+            "melhor_epoca_visita": "Entre abril e setembro, na estação seca",
+        }, ensure_ascii=False)
+
+    @staticmethod
+    def _coordenadas_cidade(nome: str):
+        """Coordenadas sintéticas e estáveis dentro do território brasileiro"""
+        valor = int(hashlib.md5(nome.lower().encode()).hexdigest()[:8], 16)
+        latitude = -30.0 + (valor % 2500) / 100  # -30.0 a -5.0
+        longitude = -55.0 + (valor // 2500 % 1700) / 100  # -55.0 a -38.0
+        return latitude, longitude
+
+
+def criar_backend() -> LLMBackend:
+    """Criar o backend configurado em LLM_BACKEND"""
+    if settings.LLM_BACKEND.lower() == FakeLLMBackend.nome:
+        return FakeLLMBackend()
+    return GeminiBackend()
@@ -0,0 +1,106 @@
+"""
+Carga offline dos municípios a partir do snapshot versionado no repositório
+
+O arquivo (data/municipios.csv.gz, gerado por scripts/build_municipios_snapshot.py)
+traz código IBGE, nome, UF e as coordenadas reais da sede de cada município. A
+leitura é em fluxo, direto do gzip para o COPY do banco, sem carregar o arquivo
+inteiro em memória nem chamar a API do IBGE.
+"""
+import csv
+import gzip
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from sqlalchemy.orm import Session
+from unidecode import unidecode
+
+from app.core.config import settings
+from app.repositories.cidade_repository import CidadeRepository
+
+logger = logging.getLogger(__name__)
+
+# Raiz do projeto da API: caminhos relativos de MUNICIPIOS_SNAPSHOT partem daqui
+RAIZ_API = Path(__file__).resolve().parent.parent.parent
+
+
+def caminho_snapshot(caminho: Optional[str] = None) -> Path:
+    """Caminho do snapshot (argumento, ou MUNICIPIOS_SNAPSHOT relativo à raiz da API)"""
+    arquivo = Path(caminho or settings.MUNICIPIOS_SNAPSHOT)
+    return arquivo if arquivo.is_absolute() else RAIZ_API / arquivo
+
+
+def ler_snapshot(caminho: Optional[str] = None, uf: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Linhas do snapshot prontas para a tabela cidades, lidas em fluxo
+
+    Args:
+        caminho: arquivo .csv.gz (padrão: MUNICIPIOS_SNAPSHOT)
+        uf: carregar apenas uma UF (opcional)
+    """
+    uf = uf.upper() if uf else None
+    with gzip.open(caminho_snapshot(caminho), "rt", encoding="utf-8", newline="") as arquivo:
+        for linha in csv.DictReader(arquivo):
+            if uf and linha["uf"] != uf:
+                continue
+            yield {
+                "ibge_id": int(linha["ibge_id"]),
+                "nome": linha["nome"],
+                "nome_normalizado": unidecode(linha["nome"].lower().strip()),
+                "uf": linha["uf"],
+                "latitude": float(linha["latitude"]),
+                "longitude": float(linha["longitude"]),
+            }
+
+
+class MunicipiosSnapshotService:
+    """Service para semear e corrigir a tabela cidades com o snapshot de municípios"""
+
+    # Coordenadas por ibge_id, carregadas do snapshot sob demanda (uma vez por processo)
+    _coordenadas: Optional[Dict[int, Tuple[float, float]]] = None
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.repository = CidadeRepository(db)
+
+    def carregar(self, caminho: Optional[str] = None, uf: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Carregar o snapshot na tabela cidades
+
+        Cidades novas são inseridas; nas existentes (mesmo ibge_id), só as
+        coordenadas são corrigidas, e apenas quando diferem.
+
+        Returns:
+            Dict com inseridas, atualizadas, inalteradas e duração em ms
+        """
+        arquivo = caminho_snapshot(caminho)
+        print(f"📦 Carregando municípios de {arquivo.name}{f' (UF {uf.upper()})' if uf else ''}...")
+
+        inicio = time.perf_counter()
+        try:
+            contagem = self.repository.copiar_municipios(ler_snapshot(caminho, uf))
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Erro ao carregar snapshot de municípios: {e}")
+            raise
+        duracao_ms = (time.perf_counter() - inicio) * 1000
+
+        print(
+            f"✅ {contagem['inseridas']} inseridas, {contagem['atualizadas']} atualizadas, "
+            f"{contagem['inalteradas']} inalteradas em {duracao_ms:.0f} ms"
+        )
+        return {**contagem, "duracao_ms": round(duracao_ms, 1)}
+
+    @classmethod
+    def coordenadas(cls, ibge_id: int) -> Optional[Tuple[float, float]]:
+        """Coordenadas reais do município no snapshot (None se ausente ou sem snapshot)"""
+        if cls._coordenadas is None:
+            try:
+                cls._coordenadas = {
+                    linha["ibge_id"]: (linha["latitude"], linha["longitude"]) for linha in ler_snapshot()
+                }
+            except OSError as e:
+                logger.warning(f"⚠️ Snapshot de municípios indisponível: {e}")
+                cls._coordenadas = {}
+        return cls._coordenadas.get(ibge_id)
@@ -0,0 +1,231 @@
+import re
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.cidade import Cidade, PontoTuristico as PontoTuristicoModel
+from app.repositories.cidade_repository import CidadeRepository, PontoTuristicoRepository
+from app.schemas.turismo import RotaTuristica, PontoTuristico, CoordenadaGPS
+from app.services.ibge_service import IBGEService
+
+logger = logging.getLogger(__name__)
+
+# Categorias canônicas, identificadas pelo prefixo do nome normalizado
+CATEGORIAS_CANONICAS = {
+    "histor": "histórico",
+    "natur": "natural",
+    "cultur": "cultural",
+    "relig": "religioso",
+    "gastr": "gastronômico",
+}
+
+FONTE_GEMINI = "gemini"
+
+
+class PontoTuristicoService:
+    """Service para catalogar pontos turísticos gerados pela IA e montar partes de rotas a partir do banco"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.repository = PontoTuristicoRepository(db)
+        self.cidade_repository = CidadeRepository(db)
+
+    @staticmethod
+    def canonizar_categoria(categoria: Optional[str]) -> Optional[str]:
+        """Mapear categoria livre (ex: 'Histórico|Cultural') para a categoria canônica"""
+        if not categoria:
+            return None
+
+        principal = re.split(r"[|/,;]", categoria)[0]
+        normalizada = IBGEService.normalizar_nome(principal)
+        for prefixo, canonica in CATEGORIAS_CANONICAS.items():
+            if normalizada.startswith(prefixo):
+                return canonica
+        return normalizada[:100] or None
+
+    @staticmethod
+    def categorias_das_preferencias(preferencias: Optional[str]) -> Optional[List[str]]:
+        """
+        Extrair categorias canônicas citadas nas preferências
+
+        Returns:
+            None se não há preferências; lista vazia se as preferências não
+            correspondem a nenhuma categoria conhecida
+        """
+        if not preferencias:
+            return None
+
+        tokens = re.findall(r"\w+", IBGEService.normalizar_nome(preferencias))
+        return sorted({
+            canonica
+            for token in tokens
+            for prefixo, canonica in CATEGORIAS_CANONICAS.items()
+            if token.startswith(prefixo)
+        })
+
+    def registrar_pontos_gerados(self, rota: RotaTuristica) -> int:
+        """
+        Gravar no banco os pontos de uma rota gerada pela IA
+
+        Pontos com o mesmo nome a menos de 1 km de um existente atualizam o
+        registro em vez de duplicá-lo. Cada ponto é associado à cidade mais próxima.
+
+        Returns:
+            Número de pontos inseridos ou atualizados
+        """
+        pontos: List[PontoTuristicoModel] = []
+
+        for ponto in rota.pontos_turisticos:
+            latitude = ponto.coordenadas.latitude
+            longitude = ponto.coordenadas.longitude
+
+            # Ignorar pontos sem coordenadas válidas
+            if not latitude and not longitude:
+                continue
+
+            nome_normalizado = IBGEService.normalizar_nome(ponto.nome)
+            registro = self.repository.buscar_duplicado(nome_normalizado, latitude, longitude)
+
+            if registro is None:
+                cidade = self.cidade_repository.buscar_mais_proxima(
+                    latitude, longitude, settings.PONTOS_RAIO_CIDADE_KM
+                )
+                registro = PontoTuristicoModel(
+                    nome=ponto.nome,
+                    nome_normalizado=nome_normalizado,
+                    latitude=latitude,
+                    longitude=longitude,
+                    cidade_id=cidade.id if cidade else None,
+                    fonte=FONTE_GEMINI,
+                )
+
+            registro.descricao = ponto.descricao
+            registro.categoria = self.canonizar_categoria(ponto.categoria)
+            registro.tempo_visita_estimado = ponto.tempo_visita_estimado
+            registro.endereco = ponto.endereco
+            registro.horario_funcionamento = ponto.horario_funcionamento
+            registro.valor_entrada = ponto.valor_entrada
+            registro.dicas_importantes = ponto.dicas_importantes
+            pontos.append(registro)
+
+        if pontos:
+            self.repository.salvar_varios(pontos)
+            logger.info(f"📍 {len(pontos)} pontos turísticos catalogados no banco")
+
+        return len(pontos)
+
+    def montar_pontos_cidade(
+        self,
+        cidade: str,
+        uf: Optional[str] = None,
+        ibge_id: Optional[int] = None,
+        preferencias: Optional[str] = None,
+    ) -> Optional[RotaTuristica]:
+        """
+        Montar o conjunto de pontos de uma cidade (parte da rota composta) com
+        pontos já catalogados, se houver cobertura suficiente
+
+        Returns:
+            RotaTuristica cidade→cidade, ou None quando a cidade não está no
+            banco ou não tem pontos suficientes (nas categorias pedidas) e a IA
+            precisa ser consultada
+        """
+        categorias = self.categorias_das_preferencias(preferencias)
+        if categorias is not None and not categorias:
+            # Preferências que não mapeiam para categorias conhecidas exigem a IA
+            return None
+
+        registro = (
+            self.cidade_repository.get_by_ibge_id(ibge_id) if ibge_id
+            else self.cidade_repository.get_by_nome(cidade, uf.upper() if uf else None)
+        )
+        if registro is None:
+            return None
+
+        pontos = self.repository.get_by_cidade_e_categorias(
+            registro.id, categorias, settings.ROTA_BANCO_MAX_PONTOS_CIDADE
+        )
+        if len(pontos) < settings.ROTA_BANCO_MIN_PONTOS_CIDADE:
+            return None
+
+        local = f"{registro.nome}, {registro.uf}"
+        return RotaTuristica(
+            cidade_origem=local,
+            cidade_destino=local,
+            pontos_turisticos=[self._para_schema(p) for p in pontos],
+        )
+
+    def buscar_pontos_no_corredor(
+        self,
+        cidade_origem: Cidade,
+        cidade_destino: Cidade,
+        largura_km: Optional[float] = None,
+        categorias: Optional[List[str]] = None,
+        limite: int = 20,
+        excluir_cidades: Optional[List[int]] = None,
+    ) -> List[Tuple[float, float, PontoTuristicoModel]]:
+        """
+        Pontos catalogados a até largura_km do caminho origem → destino
+
+        Os `limite` pontos de menor desvio são devolvidos na ordem da viagem.
+
+        Returns:
+            Lista de (desvio_km, distancia_km, ponto) ordenada pela posição no percurso
+        """
+        if not limite:
+            return []
+
+        largura = largura_km if largura_km is not None else settings.CORREDOR_LARGURA_KM
+        vertices = [
+            (cidade_origem.latitude, cidade_origem.longitude),
+            (cidade_destino.latitude, cidade_destino.longitude),
+        ]
+        selecionados = self.repository.get_no_corredor(
+            vertices, largura, categorias, excluir_cidades, limit=limite
+        )
+
+        selecionados.sort(key=lambda item: item[2])
+        return [(desvio, distancia, ponto) for desvio, distancia, _, ponto in selecionados]
+
+    def buscar_pontos_proximos(self, latitude: float, longitude: float, k: int = 10,
+                               raio_km: Optional[float] = None) -> Dict[str, Any]:
+        """Buscar os k pontos turísticos catalogados mais próximos de uma coordenada"""
+        resultados = self.repository.get_k_mais_proximos(latitude, longitude, k, raio_km)
+
+        pontos = [
+            {
+                "id": ponto.id,
+                "nome": ponto.nome,
+                "descricao": ponto.descricao,
+                "latitude": ponto.latitude,
+                "longitude": ponto.longitude,
+                "categoria": ponto.categoria,
+                "cidade_id": ponto.cidade_id,
+                "distancia_km": round(distancia, 3),
+            }
+            for distancia, ponto in resultados
+        ]
+
+        return {
+            "pontos": pontos,
+            "total": len(pontos),
+            "latitude": latitude,
+            "longitude": longitude,
+            "k": k,
+            "raio_km": raio_km,
+        }
+
+    @staticmethod
+    def _para_schema(ponto: PontoTuristicoModel) -> PontoTuristico:
+        """Converter registro do banco para o schema da rota"""
+        return PontoTuristico(
+            nome=ponto.nome,
+            descricao=ponto.descricao or "Descrição não disponível",
+            coordenadas=CoordenadaGPS(latitude=ponto.latitude, longitude=ponto.longitude),
+            tempo_visita_estimado=ponto.tempo_visita_estimado or "Não informado",
+            categoria=ponto.categoria or "geral",
+            endereco=ponto.endereco,
+            horario_funcionamento=ponto.horario_funcionamento,
+            valor_entrada=ponto.valor_entrada,
+            dicas_importantes=ponto.dicas_importantes,
+        )
@@ -2,7 +2,8 @@
 Service para lógica de negócios dos Roteiros
 """
 import json
-from typing import List, Optional, Dict, Any
+from datetime import datetime
+from typing import List, Optional, Dict, Any, Tuple
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 
@@ -80,6 +81,17 @@ class RoteiroService:
         
         return RoteiroResponse.model_validate(roteiro)
 
+    def obter_versao_roteiro(self, roteiro_id: int, usuario_id: int) -> Tuple[int, datetime]:
+        """Obter (id, data_atualizacao) do roteiro para o ETag, sem carregar o conteúdo"""
+        versao = self.repository.get_versao(roteiro_id, usuario_id)
+        if not versao:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Roteiro não encontrado"
+            )
+        
+        return versao
+
     def obter_roteiro_com_pontos(self, roteiro_id: int, usuario_id: int) -> Dict[str, Any]:
         """Obter roteiro com pontos parseados"""
         roteiro = self.repository.get_by_id(roteiro_id, usuario_id)
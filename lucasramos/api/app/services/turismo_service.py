@@ -1,7 +1,14 @@
-from typing import Optional
+from typing import Optional, Dict, Any, AsyncIterator, Tuple
 from sqlalchemy.orm import Session
-from app.repositories.cidade_repository import CidadeRepository
-from app.services.gemini_service import GeminiService
+from app.core.cache import RespostaSerializada
+from app.core.config import settings
+from app.core.percurso import ordenar_percurso
+from app.core.rate_limit import LimiteExcedidoError
+from app.core.resiliencia import ServicoIndisponivelError
+from app.repositories.cidade_repository import CidadeRepository, PontoTuristicoRepository
+from app.services.cidade_service import CidadeService
+from app.services.gemini_service import GeminiService, ROTA_DO_GEMINI
+from app.services.ponto_turistico_service import PontoTuristicoService
 from app.schemas.turismo import SolicitacaoRota, RespostaTurismo, RotaTuristica
 from app.models.cidade import Cidade
 import logging
@@ -11,49 +18,51 @@ logger = logging.getLogger(__name__)
 class TurismoService:
     """Service principal para funcionalidades de turismo"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, usuario: Optional[str] = None):
         """
         Inicializar serviço de turismo
         
         Args:
             db: Sessão do banco de dados
+            usuario: Identificador usado na cota de tokens da IA (usuário ou IP)
         """
         self.db = db
         self.cidade_repository = CidadeRepository(db)
-        self.gemini_service = GeminiService()
+        self.ponto_turistico_service = PontoTuristicoService(db)
+        self.gemini_service = GeminiService(usuario=usuario)
     
-    async def obter_rota_turistica(self, solicitacao: SolicitacaoRota) -> RespostaTurismo:
+    async def obter_rota_turistica(
+        self,
+        solicitacao: SolicitacaoRota,
+        cidades: Optional[Tuple[Optional[Cidade], Optional[Cidade]]] = None
+    ) -> RespostaTurismo:
         """
         Obter rota turística entre duas cidades
         
         Args:
             solicitacao: Dados da solicitação de rota
+            cidades: Cidades de origem e destino já resolvidas (evita nova busca)
             
         Returns:
             RespostaTurismo: Resposta com a rota turística ou erro
+            
+        Raises:
+            ServicoIndisponivelError: Gemini indisponível (circuito aberto ou prazo excedido)
+            LimiteExcedidoError: Cota de tokens da IA esgotada (global ou do usuário)
         """
         
         try:
             logger.info(f"Processando rota: {solicitacao.cidade_origem} → {solicitacao.cidade_destino}")
             
             # Buscar e validar cidades no banco
-            cidade_origem = await self._buscar_cidade(
-                solicitacao.cidade_origem, 
-                solicitacao.uf_origem
-            )
-            
-            cidade_destino = await self._buscar_cidade(
-                solicitacao.cidade_destino, 
-                solicitacao.uf_destino
-            )
-            
-            # Verificar se as cidades são diferentes
-            if (cidade_origem and cidade_destino and 
-                cidade_origem.nome.lower() == cidade_destino.nome.lower() and
-                str(cidade_origem.uf) == str(cidade_destino.uf)):
+            if cidades is None:
+                cidade_origem, cidade_destino, erro = await self._resolver_cidades(solicitacao)
+            else:
+                (cidade_origem, cidade_destino), erro = cidades, None
+            if erro:
                 return RespostaTurismo(
                     sucesso=False,
-                    erro="As cidades de origem e destino não podem ser iguais",
+                    erro=erro,
                     rota=None,
                     metadata=None
                 )
@@ -62,14 +71,22 @@ class TurismoService:
             uf_origem = str(cidade_origem.uf) if cidade_origem else solicitacao.uf_origem
             uf_destino = str(cidade_destino.uf) if cidade_destino else solicitacao.uf_destino
             
-            # Consultar Gemini para obter rota turística
+            # Rota em cache ou, na falta, composta com os pontos catalogados no
+            # banco e o Gemini apenas para as partes sem cobertura
             rota = await self.gemini_service.consultar_rota_turistica(
                 cidade_origem=solicitacao.cidade_origem,
                 cidade_destino=solicitacao.cidade_destino,
                 uf_origem=uf_origem,
                 uf_destino=uf_destino,
-                preferencias=solicitacao.preferencias
+                preferencias=solicitacao.preferencias,
+                ibge_id_origem=cidade_origem.ibge_id if cidade_origem else None,
+                ibge_id_destino=cidade_destino.ibge_id if cidade_destino else None
             )
+            rota = self._com_dados_viagem(rota, cidade_origem, cidade_destino)
+            fonte = self.gemini_service.fonte
+            
+            # Reordenar os pontos em um percurso eficiente origem → destino
+            rota, ordenacao = self._ordenar_pontos(rota, cidade_origem, cidade_destino)
             
             # Criar metadados da consulta
             metadata = {
@@ -78,7 +95,9 @@ class TurismoService:
                     "destino": cidade_destino.nome if cidade_destino else None
                 },
                 "total_pontos_turisticos": len(rota.pontos_turisticos),
-                "consulta_gemini": True
+                "consulta_gemini": fonte == ROTA_DO_GEMINI,
+                "fonte": fonte,
+                "ordenacao": ordenacao
             }
             
             return RespostaTurismo(
@@ -88,6 +107,8 @@ class TurismoService:
                 metadata=metadata
             )
             
+        except (ServicoIndisponivelError, LimiteExcedidoError):
+            raise
         except Exception as e:
             logger.error(f"Erro ao obter rota turística: {e}")
             return RespostaTurismo(
@@ -97,6 +118,234 @@ class TurismoService:
                 metadata=None
             )
     
+    async def obter_rota_turistica_serializada(
+        self, solicitacao: SolicitacaoRota
+    ) -> Tuple[Optional[RespostaSerializada], bool, Optional[str]]:
+        """
+        Obter a resposta da rota já serializada em JSON (caminho quente do endpoint)
+        
+        Respostas de sucesso são guardadas como bytes (e gzip) por alguns minutos,
+        de modo que repetições não passam por montagem de modelos nem serialização.
+        
+        Returns:
+            Tupla (resposta_serializada, servida_do_cache_de_respostas, mensagem_de_erro)
+            
+        Raises:
+            ServicoIndisponivelError: Gemini indisponível (circuito aberto ou prazo excedido)
+            LimiteExcedidoError: Cota de tokens da IA esgotada (global ou do usuário)
+        """
+        cidade_origem, cidade_destino, erro = await self._resolver_cidades(solicitacao)
+        if erro:
+            return None, False, erro
+        
+        chave = self.gemini_service.gerar_chave_resposta(
+            cidade_origem=solicitacao.cidade_origem,
+            cidade_destino=solicitacao.cidade_destino,
+            uf_origem=str(cidade_origem.uf) if cidade_origem else solicitacao.uf_origem,
+            uf_destino=str(cidade_destino.uf) if cidade_destino else solicitacao.uf_destino,
+            preferencias=solicitacao.preferencias,
+            ibge_id_origem=cidade_origem.ibge_id if cidade_origem else None,
+            ibge_id_destino=cidade_destino.ibge_id if cidade_destino else None
+        )
+        
+        serializada = GeminiService.obter_resposta_serializada(chave)
+        if serializada is not None:
+            logger.info(f"⚡ Resposta serializada em cache: {solicitacao.cidade_origem} → {solicitacao.cidade_destino}")
+            return serializada, True, None
+        
+        resultado = await self.obter_rota_turistica(solicitacao, cidades=(cidade_origem, cidade_destino))
+        if not resultado.sucesso:
+            return None, False, resultado.erro or "Erro desconhecido ao processar solicitação"
+        
+        return GeminiService.salvar_resposta_serializada(chave, resultado.model_dump_json().encode()), False, None
+    
+    async def obter_rota_turistica_stream(self, solicitacao: SolicitacaoRota) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Obter rota turística em streaming (eventos metadata → ponto... → fim)
+        
+        Args:
+            solicitacao: Dados da solicitação de rota
+            
+        Yields:
+            Eventos da rota; em caso de falha, um evento {"tipo": "erro"}
+        
+        Raises:
+            LimiteExcedidoError, ServicoIndisponivelError: antes do primeiro evento,
+                para a rota responder 429/503 com Retry-After em vez de 200
+        """
+        
+        emitidos = 0
+        try:
+            logger.info(f"Processando rota (streaming): {solicitacao.cidade_origem} → {solicitacao.cidade_destino}")
+            
+            cidade_origem, cidade_destino, erro = await self._resolver_cidades(solicitacao)
+            if erro:
+                yield {"tipo": "erro", "erro": erro}
+                return
+            
+            uf_origem = str(cidade_origem.uf) if cidade_origem else solicitacao.uf_origem
+            uf_destino = str(cidade_destino.uf) if cidade_destino else solicitacao.uf_destino
+            
+            async for evento in self.gemini_service.consultar_rota_turistica_stream(
+                cidade_origem=solicitacao.cidade_origem,
+                cidade_destino=solicitacao.cidade_destino,
+                uf_origem=uf_origem,
+                uf_destino=uf_destino,
+                preferencias=solicitacao.preferencias,
+                ibge_id_origem=cidade_origem.ibge_id if cidade_origem else None,
+                ibge_id_destino=cidade_destino.ibge_id if cidade_destino else None
+            ):
+                if evento["tipo"] == "metadata":
+                    if cidade_origem and cidade_destino:
+                        evento["dados"].update(CidadeService.dados_viagem(cidade_origem, cidade_destino))
+                    evento["cidades_encontradas_bd"] = {
+                        "origem": cidade_origem.nome if cidade_origem else None,
+                        "destino": cidade_destino.nome if cidade_destino else None
+                    }
+                    evento["fonte"] = self.gemini_service.fonte
+                emitidos += 1
+                yield evento
+                
+        except (ServicoIndisponivelError, LimiteExcedidoError) as e:
+            logger.warning(f"Gemini indisponível (streaming): {e}")
+            if not emitidos:
+                raise
+            yield {"tipo": "erro", "erro": str(e), "retry_after": e.retry_after_segundos}
+        except Exception as e:
+            logger.error(f"Erro ao obter rota turística (streaming): {e}")
+            yield {"tipo": "erro", "erro": f"Erro interno: {str(e)}"}
+    
+    @staticmethod
+    def _com_dados_viagem(
+        rota: RotaTuristica,
+        cidade_origem: Optional[Cidade],
+        cidade_destino: Optional[Cidade]
+    ) -> RotaTuristica:
+        """
+        Preencher distância e tempo de viagem com a estimativa local (não são pedidos à IA)
+        
+        Sem as duas cidades no banco não há coordenadas confiáveis e a rota fica como está.
+        """
+        if not cidade_origem or not cidade_destino:
+            return rota
+        return rota.model_copy(update=CidadeService.dados_viagem(cidade_origem, cidade_destino))
+    
+    @staticmethod
+    def _ordenar_pontos(
+        rota: RotaTuristica,
+        cidade_origem: Optional[Cidade],
+        cidade_destino: Optional[Cidade]
+    ) -> Tuple[RotaTuristica, Optional[Dict[str, Any]]]:
+        """
+        Reordenar os pontos turísticos em um percurso eficiente (vizinho mais próximo + 2-opt)
+        
+        As cidades resolvidas no banco são os extremos fixos do percurso; sem elas,
+        o primeiro ponto da rota é mantido como partida. Pontos sem coordenadas
+        (0, 0) ficam no fim, na ordem original.
+        
+        Returns:
+            Tupla (rota, estatisticas) com km_antes/km_depois; estatisticas None se desativado
+        """
+        if not settings.ORDENAR_PONTOS_ROTA:
+            return rota, None
+        
+        pontos = rota.pontos_turisticos
+        com_coordenadas, sem_coordenadas = [], []
+        for ponto in pontos:
+            if ponto.coordenadas.latitude or ponto.coordenadas.longitude:
+                com_coordenadas.append(ponto)
+            else:
+                sem_coordenadas.append(ponto)
+        
+        ordem, estatisticas = ordenar_percurso(
+            [(ponto.coordenadas.latitude, ponto.coordenadas.longitude) for ponto in com_coordenadas],
+            origem=(cidade_origem.latitude, cidade_origem.longitude) if cidade_origem else None,
+            destino=(cidade_destino.latitude, cidade_destino.longitude) if cidade_destino else None,
+            orcamento_ms=settings.ORDENACAO_ORCAMENTO_MS
+        )
+        
+        if estatisticas["km_depois"] < estatisticas["km_antes"]:
+            logger.info(
+                f"🧭 Pontos reordenados: {estatisticas['km_antes']} → {estatisticas['km_depois']} km "
+                f"({estatisticas['tempo_ms']} ms)"
+            )
+            rota = rota.model_copy(
+                update={"pontos_turisticos": [com_coordenadas[i] for i in ordem] + sem_coordenadas}
+            )
+        
+        return rota, estatisticas
+    
+    async def buscar_pontos_no_corredor(
+        self,
+        solicitacao: SolicitacaoRota,
+        largura_km: Optional[float] = None,
+        limite: int = 20
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Buscar pontos catalogados ao longo do caminho entre duas cidades (sem IA)
+        
+        Returns:
+            Tupla (resultado, mensagem_de_erro)
+        """
+        cidade_origem, cidade_destino, erro = await self._resolver_cidades(solicitacao)
+        if erro:
+            return None, erro
+        if not cidade_origem or not cidade_destino:
+            return None, "Cidades de origem e destino precisam estar cadastradas"
+        
+        largura = largura_km if largura_km is not None else settings.CORREDOR_LARGURA_KM
+        pontos = self.ponto_turistico_service.buscar_pontos_no_corredor(
+            cidade_origem, cidade_destino, largura_km=largura, limite=limite
+        )
+        
+        return {
+            "origem": f"{cidade_origem.nome}, {cidade_origem.uf}",
+            "destino": f"{cidade_destino.nome}, {cidade_destino.uf}",
+            "largura_km": largura,
+            "pontos": [
+                {
+                    "id": ponto.id,
+                    "nome": ponto.nome,
+                    "descricao": ponto.descricao,
+                    "latitude": ponto.latitude,
+                    "longitude": ponto.longitude,
+                    "categoria": ponto.categoria,
+                    "cidade_id": ponto.cidade_id,
+                    "distancia_km": round(distancia, 3),
+                    "desvio_km": round(desvio, 3)
+                }
+                for desvio, distancia, ponto in pontos
+            ],
+            "total": len(pontos)
+        }, None
+    
+    async def _resolver_cidades(
+        self, solicitacao: SolicitacaoRota
+    ) -> Tuple[Optional[Cidade], Optional[Cidade], Optional[str]]:
+        """
+        Buscar cidades de origem e destino no banco e validar a solicitação
+        
+        Returns:
+            Tupla (cidade_origem, cidade_destino, mensagem_de_erro)
+        """
+        cidade_origem = await self._buscar_cidade(
+            solicitacao.cidade_origem, 
+            solicitacao.uf_origem
+        )
+        
+        cidade_destino = await self._buscar_cidade(
+            solicitacao.cidade_destino, 
+            solicitacao.uf_destino
+        )
+        
+        # Verificar se as cidades são diferentes
+        if (cidade_origem and cidade_destino and 
+            cidade_origem.nome.lower() == cidade_destino.nome.lower() and
+            str(cidade_origem.uf) == str(cidade_destino.uf)):
+            return cidade_origem, cidade_destino, "As cidades de origem e destino não podem ser iguais"
+        
+        return cidade_origem, cidade_destino, None
+    
     async def _buscar_cidade(self, nome_cidade: str, uf: Optional[str] = None) -> Optional[Cidade]:
         """
         Buscar cidade no banco de dados
@@ -196,7 +445,12 @@ class TurismoService:
             return {
                 "total_cidades": total_cidades,
                 "total_ufs_com_dados": len(ufs_stats),
-                "cidades_por_uf": ufs_stats
+                "cidades_por_uf": ufs_stats,
+                "indice_espacial": {
+                    "cidades": CidadeRepository._indice.estatisticas(),
+                    "pontos_turisticos": PontoTuristicoRepository._indice.estatisticas()
+                },
+                "indice_autocomplete": CidadeRepository._indice_nomes.estatisticas()
             }
             
         except Exception as e:
@@ -1,7 +1,14 @@
+import asyncio
+import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.core.database import SessionLocal
+from app.repositories.cidade_repository import (
+    CidadeRepository, PontoTuristicoRepository, verificar_alteracoes_indices
+)
 from app.routes import cities, tourism, auth, roteiros
+from app.services.gemini_service import GeminiService
 
 app = FastAPI(
     title="Turismo Inteligente API",
@@ -24,6 +31,65 @@ app.include_router(tourism.router, prefix="/api/v1/tourism", tags=["tourism"])
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
 app.include_router(roteiros.router, prefix="/api/v1/roteiros", tags=["roteiros"])
 
+logger = logging.getLogger(__name__)
+
+@app.on_event("startup")
+def construir_indices():
+    """Construir os índices em memória (espacial e autocomplete) antes da primeira requisição"""
+    db = SessionLocal()
+    try:
+        CidadeRepository(db).construir_indices()
+        PontoTuristicoRepository(db).construir_indices()
+        logger.info(f"🔎 Índices em memória prontos: {len(CidadeRepository._indice_nomes)} cidades no autocomplete")
+    except Exception as e:
+        # Sem banco na subida, os índices são construídos em segundo plano na primeira consulta
+        logger.warning(f"⚠️ Índices em memória não construídos na inicialização: {e}")
+    finally:
+        db.close()
+
+def _verificar_alteracoes_indices():
+    db = SessionLocal()
+    try:
+        verificar_alteracoes_indices(db)
+    finally:
+        db.close()
+
+async def _verificar_alteracoes_indices_periodicamente():
+    while True:
+        await asyncio.sleep(settings.INDICES_VERIFICACAO_SEGUNDOS)
+        try:
+            await asyncio.to_thread(_verificar_alteracoes_indices)
+        except Exception as e:
+            logger.warning(f"⚠️ Falha ao verificar alterações para os índices em memória: {e}")
+
+@app.on_event("startup")
+async def iniciar_verificacao_indices():
+    """Reconstruir os índices quando outras instâncias ou scripts alterarem as tabelas"""
+    if settings.INDICES_VERIFICACAO_SEGUNDOS > 0:
+        app.state.verificacao_indices = asyncio.create_task(_verificar_alteracoes_indices_periodicamente())
+
+@app.on_event("shutdown")
+async def encerrar_verificacao_indices():
+    tarefa = getattr(app.state, "verificacao_indices", None)
+    if tarefa is not None:
+        tarefa.cancel()
+
+@app.on_event("startup")
+async def iniciar_manutencao_cache_rotas():
+    """Gravar hits e remover rotas expiradas do cache persistente periodicamente"""
+    if settings.ROUTE_CACHE_PERSISTENTE:
+        app.state.manutencao_cache_rotas = asyncio.create_task(
+            GeminiService.manter_cache_persistente_periodicamente()
+        )
+
+@app.on_event("shutdown")
+async def encerrar_manutencao_cache_rotas():
+    """Parar a manutenção e gravar os hits ainda pendentes"""
+    tarefa = getattr(app.state, "manutencao_cache_rotas", None)
+    if tarefa is not None:
+        tarefa.cancel()
+        await GeminiService.manter_cache_persistente()
+
 @app.get("/")
 async def root():
     return {"message": "Turismo Inteligente API", "version": "1.0.0"}
@@ -0,0 +1,77 @@
+"""
+Migration 004: Create rotas_cache table
+
+Created: 2024-10-28
+Description: Creates the persistent route cache shared between API workers (L2 cache for Gemini routes)
+"""
+
+import sys
+import os
+from sqlalchemy import create_engine, text
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    """Create rotas_cache table"""
+    print("🚀 Executando migração 004: Criando tabela de cache de rotas...")
+    
+    # Adicionar o diretório pai ao path para importar os módulos
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    
+    from app.core.config import settings
+    
+    # Criar engine
+    engine = create_engine(settings.DATABASE_URL)
+    
+    try:
+        print("📝 Criando tabela de cache de rotas...")
+        
+        create_table_sql = """
+        CREATE TABLE IF NOT EXISTS rotas_cache (
+            cache_key VARCHAR(64) PRIMARY KEY,
+            rota_json TEXT NOT NULL,
+            expira_em TIMESTAMP WITH TIME ZONE NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+        );
+        """
+        
+        with engine.connect() as conn:
+            conn.execute(text(create_table_sql))
+            conn.commit()
+            print("✅ Tabela 'rotas_cache' criada com sucesso!")
+            
+            # Índice para limpeza de entradas expiradas
+            print("📊 Criando índices...")
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS idx_rotas_cache_expira_em ON rotas_cache(expira_em);"
+            ))
+            conn.commit()
+            
+            print("✅ Índices criados com sucesso!")
+            
+    except Exception as e:
+        print(f"❌ Erro ao criar tabela: {e}")
+        raise e
+    
+    print("✅ Migração 004 concluída com sucesso!")
+
+def downgrade():
+    """Drop rotas_cache table"""
+    print("⬇️ Revertendo migração 004...")
+    
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from app.core.config import settings
+    
+    engine = create_engine(settings.DATABASE_URL)
+    
+    with engine.connect() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS rotas_cache"))
+        conn.commit()
+    
+    print("✅ Migração 004 revertida com sucesso!")
\ No newline at end of file
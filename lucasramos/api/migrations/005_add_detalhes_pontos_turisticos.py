@@ -0,0 +1,81 @@
+"""
+Migration 005: Add detail columns to pontos_turisticos
+
+Created: 2024-11-04
+Description: Adds the fields returned by Gemini (visit time, address, opening hours, fee, tips)
+and a normalized name so generated tourist points can be stored and deduplicated
+"""
+
+import sys
+import os
+from sqlalchemy import create_engine, text
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    """Add detail columns to pontos_turisticos"""
+    print("🚀 Executando migração 005: Adicionando detalhes aos pontos turísticos...")
+    
+    # Adicionar o diretório pai ao path para importar os módulos
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    
+    from app.core.config import settings
+    
+    # Criar engine
+    engine = create_engine(settings.DATABASE_URL)
+    
+    try:
+        colunas_sql = [
+            "ALTER TABLE pontos_turisticos ADD COLUMN IF NOT EXISTS nome_normalizado VARCHAR(255);",
+            "ALTER TABLE pontos_turisticos ADD COLUMN IF NOT EXISTS tempo_visita_estimado VARCHAR(100);",
+            "ALTER TABLE pontos_turisticos ADD COLUMN IF NOT EXISTS endereco TEXT;",
+            "ALTER TABLE pontos_turisticos ADD COLUMN IF NOT EXISTS horario_funcionamento TEXT;",
+            "ALTER TABLE pontos_turisticos ADD COLUMN IF NOT EXISTS valor_entrada TEXT;",
+            "ALTER TABLE pontos_turisticos ADD COLUMN IF NOT EXISTS dicas_importantes TEXT;",
+            "ALTER TABLE pontos_turisticos ADD COLUMN IF NOT EXISTS fonte VARCHAR(50);",
+        ]
+        
+        with engine.connect() as conn:
+            print("📝 Adicionando colunas...")
+            for coluna_sql in colunas_sql:
+                conn.execute(text(coluna_sql))
+            conn.commit()
+            print("✅ Colunas adicionadas com sucesso!")
+            
+            # Índice para deduplicação por nome dentro da cidade
+            print("📊 Criando índices...")
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS idx_pontos_turisticos_nome_normalizado "
+                "ON pontos_turisticos(nome_normalizado);"
+            ))
+            conn.commit()
+            
+            print("✅ Índices criados com sucesso!")
+            
+    except Exception as e:
+        print(f"❌ Erro ao alterar tabela: {e}")
+        raise e
+    
+    print("✅ Migração 005 concluída com sucesso!")
+
+def downgrade():
+    """Drop detail columns from pontos_turisticos"""
+    print("⬇️ Revertendo migração 005...")
+    
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from app.core.config import settings
+    
+    engine = create_engine(settings.DATABASE_URL)
+    
+    with engine.connect() as conn:
+        conn.execute(text("DROP INDEX IF EXISTS idx_pontos_turisticos_nome_normalizado"))
+        for coluna in ["nome_normalizado", "tempo_visita_estimado", "endereco",
+                       "horario_funcionamento", "valor_entrada", "dicas_importantes", "fonte"]:
+            conn.execute(text(f"ALTER TABLE pontos_turisticos DROP COLUMN IF EXISTS {coluna}"))
+        conn.commit()
+    
+    print("✅ Migração 005 revertida com sucesso!")
\ No newline at end of file
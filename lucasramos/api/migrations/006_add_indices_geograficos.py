@@ -0,0 +1,109 @@
+"""
+Migration 006: Add geographic indexes to cidades and pontos_turisticos
+
+Created: 2024-11-10
+Description: Index-backed radius and nearest-neighbour queries. With PostGIS, adds a
+generated geography(Point) column with a GiST index to both tables; without PostGIS,
+falls back to cube/earthdistance GiST expression indexes on ll_to_earth(lat, lon)
+"""
+
+import sys
+import os
+from sqlalchemy import create_engine, text
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+TABELAS = ["cidades", "pontos_turisticos"]
+
+def _criar_extensao(conn, extensao: str) -> bool:
+    """Tentar criar a extensão; False se não estiver disponível no servidor"""
+    try:
+        conn.execute(text(f"CREATE EXTENSION IF NOT EXISTS {extensao};"))
+        conn.commit()
+        return True
+    except Exception as e:
+        conn.rollback()
+        print(f"⚠️  Extensão {extensao} indisponível: {str(e).splitlines()[0]}")
+        return False
+
+def upgrade():
+    """Add geographic columns/indexes"""
+    print("🚀 Executando migração 006: Criando índices geográficos...")
+
+    # Adicionar o diretório pai ao path para importar os módulos
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    from app.core.config import settings
+
+    # Criar engine
+    engine = create_engine(settings.DATABASE_URL)
+
+    try:
+        with engine.connect() as conn:
+            if _criar_extensao(conn, "postgis"):
+                print("🌎 PostGIS disponível: criando colunas geography...")
+                for tabela in TABELAS:
+                    conn.execute(text(f"""
+                        ALTER TABLE {tabela} ADD COLUMN IF NOT EXISTS geog geography(Point, 4326)
+                        GENERATED ALWAYS AS (
+                            ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography
+                        ) STORED;
+                    """))
+                    conn.execute(text(
+                        f"CREATE INDEX IF NOT EXISTS idx_{tabela}_geog ON {tabela} USING GIST (geog);"
+                    ))
+                conn.commit()
+                print("✅ Colunas geography e índices GiST criados com sucesso!")
+
+            elif _criar_extensao(conn, "cube") and _criar_extensao(conn, "earthdistance"):
+                print("🌎 PostGIS indisponível: usando cube/earthdistance...")
+                for tabela in TABELAS:
+                    conn.execute(text(
+                        f"CREATE INDEX IF NOT EXISTS idx_{tabela}_earth ON {tabela} "
+                        f"USING GIST (ll_to_earth(latitude, longitude));"
+                    ))
+                conn.commit()
+                print("✅ Índices GiST em ll_to_earth criados com sucesso!")
+
+            else:
+                print("⚠️  Sem PostGIS nem earthdistance: criando apenas índices (latitude, longitude)")
+
+            # Índice composto usado pelo filtro por caixa (fallback sem extensões)
+            for tabela in TABELAS:
+                conn.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS idx_{tabela}_lat_lon ON {tabela}(latitude, longitude);"
+                ))
+            conn.commit()
+
+            for tabela in TABELAS:
+                conn.execute(text(f"ANALYZE {tabela};"))
+            conn.commit()
+
+    except Exception as e:
+        print(f"❌ Erro ao criar índices geográficos: {e}")
+        raise e
+
+    print("✅ Migração 006 concluída com sucesso!")
+
+def downgrade():
+    """Drop geographic columns/indexes (extensions are kept, they may be shared)"""
+    print("⬇️ Revertendo migração 006...")
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from app.core.config import settings
+
+    engine = create_engine(settings.DATABASE_URL)
+
+    with engine.connect() as conn:
+        for tabela in TABELAS:
+            conn.execute(text(f"DROP INDEX IF EXISTS idx_{tabela}_geog"))
+            conn.execute(text(f"DROP INDEX IF EXISTS idx_{tabela}_earth"))
+            conn.execute(text(f"DROP INDEX IF EXISTS idx_{tabela}_lat_lon"))
+            conn.execute(text(f"ALTER TABLE {tabela} DROP COLUMN IF EXISTS geog"))
+        conn.commit()
+
+    print("✅ Migração 006 revertida com sucesso!")
@@ -0,0 +1,89 @@
+"""
+Migration 007: Add trigram index for city name search
+
+Created: 2024-11-12
+Description: Database-side fuzzy autocomplete for multi-instance deployments. Enables
+pg_trgm and unaccent, adds an IMMUTABLE f_unaccent() wrapper (unaccent() itself is
+only STABLE and cannot be indexed) and a GIN trigram index on
+f_unaccent(cidades.nome_normalizado), used by prefix, substring and word-similarity
+searches in a single query
+"""
+
+import sys
+import os
+from sqlalchemy import create_engine, text
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+def _criar_extensao(conn, extensao: str) -> bool:
+    """Tentar criar a extensão; False se não estiver disponível no servidor"""
+    try:
+        conn.execute(text(f"CREATE EXTENSION IF NOT EXISTS {extensao};"))
+        conn.commit()
+        return True
+    except Exception as e:
+        conn.rollback()
+        print(f"⚠️  Extensão {extensao} indisponível: {str(e).splitlines()[0]}")
+        return False
+
+def upgrade():
+    """Add pg_trgm/unaccent and the trigram index on cidades.nome_normalizado"""
+    print("🚀 Executando migração 007: Criando índice de trigramas em cidades...")
+
+    # Adicionar o diretório pai ao path para importar os módulos
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    from app.core.config import settings
+
+    # Criar engine
+    engine = create_engine(settings.DATABASE_URL)
+
+    try:
+        with engine.connect() as conn:
+            if not (_criar_extensao(conn, "pg_trgm") and _criar_extensao(conn, "unaccent")):
+                print("⚠️  Sem pg_trgm/unaccent: a busca de cidades continua com LIKE")
+                print("✅ Migração 007 concluída (sem índice de trigramas)")
+                return
+
+            # Dicionário explícito: com ele a função pode ser declarada IMMUTABLE
+            conn.execute(text("""
+                CREATE OR REPLACE FUNCTION f_unaccent(texto text) RETURNS text
+                LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS
+                $$ SELECT public.unaccent('public.unaccent'::regdictionary, texto) $$;
+            """))
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS idx_cidades_nome_trgm ON cidades
+                USING GIN (f_unaccent(nome_normalizado) gin_trgm_ops);
+            """))
+            conn.commit()
+
+            conn.execute(text("ANALYZE cidades;"))
+            conn.commit()
+
+            print("✅ Índice GIN de trigramas criado com sucesso!")
+
+    except Exception as e:
+        print(f"❌ Erro ao criar índice de trigramas: {e}")
+        raise e
+
+    print("✅ Migração 007 concluída com sucesso!")
+
+def downgrade():
+    """Drop the trigram index and f_unaccent (extensions are kept, they may be shared)"""
+    print("⬇️ Revertendo migração 007...")
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from app.core.config import settings
+
+    engine = create_engine(settings.DATABASE_URL)
+
+    with engine.connect() as conn:
+        conn.execute(text("DROP INDEX IF EXISTS idx_cidades_nome_trgm"))
+        conn.execute(text("DROP FUNCTION IF EXISTS f_unaccent(text)"))
+        conn.commit()
+
+    print("✅ Migração 007 revertida com sucesso!")
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Benchmark de carga dos principais endpoints da API de turismo
+Uso: python benchmark_load.py [URL] [--requisicoes N] [--concorrencia C] [--json ARQUIVO]
+
+Sem URL, a API é executada no próprio processo com o backend local de LLM
+(LLM_BACKEND=fake), sem gastar cota do Gemini. Com URL, o alvo é um servidor já
+em execução (inicie-o com LLM_BACKEND=fake para o mesmo efeito).
+
+Para cada endpoint são reportados latência p50/p95/p99, throughput, erros e,
+para rotas turísticas, o hit ratio por requisição (respostas com X-Cache: HIT),
+a origem das demais (banco ou Gemini) e, à parte, os hits e misses do cache em
+memória, que também conta as consultas às partes por cidade e por corredor.
+
+Exemplos:
+  python benchmark_load.py                                   # Em processo, backend fake
+  python benchmark_load.py http://localhost:8000 --concorrencia 20
+  python benchmark_load.py --requisicoes 500 --json resultado.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Adicionar o diretório da API ao path para imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+# Pares de cidades consultados (com repetição, como no tráfego real)
+PARES_ROTA = [
+    ("São Paulo", "SP", "Rio de Janeiro", "RJ"),
+    ("Rio de Janeiro", "RJ", "Belo Horizonte", "MG"),
+    ("Curitiba", "PR", "Florianópolis", "SC"),
+    ("Salvador", "BA", "Recife", "PE"),
+    ("Fortaleza", "CE", "Natal", "RN"),
+    ("Porto Alegre", "RS", "Gramado", "RS"),
+    ("Brasília", "DF", "Goiânia", "GO"),
+    ("Belo Horizonte", "MG", "Ouro Preto", "MG"),
+]
+PREFERENCIAS_ROTA = [None, "histórico", "natureza", "gastronomia"]
+
+# Termos digitados no autocomplete de cidades
+TERMOS_BUSCA = ["sa", "sao", "são p", "rio", "rio de", "bel", "cur", "flo", "por", "for", "rec", "nat"]
+
+EMAIL_BENCHMARK = "benchmark@turismointeligente.com.br"
+SENHA_PADRAO = "sejapro"
+
+
+def percentil(valores: List[float], p: float) -> float:
+    """Percentil por posição mais próxima (valores já ordenados)"""
+    if not valores:
+        return 0.0
+    indice = max(0, min(len(valores) - 1, round(p / 100 * len(valores) + 0.5) - 1))
+    return valores[indice]
+
+
+async def executar_carga(
+    nome: str,
+    requisicao: Callable[[int], Awaitable[httpx.Response]],
+    total: int,
+    concorrencia: int,
+    classificar: Optional[Callable[[httpx.Response], Optional[str]]] = None,
+) -> Dict[str, Any]:
+    """
+    Disparar `total` requisições com no máximo `concorrencia` simultâneas
+
+    Com `classificar`, cada resposta é contada na origem que ele devolver
+    (None não conta).
+    """
+    latencias: List[float] = []
+    status: Dict[str, int] = {}
+    origens: Dict[str, int] = {}
+    semaforo = asyncio.Semaphore(max(1, concorrencia))
+
+    async def executar(i: int):
+        async with semaforo:
+            inicio = time.perf_counter()
+            try:
+                resposta = await requisicao(i)
+                codigo = str(resposta.status_code)
+                origem = classificar(resposta) if classificar else None
+                if origem:
+                    origens[origem] = origens.get(origem, 0) + 1
+            except Exception as e:
+                codigo = type(e).__name__
+            latencias.append((time.perf_counter() - inicio) * 1000)
+            status[codigo] = status.get(codigo, 0) + 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(executar(i) for i in range(total)))
+    duracao = time.perf_counter() - inicio
+
+    latencias.sort()
+    erros = sum(qtd for codigo, qtd in status.items() if not codigo.startswith(("2", "3")))
+    resultado = {
+        "endpoint": nome,
+        "requisicoes": total,
+        "concorrencia": concorrencia,
+        "erros": erros,
+        "status": status,
+        "duracao_s": round(duracao, 3),
+        "throughput_rps": round(total / duracao, 2) if duracao else 0.0,
+        "latencia_ms": {
+            "p50": round(percentil(latencias, 50), 2),
+            "p95": round(percentil(latencias, 95), 2),
+            "p99": round(percentil(latencias, 99), 2),
+            "max": round(latencias[-1], 2) if latencias else 0.0,
+        },
+    }
+    if classificar:
+        resultado["origens"] = origens
+    return resultado
+
+
+def origem_rota(resposta: httpx.Response) -> Optional[str]:
+    """
+    De onde veio uma rota: "cache" (corpo serializado com X-Cache: HIT ou rota em
+    cache), "banco" (composta sem o Gemini) ou "gemini", conforme metadata.fonte
+    """
+    if resposta.status_code != 200:
+        return None
+    if resposta.headers.get("x-cache") == "HIT":
+        return "cache"
+    try:
+        metadata = resposta.json().get("metadata") or {}
+    except ValueError:
+        return None
+    return metadata.get("fonte") or "gemini"
+
+
+async def estatisticas_cache(cliente: httpx.AsyncClient) -> Optional[Dict[str, int]]:
+    """
+    Hits e misses do cache em memória, no nível das entradas: rotas inteiras e
+    partes (por cidade e por corredor) da rota composta
+    """
+    try:
+        resposta = await cliente.get("/api/v1/tourism/cache/stats")
+        memoria = resposta.json()["cache_stats"]["memoria"]
+        return {"hits": memoria["hits"], "misses": memoria["misses"]}
+    except Exception:
+        return None
+
+
+async def obter_token(cliente: httpx.AsyncClient) -> Optional[str]:
+    """Cadastrar (se preciso) e autenticar o usuário do benchmark"""
+    await cliente.post(
+        "/api/v1/auth/cadastro",
+        json={"nome": "Benchmark", "email": EMAIL_BENCHMARK, "senha": SENHA_PADRAO},
+    )
+    resposta = await cliente.post(
+        "/api/v1/auth/login",
+        json={"email": EMAIL_BENCHMARK, "senha": SENHA_PADRAO},
+    )
+    if resposta.status_code != 200:
+        return None
+    return resposta.json().get("token")
+
+
+async def benchmark(cliente: httpx.AsyncClient, requisicoes: int, concorrencia: int, semente: int) -> List[Dict[str, Any]]:
+    """Executar os cenários de carga em sequência"""
+    aleatorio = random.Random(semente)
+    resultados: List[Dict[str, Any]] = []
+
+    # Rotas turísticas
+    solicitacoes = []
+    for _ in range(requisicoes):
+        origem, uf_origem, destino, uf_destino = aleatorio.choice(PARES_ROTA)
+        solicitacoes.append({
+            "cidade_origem": origem,
+            "uf_origem": uf_origem,
+            "cidade_destino": destino,
+            "uf_destino": uf_destino,
+            "preferencias": aleatorio.choice(PREFERENCIAS_ROTA),
+        })
+
+    cache_antes = await estatisticas_cache(cliente)
+    resultado = await executar_carga(
+        "POST /api/v1/tourism/route",
+        lambda i: cliente.post("/api/v1/tourism/route", json=solicitacoes[i]),
+        requisicoes, concorrencia, classificar=origem_rota,
+    )
+    # Hit ratio por requisição: rotas respondidas do cache sobre as respondidas com sucesso
+    respondidas = sum(resultado["origens"].values())
+    resultado["cache_hit_ratio"] = (
+        round(resultado["origens"].get("cache", 0) / respondidas, 4) if respondidas else 0.0
+    )
+    cache_depois = await estatisticas_cache(cliente)
+    if cache_antes and cache_depois:
+        resultado["cache_entradas"] = {
+            chave: cache_depois[chave] - cache_antes[chave] for chave in ("hits", "misses")
+        }
+    resultados.append(resultado)
+
+    # Autocomplete de cidades
+    termos = [aleatorio.choice(TERMOS_BUSCA) for _ in range(requisicoes)]
+    resultados.append(await executar_carga(
+        "GET /api/v1/cities/search",
+        lambda i: cliente.get("/api/v1/cities/search", params={"q": termos[i], "limit": 10}),
+        requisicoes, concorrencia,
+    ))
+
+    # Roteiros do usuário autenticado
+    token = await obter_token(cliente)
+    if token:
+        cabecalhos = {"Authorization": f"Bearer {token}"}
+        resultados.append(await executar_carga(
+            "GET /api/v1/roteiros",
+            lambda i: cliente.get("/api/v1/roteiros/", headers=cabecalhos),
+            requisicoes, concorrencia,
+        ))
+    else:
+        print("⚠️  Não foi possível autenticar o usuário do benchmark; /roteiros ignorado")
+
+    return resultados
+
+
+def imprimir_resultados(resultados: List[Dict[str, Any]]):
+    """Imprimir tabela com os resultados"""
+    print("\n📊 RESULTADOS:")
+    print(f"   {'Endpoint':<30} {'p50':>9} {'p95':>9} {'p99':>9} {'req/s':>9} {'erros':>6} {'hit ratio':>10}")
+    for r in resultados:
+        lat = r["latencia_ms"]
+        hit_ratio = f"{r['cache_hit_ratio']:.1%}" if "cache_hit_ratio" in r else "-"
+        print(
+            f"   {r['endpoint']:<30} {lat['p50']:>7.1f}ms {lat['p95']:>7.1f}ms {lat['p99']:>7.1f}ms "
+            f"{r['throughput_rps']:>9.1f} {r['erros']:>6} {hit_ratio:>10}"
+        )
+        if "origens" in r:
+            origens = ", ".join(f"{origem}: {qtd}" for origem, qtd in sorted(r["origens"].items()))
+            print(f"   {'':<30} origem das respostas: {origens or '-'}")
+        if "cache_entradas" in r:
+            entradas = r["cache_entradas"]
+            print(
+                f"   {'':<30} cache em memória (rotas e partes): "
+                f"{entradas['hits']} hits, {entradas['misses']} misses"
+            )
+
+
+async def benchmark_comando(url: Optional[str], requisicoes: int, concorrencia: int, semente: int, arquivo_json: Optional[str]) -> bool:
+    """Função principal do benchmark"""
+
+    print("⏱️  BENCHMARK DE CARGA")
+    print("=" * 50)
+    print(f"📅 Início: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+    print(f"🎯 Alvo: {url or 'API em processo (LLM_BACKEND=fake)'}")
+    print(f"   {requisicoes} requisições por endpoint, até {concorrencia} simultâneas")
+
+    if url:
+        cliente = httpx.AsyncClient(base_url=url, timeout=120)
+    else:
+        # Importar a API só depois de fixar o backend local (todo o tráfego
+        # vem do mesmo cliente, então a cota por usuário fica desligada)
+        os.environ.setdefault("LLM_BACKEND", "fake")
+        os.environ.setdefault("LLM_RATE_LIMIT", "false")
+        from main import app
+        cliente = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://benchmark", timeout=120
+        )
+
+    try:
+        async with cliente:
+            resultados = await benchmark(cliente, requisicoes, concorrencia, semente)
+    except Exception as e:
+        print(f"\n❌ ERRO: {e}")
+        return False
+
+    imprimir_resultados(resultados)
+
+    if arquivo_json:
+        with open(arquivo_json, "w", encoding="utf-8") as f:
+            json.dump({
+                "data": datetime.now().isoformat(),
+                "alvo": url or "em-processo",
+                "semente": semente,
+                "resultados": resultados,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Resultados salvos em {arquivo_json}")
+
+    print(f"\n🏁 Finalizado: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+    return True
+
+
+def main():
+    """Função principal do comando"""
+    parser = argparse.ArgumentParser(description="Benchmark de carga da API de turismo")
+    parser.add_argument("url", nargs="?", help="URL base da API (padrão: API em processo)")
+    parser.add_argument("--requisicoes", type=int, default=200, help="Requisições por endpoint")
+    parser.add_argument("--concorrencia", type=int, default=10, help="Requisições simultâneas")
+    parser.add_argument("--semente", type=int, default=42, help="Semente da sequência de requisições")
+    parser.add_argument("--json", dest="arquivo_json", help="Salvar resultados em JSON")
+    args = parser.parse_args()
+
+    sucesso = asyncio.run(benchmark_comando(
+        args.url, args.requisicoes, args.concorrencia, args.semente, args.arquivo_json
+    ))
+
+    if not sucesso:
+        print("❌ Benchmark falhou!")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
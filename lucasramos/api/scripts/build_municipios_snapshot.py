@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Gerar o snapshot de municípios (data/municipios.csv.gz) usado pelo carregamento offline
+
+Fontes (só necessárias para regenerar o arquivo, não para carregá-lo):
+- brutils (MIT): código IBGE de todos os municípios, por UF e nome normalizado
+- geonamescache (dados GeoNames, CC BY 4.0): coordenadas das localidades
+  brasileiras com 500+ habitantes; ou, com --geonames, um dump bruto do GeoNames
+  (BR.txt), que traz o código de feição de cada localidade
+
+Cada município recebe as coordenadas da localidade de mesmo nome (sem acentos e
+pontuação) na mesma UF. Nomes alternativos do GeoNames ("Ubá" também designa
+Uberaba) e grafias diferentes, casadas por similaridade, só valem para
+localidades que ainda não são a sede de outro município.
+
+Havendo várias localidades com o nome, as candidatas são tentadas em ordem: sedes
+(PPLC/PPLA/PPLA2, só no dump bruto) e depois as mais populosas. Bairros, distritos
+e localidades históricas (PPLX, PPLH, ...) são descartados quando o código de
+feição é conhecido; sem ele, a validação geométrica os pega: uma candidata a
+poucos km da sede de um município muito maior é um bairro dele ("Paraíso", em
+São Paulo, não é Paraíso/SP), e uma a centenas de km de qualquer outra sede da
+UF está na UF errada. Reprovada a candidata, vale a próxima; sem nenhuma, o
+município fica de fora (a importação do IBGE o cria com coordenadas aproximadas).
+
+Uso:
+  pip install brutils geonamescache
+  python scripts/build_municipios_snapshot.py [saida.csv.gz] [--geonames BR.txt]
+"""
+
+import argparse
+import csv
+import difflib
+import gzip
+import importlib.util
+import io
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+from unidecode import unidecode
+
+# Adicionar o diretório da API ao path para imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.geo import haversine_km
+
+SAIDA_PADRAO = Path(__file__).resolve().parent.parent / "data" / "municipios.csv.gz"
+
+COLUNAS = ["ibge_id", "nome", "uf", "latitude", "longitude"]
+
+# Código admin1 do GeoNames → sigla da UF
+UF_POR_ADMIN1 = {
+    "01": "AC", "02": "AL", "03": "AP", "04": "AM", "05": "BA", "06": "CE", "07": "DF",
+    "08": "ES", "29": "GO", "13": "MA", "14": "MT", "11": "MS", "15": "MG", "16": "PA",
+    "17": "PB", "18": "PR", "30": "PE", "20": "PI", "21": "RJ", "22": "RN", "23": "RS",
+    "24": "RO", "25": "RR", "26": "SC", "27": "SP", "28": "SE", "31": "TO",
+}
+
+# Similaridade mínima para casar grafias diferentes do mesmo município
+SIMILARIDADE_MINIMA = 0.85
+
+# Códigos de feição do GeoNames (dump bruto): sedes têm preferência; bairros,
+# localidades abandonadas, destruídas ou históricas não são sede de município
+CODIGOS_SEDE = {"PPLC": 0, "PPLA": 1, "PPLA2": 2}
+CODIGOS_DESCARTADOS = {"PPLX", "PPLH", "PPLQ", "PPLW", "PPLCH", "PPLR", "PPLF"}
+
+# Candidata a menos disso da sede de um município PROPORCAO_BAIRRO vezes mais
+# populoso é tratada como bairro dele (municípios conurbados ficam bem abaixo da
+# proporção: Barra dos Coqueiros/Aracaju é 16; o bairro Paraíso/São Paulo, ~2000)
+RAIO_BAIRRO_KM = 5.0
+PROPORCAO_BAIRRO = 100
+
+# Candidata sem nenhuma outra sede da UF a essa distância está na UF errada
+# (Fernando de Noronha, a mais isolada, fica a ~540 km da sede mais próxima de PE)
+DISTANCIA_MAXIMA_UF_KM = 600.0
+
+# Rodadas de validação (reprovar uma candidata pode liberar outra)
+RODADAS_VALIDACAO = 10
+
+
+def normalizar(nome: str) -> str:
+    """Sem acentos, minúsculo, apóstrofos removidos e hífens como espaço"""
+    nome = unidecode(nome).lower().replace("'", "").replace("-", " ")
+    return re.sub(r"\s+", " ", nome).strip()
+
+
+def _nome_exibicao(nome: str) -> str:
+    """Nome sem qualificadores do GeoNames (ex: "Fernando de Noronha (Distrito Estadual)")"""
+    return re.sub(r"\s*\(.*\)$", "", nome)
+
+
+def _diretorio_pacote(nome: str) -> str:
+    """Diretório de um pacote instalado, sem importá-lo (só os arquivos de dados são usados)"""
+    especificacao = importlib.util.find_spec(nome)
+    if especificacao is None:
+        sys.exit(f"❌ Pacote {nome} não instalado: pip install brutils geonamescache")
+    return list(especificacao.submodule_search_locations)[0]
+
+
+def carregar_codigos_ibge() -> dict:
+    """{uf: {nome_normalizado: ibge_id}} a partir do brutils"""
+    caminho = os.path.join(_diretorio_pacote("brutils"), "data", "cities_code.json")
+    with open(caminho, encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+
+def _ler_geonamescache() -> list:
+    """Localidades brasileiras do geonamescache (sem código de feição)"""
+    caminho = os.path.join(_diretorio_pacote("geonamescache"), "data", "cities500.json")
+    with open(caminho, encoding="utf-8") as arquivo:
+        cidades = json.load(arquivo)
+    return [
+        {**cidade, "featurecode": None}
+        for cidade in cidades.values() if cidade["countrycode"] == "BR"
+    ]
+
+
+def _ler_dump_geonames(caminho: str) -> list:
+    """Localidades (classe P) de um dump bruto do GeoNames, com o código de feição"""
+    cidades = []
+    with open(caminho, encoding="utf-8") as arquivo:
+        for linha in csv.reader(arquivo, delimiter="\t", quoting=csv.QUOTE_NONE):
+            if len(linha) < 15 or linha[6] != "P" or linha[8] != "BR":
+                continue
+            cidades.append({
+                "geonameid": int(linha[0]),
+                "name": linha[1],
+                "alternatenames": linha[3].split(","),
+                "latitude": float(linha[4]),
+                "longitude": float(linha[5]),
+                "featurecode": linha[7],
+                "admin1code": linha[10],
+                "population": int(linha[14] or 0),
+            })
+    return cidades
+
+
+def carregar_localidades(dump_geonames: str = None) -> tuple:
+    """
+    ({uf: {nome: [localidades]}}, {uf: {nome alternativo: [localidades]}})
+
+    As listas vêm na ordem de preferência: sedes primeiro (se o código de feição
+    for conhecido), depois as mais populosas.
+    """
+    cidades = _ler_dump_geonames(dump_geonames) if dump_geonames else _ler_geonamescache()
+
+    principais: dict = {}
+    alternativos: dict = {}
+    for cidade in cidades:
+        uf = UF_POR_ADMIN1.get(cidade["admin1code"])
+        if not uf or cidade["featurecode"] in CODIGOS_DESCARTADOS:
+            continue
+        _registrar(principais.setdefault(uf, {}), cidade["name"], cidade)
+        for nome in filter(None, cidade.get("alternatenames") or []):
+            _registrar(alternativos.setdefault(uf, {}), nome, cidade)
+
+    for por_uf in (principais, alternativos):
+        for por_nome in por_uf.values():
+            for candidatas in por_nome.values():
+                candidatas.sort(key=_preferencia)
+    return principais, alternativos
+
+
+def _registrar(por_nome: dict, nome: str, cidade: dict):
+    candidatas = por_nome.setdefault(normalizar(nome), [])
+    if cidade not in candidatas:
+        candidatas.append(cidade)
+
+
+def _preferencia(cidade: dict) -> tuple:
+    return CODIGOS_SEDE.get(cidade["featurecode"], len(CODIGOS_SEDE)), -cidade["population"]
+
+
+def casar_municipios(codigos: dict, principais: dict, alternativos: dict) -> tuple:
+    """
+    Candidatas de cada município, na ordem de preferência
+
+    Returns:
+        Tupla ({ibge_id: (uf, [candidatas])}, aproximados, sem_candidatas)
+    """
+    # 1ª passada: nome principal exato na UF
+    candidatos, pendentes = {}, []
+    for uf, municipios in codigos.items():
+        por_nome = principais.get(uf, {})
+        for nome_normalizado, ibge_id in municipios.items():
+            localidades = por_nome.get(normalizar(nome_normalizado))
+            if localidades:
+                candidatos[int(ibge_id)] = (uf, localidades)
+            else:
+                pendentes.append((uf, nome_normalizado, ibge_id))
+
+    # 2ª passada: nome alternativo exato; 3ª: grafia parecida. As duas só entre
+    # localidades que não são candidatas a sede de outro município
+    usadas = {
+        localidade["geonameid"]
+        for _, localidades in candidatos.values() for localidade in localidades
+    }
+    aproximados, sem_candidatas = [], []
+    for uf, nome_normalizado, ibge_id in pendentes:
+        livres = {}
+        for por_nome in (principais.get(uf, {}), alternativos.get(uf, {})):
+            for chave, localidades in por_nome.items():
+                localidades = [localidade for localidade in localidades if localidade["geonameid"] not in usadas]
+                if localidades:
+                    livres.setdefault(chave, localidades)
+
+        localidades = livres.get(normalizar(nome_normalizado))
+        if localidades is None:
+            parecidos = difflib.get_close_matches(
+                normalizar(nome_normalizado), livres.keys(), n=1, cutoff=SIMILARIDADE_MINIMA
+            )
+            if not parecidos:
+                sem_candidatas.append(f"{nome_normalizado}/{uf}")
+                continue
+            localidades = livres[parecidos[0]]
+            aproximados.append(f"{nome_normalizado}/{uf} ≈ {localidades[0]['name']}")
+
+        usadas.update(localidade["geonameid"] for localidade in localidades)
+        candidatos[int(ibge_id)] = (uf, localidades)
+
+    return candidatos, aproximados, sem_candidatas
+
+
+def _celula(localidade: dict) -> tuple:
+    # Células de 0,1° (~11 km): vizinhas a menos de RAIO_BAIRRO_KM ficam na mesma ou na adjacente
+    return int(localidade["latitude"] // 0.1), int(localidade["longitude"] // 0.1)
+
+
+def _bairro_de(localidade: dict, sedes_por_celula: dict) -> dict:
+    """Sede de município muito maior a menos de RAIO_BAIRRO_KM (None se não houver)"""
+    if localidade["population"] <= 0:
+        return None  # população desconhecida no GeoNames: sem como comparar
+    i, j = _celula(localidade)
+    for di in (-1, 0, 1):
+        for dj in (-1, 0, 1):
+            for sede in sedes_por_celula.get((i + di, j + dj), ()):
+                if (
+                    sede["geonameid"] != localidade["geonameid"]
+                    and sede["population"] >= PROPORCAO_BAIRRO * localidade["population"]
+                    and haversine_km(localidade["latitude"], localidade["longitude"],
+                                     sede["latitude"], sede["longitude"]) < RAIO_BAIRRO_KM
+                ):
+                    return sede
+    return None
+
+
+def _fora_da_uf(localidade: dict, sedes_da_uf: list) -> bool:
+    """Nenhuma outra sede da UF a menos de DISTANCIA_MAXIMA_UF_KM"""
+    outras = [sede for sede in sedes_da_uf if sede["geonameid"] != localidade["geonameid"]]
+    return bool(outras) and all(
+        haversine_km(localidade["latitude"], localidade["longitude"], sede["latitude"], sede["longitude"])
+        > DISTANCIA_MAXIMA_UF_KM
+        for sede in outras
+    )
+
+
+def validar_candidatas(candidatos: dict) -> tuple:
+    """
+    Escolher para cada município a primeira candidata que não é bairro de outro
+    município nem está fora da área da UF
+
+    Returns:
+        Tupla ({ibge_id: (uf, localidade)}, substituidas, reprovados)
+    """
+    indice = {ibge_id: 0 for ibge_id in candidatos}
+    substituidas, reprovados = [], []
+
+    for _ in range(RODADAS_VALIDACAO):
+        escolhidas = {
+            ibge_id: (uf, localidades[indice[ibge_id]])
+            for ibge_id, (uf, localidades) in candidatos.items() if ibge_id in indice
+        }
+        sedes_por_celula: dict = {}
+        sedes_por_uf: dict = {}
+        for uf, localidade in escolhidas.values():
+            sedes_por_celula.setdefault(_celula(localidade), []).append(localidade)
+            sedes_por_uf.setdefault(uf, []).append(localidade)
+
+        mudou = False
+        for ibge_id, (uf, localidade) in escolhidas.items():
+            motivo = None
+            sede = _bairro_de(localidade, sedes_por_celula)
+            if sede is not None:
+                motivo = f"bairro de {sede['name']}"
+            elif _fora_da_uf(localidade, sedes_por_uf[uf]):
+                motivo = "longe de todas as outras sedes da UF"
+            if motivo is None:
+                continue
+
+            mudou = True
+            descricao = f"{localidade['name']}/{uf} ({localidade['latitude']}, {localidade['longitude']}): {motivo}"
+            if indice[ibge_id] + 1 < len(candidatos[ibge_id][1]):
+                indice[ibge_id] += 1
+                proxima = candidatos[ibge_id][1][indice[ibge_id]]
+                substituidas.append(f"{descricao} → ({proxima['latitude']}, {proxima['longitude']})")
+            else:
+                del indice[ibge_id]
+                reprovados.append(descricao)
+        if not mudou:
+            break
+
+    escolhidas = {
+        ibge_id: (uf, localidades[indice[ibge_id]])
+        for ibge_id, (uf, localidades) in candidatos.items() if ibge_id in indice
+    }
+    return escolhidas, substituidas, reprovados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gerar o snapshot de municípios")
+    parser.add_argument("saida", nargs="?", default=str(SAIDA_PADRAO), help="Arquivo .csv.gz de saída")
+    parser.add_argument("--geonames", help="Dump bruto do GeoNames (BR.txt), com códigos de feição")
+    args = parser.parse_args()
+    saida = Path(args.saida)
+
+    print(f"📥 Lendo fontes (brutils + {'dump do GeoNames' if args.geonames else 'geonamescache'})...")
+    codigos = carregar_codigos_ibge()
+    principais, alternativos = carregar_localidades(args.geonames)
+
+    candidatos, aproximados, sem_candidatas = casar_municipios(codigos, principais, alternativos)
+    encontrados, substituidas, reprovados = validar_candidatas(candidatos)
+
+    linhas = [
+        (ibge_id, _nome_exibicao(localidade["name"]), uf,
+         round(localidade["latitude"], 5), round(localidade["longitude"], 5))
+        for ibge_id, (uf, localidade) in encontrados.items()
+    ]
+    linhas.sort()
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    texto = io.StringIO()
+    escritor = csv.writer(texto, lineterminator="\n")
+    escritor.writerow(COLUNAS)
+    escritor.writerows(linhas)
+    # mtime fixo: o arquivo só muda quando os dados mudam
+    with gzip.GzipFile(saida, "wb", compresslevel=9, mtime=0) as arquivo:
+        arquivo.write(texto.getvalue().encode("utf-8"))
+
+    print(f"✅ {len(linhas)} municípios gravados em {saida} ({saida.stat().st_size / 1024:.0f} KB)")
+    if aproximados:
+        print(f"🔎 {len(aproximados)} casados por similaridade:")
+        for item in aproximados:
+            print(f"   {item}")
+    if substituidas:
+        print(f"🔁 {len(substituidas)} candidatas reprovadas e trocadas pela seguinte:")
+        for item in substituidas:
+            print(f"   {item}")
+    if reprovados:
+        print(f"🚫 {len(reprovados)} sem candidata válida (ficam de fora):")
+        for item in reprovados:
+            print(f"   {item}")
+    if sem_candidatas:
+        print(f"⚠️  {len(sem_candidatas)} sem coordenadas (ficam de fora): {', '.join(sem_candidatas)}")
+
+
+if __name__ == "__main__":
+    main()
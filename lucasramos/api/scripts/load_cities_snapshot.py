@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Comando para popular o banco com o snapshot de municípios (offline, sem a API do IBGE)
+Uso: python scripts/load_cities_snapshot.py [UF] [--arquivo caminho.csv.gz]
+
+Exemplos:
+  python scripts/load_cities_snapshot.py          # Todos os municípios do Brasil
+  python scripts/load_cities_snapshot.py SP       # Apenas São Paulo
+
+Cidades já cadastradas (mesmo código IBGE) têm só as coordenadas corrigidas.
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime
+
+# Adicionar o diretório da API ao path para imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import SessionLocal
+from app.services.municipios_snapshot_service import MunicipiosSnapshotService
+
+UFS_VALIDAS = [
+    'AC', 'AL', 'AP', 'AM', 'BA', 'CE', 'DF', 'ES', 'GO',
+    'MA', 'MT', 'MS', 'MG', 'PA', 'PB', 'PR', 'PE', 'PI',
+    'RJ', 'RN', 'RS', 'RO', 'RR', 'SC', 'SP', 'SE', 'TO'
+]
+
+
+def main():
+    """Função principal do comando"""
+    parser = argparse.ArgumentParser(description="Carregar o snapshot de municípios na tabela cidades")
+    parser.add_argument("uf", nargs="?", help="Carregar apenas esta UF")
+    parser.add_argument("--arquivo", help="Snapshot alternativo (.csv.gz)")
+    args = parser.parse_args()
+
+    if args.uf and args.uf.upper() not in UFS_VALIDAS:
+        print(f"❌ UF inválida: {args.uf}")
+        print(f"UFs válidas: {', '.join(UFS_VALIDAS)}")
+        sys.exit(1)
+
+    print("🚀 CARGA OFFLINE DE MUNICÍPIOS")
+    print("=" * 50)
+    print(f"📅 Início: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+
+    db = SessionLocal()
+    try:
+        resultado = MunicipiosSnapshotService(db).carregar(caminho=args.arquivo, uf=args.uf)
+    except Exception as e:
+        print(f"\n❌ ERRO: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+    print("\n📊 RESULTADO:")
+    print(f"   Inseridas: {resultado['inseridas']}")
+    print(f"   Coordenadas corrigidas: {resultado['atualizadas']}")
+    print(f"   Inalteradas: {resultado['inalteradas']}")
+    print(f"   Duração: {resultado['duracao_ms'] / 1000:.2f} s")
+    print("\n💡 Para atualizar os nomes pela API do IBGE: python scripts/populate_cities.py")
+
+
+if __name__ == "__main__":
+    main()
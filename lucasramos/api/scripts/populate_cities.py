@@ -49,7 +49,9 @@ async def popular_cidades_comando(uf=None):
             print(f"   UF: {resultado['uf']}")
             print(f"   Cidades inseridas: {resultado['cidades_inseridas']}")
             print(f"   Cidades atualizadas: {resultado['cidades_atualizadas']}")
+            print(f"   Cidades inalteradas: {resultado['cidades_inalteradas']}")
             print(f"   Total processadas: {resultado['total']}")
+            print(f"   Tempos (ms): {resultado['tempos_ms']}")
             
         else:
             # Popular todas as cidades do Brasil
@@ -62,17 +64,28 @@ async def popular_cidades_comando(uf=None):
             print(f"   Estados processados: {resultado['estados_processados']}")
             print(f"   Total inseridas: {resultado['total_cidades_inseridas']}")
             print(f"   Total atualizadas: {resultado['total_cidades_atualizadas']}")
-            print(f"   Total geral: {resultado['total_cidades_inseridas'] + resultado['total_cidades_atualizadas']}")
+            print(f"   Total inalteradas: {resultado['total_cidades_inalteradas']}")
+            print(f"   Total geral: {sum(detalhe['total'] for detalhe in resultado['detalhes'])}")
+            if resultado['ufs_com_erro']:
+                print(f"   UFs com erro: {', '.join(resultado['ufs_com_erro'])}")
+            
+            print("\n⏱️  TEMPOS POR ETAPA (ms):")
+            for etapa, duracao in resultado['tempos_ms'].items():
+                print(f"   {etapa}: {duracao}")
             
             print("\n📋 DETALHES POR ESTADO:")
             for detalhe in resultado['detalhes']:
-                print(f"   {detalhe['uf']}: {detalhe['total']} cidades")
+                print(
+                    f"   {detalhe['uf']}: {detalhe['total']} cidades "
+                    f"(busca {detalhe['tempos_ms']['busca']} ms, gravação {detalhe['tempos_ms']['gravacao']} ms)"
+                )
     
     except Exception as e:
         print(f"\n❌ ERRO: {e}")
         return False
     
     finally:
+        await ibge_service.close()
         db.close()
         print(f"\n🏁 Finalizado: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
     
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Comando para aquecer o cache de rotas turísticas com os pares mais solicitados
+Uso: python warm_route_cache.py [TOP_N] [CONCORRENCIA]
+
+Os pares vêm da lista fixa AQUECIMENTO_PARES e do histórico de roteiros salvos
+(pares mais frequentes primeiro). As rotas são geradas com concorrência limitada
+e gravadas no cache persistente (tabela rotas_cache), compartilhado pelos workers
+da API. Rotas já em cache não consultam o Gemini novamente.
+
+Exemplos:
+  python warm_route_cache.py          # AQUECIMENTO_TOP_N pares, AQUECIMENTO_CONCORRENCIA simultâneos
+  python warm_route_cache.py 100      # 100 pares mais solicitados
+  python warm_route_cache.py 100 4    # 100 pares, 4 rotas geradas ao mesmo tempo
+"""
+
+import asyncio
+import re
+import sys
+import os
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+# Adicionar o diretório da API ao path para imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.repositories.roteiro_repository import RoteiroRepository
+from app.schemas.turismo import SolicitacaoRota
+from app.services.gemini_service import GeminiService
+from app.services.turismo_service import TurismoService
+
+# Cidade com UF opcional no final: "São Paulo/SP", "São Paulo, SP" ou "São Paulo - SP"
+PADRAO_CIDADE_UF = re.compile(r"^(.*?)\s*[/,-]\s*([A-Za-z]{2})$")
+
+
+def separar_cidade_uf(texto: str) -> Tuple[str, Optional[str]]:
+    """Separar nome da cidade e UF (quando informada)"""
+    texto = texto.strip()
+    match = PADRAO_CIDADE_UF.match(texto)
+    if match and match.group(1):
+        return match.group(1).strip(), match.group(2).upper()
+    return texto, None
+
+
+def criar_solicitacao(origem: str, destino: str, preferencias: Optional[str] = None) -> SolicitacaoRota:
+    """Criar solicitação de rota a partir dos textos de origem e destino"""
+    cidade_origem, uf_origem = separar_cidade_uf(origem)
+    cidade_destino, uf_destino = separar_cidade_uf(destino)
+    return SolicitacaoRota(
+        cidade_origem=cidade_origem,
+        cidade_destino=cidade_destino,
+        uf_origem=uf_origem,
+        uf_destino=uf_destino,
+        preferencias=preferencias or None,
+    )
+
+
+def carregar_pares(top_n: int) -> List[SolicitacaoRota]:
+    """Montar a lista de pares: configurados primeiro, depois os mais solicitados"""
+    solicitacoes: List[SolicitacaoRota] = []
+    vistos = set()
+
+    def adicionar(origem: str, destino: str, preferencias: Optional[str] = None):
+        chave = (origem.strip().lower(), destino.strip().lower(), (preferencias or "").strip().lower())
+        if chave in vistos or len(origem.strip()) < 2 or len(destino.strip()) < 2:
+            return
+        vistos.add(chave)
+        solicitacoes.append(criar_solicitacao(origem, destino, preferencias))
+
+    # Pares configurados
+    for par in filter(None, (p.strip() for p in settings.AQUECIMENTO_PARES.split(";"))):
+        if ">" not in par:
+            print(f"⚠️  Par ignorado (use 'Origem/UF>Destino/UF'): {par}")
+            continue
+        origem, destino = par.split(">", 1)
+        adicionar(origem, destino)
+
+    # Pares mais solicitados no histórico de roteiros
+    try:
+        with SessionLocal() as db:
+            for origem, destino, preferencias, total in RoteiroRepository(db).pares_mais_solicitados(top_n):
+                adicionar(origem, destino, preferencias)
+    except Exception as e:
+        print(f"⚠️  Histórico de roteiros indisponível: {e}")
+
+    return solicitacoes[:max(top_n, 0)] if top_n else solicitacoes
+
+
+async def aquecer_rota(solicitacao: SolicitacaoRota, semaforo: asyncio.Semaphore) -> bool:
+    """Gerar (ou confirmar em cache) a rota de um par"""
+    descricao = f"{solicitacao.cidade_origem} → {solicitacao.cidade_destino}"
+    if solicitacao.preferencias:
+        descricao += f" ({solicitacao.preferencias})"
+
+    async with semaforo:
+        inicio = time.perf_counter()
+        # Uma sessão por rota: as consultas concorrentes não compartilham estado
+        with SessionLocal() as db:
+            resposta = await TurismoService(db).obter_rota_turistica(solicitacao)
+        duracao = time.perf_counter() - inicio
+
+    if not resposta.sucesso:
+        print(f"   ❌ {descricao}: {resposta.erro}")
+        return False
+
+    fonte = (resposta.metadata or {}).get("fonte", "gemini")
+    print(f"   ✅ {descricao}: {duracao:.1f}s ({fonte})")
+    return True
+
+
+async def aquecer_cache_comando(top_n: int, concorrencia: int) -> bool:
+    """Função principal para aquecer o cache"""
+
+    print("🔥 AQUECIMENTO DO CACHE DE ROTAS")
+    print("=" * 50)
+    print(f"📅 Início: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+
+    if not settings.ROUTE_CACHE_PERSISTENTE:
+        print("⚠️  ROUTE_CACHE_PERSISTENTE=False: as rotas ficariam só na memória deste processo")
+        return False
+
+    solicitacoes = carregar_pares(top_n)
+    if not solicitacoes:
+        print("ℹ️  Nenhum par para aquecer (configure AQUECIMENTO_PARES ou salve roteiros)")
+        return True
+
+    print(f"🎯 {len(solicitacoes)} pares, até {concorrencia} simultâneos\n")
+
+    chamadas_antes = GeminiService.obter_estatisticas_cache()["single_flight"]["chamadas_gemini"]
+    inicio = time.perf_counter()
+    semaforo = asyncio.Semaphore(max(1, concorrencia))
+    resultados = await asyncio.gather(
+        *(aquecer_rota(s, semaforo) for s in solicitacoes),
+        return_exceptions=True
+    )
+    duracao = time.perf_counter() - inicio
+    chamadas_gemini = GeminiService.obter_estatisticas_cache()["single_flight"]["chamadas_gemini"] - chamadas_antes
+
+    falhas = 0
+    for solicitacao, resultado in zip(solicitacoes, resultados):
+        if isinstance(resultado, BaseException):
+            falhas += 1
+            print(f"   ❌ {solicitacao.cidade_origem} → {solicitacao.cidade_destino}: {resultado}")
+        elif not resultado:
+            falhas += 1
+
+    print("\n📊 RESULTADO:")
+    print(f"   Pares processados: {len(solicitacoes)}")
+    print(f"   Pares aquecidos: {len(solicitacoes) - falhas}")
+    print(f"   Falhas: {falhas}")
+    print(f"   Consultas ao Gemini: {chamadas_gemini}")
+    print(f"   Tempo total: {duracao:.1f}s")
+    print(f"\n🏁 Finalizado: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+
+    return falhas < len(solicitacoes)
+
+
+def main():
+    """Função principal do comando"""
+
+    # Verificar argumentos
+    try:
+        top_n = int(sys.argv[1]) if len(sys.argv) > 1 else settings.AQUECIMENTO_TOP_N
+        concorrencia = int(sys.argv[2]) if len(sys.argv) > 2 else settings.AQUECIMENTO_CONCORRENCIA
+    except ValueError:
+        print("❌ Argumentos inválidos")
+        print(__doc__)
+        sys.exit(1)
+
+    # Executar o processo
+    sucesso = asyncio.run(aquecer_cache_comando(top_n, concorrencia))
+
+    if sucesso:
+        print("✅ Cache aquecido com sucesso!")
+        print("\n💡 Dicas:")
+        print("   • Veja as estatísticas: GET /api/v1/tourism/cache/stats")
+        print("   • Rode após cada deploy ou DELETE /api/v1/tourism/cache")
+    else:
+        print("❌ Processo falhou!")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()